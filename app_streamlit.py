@@ -4,17 +4,37 @@ Processador de Documentos Financeiros (Guias Geradas)
 """
 
 import streamlit as st
-import tempfile
-import os
 import json
+import os
+import tempfile
+import time
+import weakref
+from datetime import datetime
 from pathlib import Path
 import sys
 
 # Adiciona o diretório pai ao path para importar módulos
 sys.path.insert(0, str(Path(__file__).parent))
 
-from pdf_parser import PDFFinancialParser
-from calculator import FinancialCalculator
+from checkpoint import CheckpointStore
+from exporters import MIME_TYPES, available_formats, export_rows
+from history_store import HistoryStore, file_hash, parse_period
+from jobs import CANCELLED, DONE, RUNNING, BatchJob, ExtractionJob
+from memory_budget import DEFAULT_MEMORY_BUDGET_MB
+from pipeline import build_summary, summaries_to_csv
+from result_cache import ResultCache, compute_cache_key
+
+# Intervalo entre atualizações do progresso, em segundos
+PROGRESS_REFRESH_S = 0.5
+
+# Rótulos da situação de cada arquivo de um lote
+BATCH_STATUS = {
+    "aguardando": "⏸️ Aguardando",
+    "processando": "⏳ Processando",
+    "ok": "✅ Processado",
+    "erro": "❌ Erro",
+    "cancelado": "⛔ Cancelado",
+}
 
 # Configuração da página
 st.set_page_config(
@@ -75,7 +95,7 @@ with st.sidebar:
     - 📊 Exibe estatísticas
     
     ### Recursos
-    - ✅ Upload simples de PDF
+    - ✅ Upload de um ou vários PDFs
     - ✅ Processamento em tempo real
     - ✅ Resultados em R$ (BRL)
     - ✅ Exportação de dados
@@ -86,6 +106,29 @@ with st.sidebar:
     
     st.markdown("---")
     
+    st.subheader("🩺 Diagnóstico")
+    collect_metrics = st.checkbox(
+        "Medir tempos do processamento",
+        value=False,
+        help="Registra o tempo de cada etapa e de cada página do PDF"
+    )
+    
+    st.markdown("---")
+    
+    st.subheader("🗂️ Histórico")
+    periodo_texto = st.text_input(
+        "Período de referência (AAAA-MM)",
+        value=datetime.now().strftime("%Y-%m"),
+        help="Mês a que se referem os relatórios processados, usado nas consultas ao histórico"
+    )
+    try:
+        periodo = parse_period(periodo_texto)
+    except ValueError as e:
+        st.error(str(e))
+        periodo = None
+    
+    st.markdown("---")
+    
     st.subheader("📞 Suporte")
     st.markdown("""
     Dúvidas sobre uso? Verifique:
@@ -93,62 +136,322 @@ with st.sidebar:
     - [Issues](https://github.com)
     """)
 
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    """Cache de resultados compartilhado entre as sessões."""
+    return ResultCache()
+
+
+@st.cache_resource
+def get_checkpoint_store() -> CheckpointStore:
+    """Checkpoints que permitem retomar PDFs grandes após um reinício."""
+    return CheckpointStore()
+
+
+@st.cache_resource
+def get_history_store() -> HistoryStore:
+    """Histórico SQLite dos relatórios processados, compartilhado entre as sessões."""
+    return HistoryStore()
+
+
+def _remove_file(path: str) -> None:
+    """Apaga um arquivo temporário, ignorando se já não existir."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class RowExport:
+    """
+    Linhas de um resultado exportadas em um arquivo temporário.
+    
+    A exportação é feita em blocos direto do RecordStore, só quando pedida.
+    O arquivo é apagado com remove() ou quando o objeto deixa de ser usado
+    (resultado substituído, sessão encerrada ou fim do processo).
+    """
+    
+    def __init__(self, records, formato: str):
+        """
+        Exporta as linhas.
+        
+        Args:
+            records: RecordStore do resultado
+            formato: "csv", "jsonl" ou "parquet" (ver exporters.available_formats)
+        """
+        fd, self.path = tempfile.mkstemp(prefix="firc_linhas_", suffix=f".{formato}")
+        os.close(fd)
+        self.formato = formato
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
+        try:
+            export_rows(records, self.path, formato)
+        except Exception:
+            self.remove()
+            raise
+    
+    def remove(self) -> None:
+        """Apaga o arquivo exportado."""
+        self._finalizer()
+
+
 # Inicializar session state
 if 'results' not in st.session_state:
     st.session_state.results = None
 if 'uploaded_file' not in st.session_state:
     st.session_state.uploaded_file = None
+if 'job' not in st.session_state:
+    st.session_state.job = None
+    st.session_state.job_key = None
+if 'batch' not in st.session_state:
+    st.session_state.batch = None
+    st.session_state.batch_key = None
 
 # Upload de PDF
-st.subheader("📁 Selecione um PDF para Processar")
+st.subheader("📁 Selecione um ou mais PDFs para Processar")
 
-uploaded_file = st.file_uploader(
-    "Arraste ou clique para selecionar um arquivo PDF",
+uploaded_files = st.file_uploader(
+    "Arraste ou clique para selecionar arquivos PDF",
     type=['pdf'],
+    accept_multiple_files=True,
     key='pdf_uploader'
 )
+# Um arquivo tem a visão detalhada; vários formam um lote consolidado
+uploaded_file = uploaded_files[0] if len(uploaded_files) == 1 else None
 
 # Processar arquivo
 if uploaded_file is not None:
     st.session_state.uploaded_file = uploaded_file
     
-    # Criar arquivo temporário
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-        tmp_file.write(uploaded_file.read())
-        tmp_file_path = tmp_file.name
+    # O PDF é lido direto do buffer do upload, sem cópia nem arquivo temporário
+    pdf_buffer = uploaded_file.getbuffer()
+    cache_key = compute_cache_key(pdf_buffer)
     
-    try:
-        with st.spinner('⏳ Processando PDF...'):
-            # Extrair dados
-            parser = PDFFinancialParser(tmp_file_path)
-            extracted_data = parser.extract_data()
-            
-            # Calcular totais
-            calculator = FinancialCalculator()
-            result = calculator.calculate_totals(extracted_data)
-            
+    # A extração roda em segundo plano, ligada à sessão. Reexecuções da
+    # página (outros widgets, atualização do progresso) retomam o mesmo job
+    # em vez de começar outro; só um PDF diferente inicia uma nova extração.
+    job_key = (cache_key, collect_metrics)
+    job = st.session_state.job
+    if job is None or st.session_state.job_key != job_key:
+        if job is not None:
+            job.cancel()
+        # PDFs já processados (mesmo conteúdo) vêm direto do cache;
+        # com o diagnóstico ligado o PDF é sempre medido de novo
+        job = ExtractionJob(
+            pdf_buffer,
+            uploaded_file.name,
+            cache=None if collect_metrics else get_result_cache(),
+            cache_key=cache_key,
+            collect_metrics=collect_metrics,
+            checkpoints=get_checkpoint_store(),
+            low_memory=True,
+            memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB
+        ).start()
+        st.session_state.job = job
+        st.session_state.job_key = job_key
+        st.session_state.results = None
+        # Resultados do cache ficam prontos quase imediatamente
+        job.wait(PROGRESS_REFRESH_S)
+    
+    if job.state == RUNNING:
+        progresso = job.progress()
+        feitas = progresso["paginas_processadas"]
+        total = progresso["total_paginas"]
+        
+        if total:
+            texto = f"⏳ Processando página {feitas} de {total}"
+            if progresso["restante_s"] is not None:
+                texto += f" — cerca de {progresso['restante_s']:.0f} s restantes"
+            st.progress(feitas / total, text=texto)
+        else:
+            st.progress(0.0, text="⏳ Abrindo PDF...")
+        
+        parciais = progresso["totais_parciais"]
+        col1, col2, col3 = st.columns([2, 2, 1])
+        col1.metric("Valor Pago (parcial)", f"R$ {parciais['total_valor_pago']:.2f}")
+        col2.metric("Cartório (parcial)", f"R$ {parciais['total_cartorio']:.2f}")
+        with col3:
+            if st.button("⛔ Cancelar"):
+                job.cancel()
+                job.wait()
+                st.rerun()
+        
+        time.sleep(PROGRESS_REFRESH_S)
+        st.rerun()
+    
+    elif job.state == DONE:
+        processed = job.result
+        if st.session_state.results is None:
             # Salvar resultados no session state
             st.session_state.results = {
-                'data': result,
+                'data': processed['totals'],
                 'filename': uploaded_file.name,
-                'extracted_data': extracted_data
+                'extracted_data': processed['extracted_data'],
+                'por_cartorio': processed['por_cartorio'],
+                'records': processed['records'],
+                'metricas': processed.get('metricas'),
+                'registrado': False
             }
         
         st.success('✅ PDF processado com sucesso!')
         
-    except Exception as e:
-        st.error(f'❌ Erro ao processar PDF: {str(e)}')
+        # Registrado uma vez por resultado, para consultas futuras; com o
+        # período inválido o registro espera a correção na barra lateral
+        if not st.session_state.results['registrado']:
+            if periodo is None:
+                st.warning("⚠️ Resultado ainda não registrado no histórico: corrija o período")
+            else:
+                try:
+                    get_history_store().record_result(
+                        processed, file_hash(pdf_buffer), uploaded_file.name, periodo
+                    )
+                    st.session_state.results['registrado'] = True
+                except Exception as e:
+                    st.warning(f"⚠️ Resultado não registrado no histórico: {e}")
     
-    finally:
-        # Limpar arquivo temporário
-        if os.path.exists(tmp_file_path):
-            os.unlink(tmp_file_path)
+    elif job.state == CANCELLED:
+        progresso = job.progress()
+        st.warning(
+            f"⛔ Processamento cancelado após {progresso['paginas_processadas']} "
+            f"de {progresso['total_paginas'] or '?'} páginas"
+        )
+        if st.button("🔁 Processar novamente"):
+            st.session_state.job = None
+            st.rerun()
+    
+    else:
+        st.error(f'❌ Erro ao processar PDF: {job.error}')
+
+# Processar lote de arquivos
+elif len(uploaded_files) > 1:
+    st.session_state.results = None
+    
+    # Arquivos processados ao mesmo tempo em um pool de processos; o lote
+    # segue vivo entre reexecuções enquanto a seleção de arquivos for a mesma
+    batch_key = (tuple((f.name, f.size) for f in uploaded_files), collect_metrics)
+    batch = st.session_state.batch
+    if batch is None or st.session_state.batch_key != batch_key:
+        if batch is not None:
+            batch.cancel()
+        batch = BatchJob(
+            [(f.name, f.getvalue()) for f in uploaded_files],
+            cache_dir=None if collect_metrics else str(get_result_cache().directory),
+            collect_metrics=collect_metrics,
+            checkpoints=get_checkpoint_store(),
+            low_memory=True,
+            memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB,
+            # Sem período válido o lote não é registrado no histórico
+            history=get_history_store().path if periodo is not None else None,
+            periodo=periodo
+        ).start()
+        st.session_state.batch = batch
+        st.session_state.batch_key = batch_key
+    
+    progresso = batch.progress()
+    total_geral = progresso["total_geral"]
+    concluidos = progresso["concluidos"]
+    total_arquivos = progresso["total_arquivos"]
+    falhas = sum(1 for line in progresso["arquivos"] if line["status"] == "erro")
+    
+    st.markdown("---")
+    st.subheader("🗂️ Lote de Arquivos")
+    if batch.parser_options.get("history") is None:
+        st.warning("⚠️ Lote não registrado no histórico: o período era inválido ao iniciar")
+    
+    if batch.state == RUNNING:
+        col1, col2 = st.columns([4, 1])
+        col1.progress(
+            concluidos / total_arquivos,
+            text=f"⏳ {concluidos} de {total_arquivos} arquivos processados"
+        )
+        with col2:
+            if st.button("⛔ Cancelar lote"):
+                batch.cancel()
+                st.rerun()
+    elif batch.state == CANCELLED:
+        st.warning(f"⛔ Lote cancelado: {concluidos} de {total_arquivos} arquivos processados")
+    elif falhas:
+        st.warning(f"⚠️ {total_arquivos - falhas} arquivos processados, {falhas} com erro")
+    else:
+        st.success(f"✅ {total_arquivos} arquivos processados com sucesso!")
+    
+    # Totais gerais (dos arquivos já concluídos, enquanto o lote roda)
+    col1, col2, col3 = st.columns(3)
+    col1.metric(
+        "Total Valor Pago",
+        f"R$ {total_geral['total_valor_pago']:.2f}",
+        delta=f"{total_geral['quantidade_valores_pago']} valores"
+    )
+    col2.metric(
+        "Total Cartório",
+        f"R$ {total_geral['total_cartorio']:.2f}",
+        delta=f"{total_geral['quantidade_cartorio']} valores"
+    )
+    col3.metric("Diferença", f"R$ {abs(total_geral['diferenca']):.2f}")
+    
+    st.markdown("**Totais por arquivo**")
+    st.dataframe(
+        [
+            {
+                "Arquivo": line["arquivo"],
+                "Status": BATCH_STATUS.get(line["status"], line["status"]),
+                "Valor Pago (R$)": line.get("total_valor_pago"),
+                "Cartório (R$)": line.get("total_cartorio"),
+                "Tempo (s)": line.get("tempo_s"),
+                "Erro": line.get("erro") or line.get("erro_historico") or ""
+            }
+            for line in progresso["arquivos"]
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    if batch.state == RUNNING:
+        time.sleep(PROGRESS_REFRESH_S)
+        st.rerun()
+    
+    if total_geral["por_cartorio"]:
+        st.markdown("**Valor Pago por Cartório (todos os arquivos)**")
+        st.dataframe(
+            [
+                {
+                    "Cartório": grupo["cartorio"],
+                    "Valor Pago (R$)": grupo["total_valor_pago"],
+                    "Cartório (R$)": grupo["total_cartorio"],
+                    "Linhas": grupo["quantidade"]
+                }
+                for grupo in total_geral["por_cartorio"]
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    # Exportação de todos os arquivos
+    resumo_lote = batch.summary()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="📥 Baixar JSON (todos os arquivos)",
+            data=json.dumps(resumo_lote, indent=2, ensure_ascii=False),
+            file_name="resultado_lote.json",
+            mime="application/json"
+        )
+    with col2:
+        st.download_button(
+            label="📥 Baixar CSV (todos os arquivos)",
+            data=summaries_to_csv(resumo_lote["arquivos"], resumo_lote["total_geral"]),
+            file_name="resultado_lote.csv",
+            mime="text/csv"
+        )
 
 # Exibir resultados
 if st.session_state.results:
     results = st.session_state.results['data']
     filename = st.session_state.results['filename']
     extracted_data = st.session_state.results['extracted_data']
+    por_cartorio = st.session_state.results['por_cartorio']
+    records = st.session_state.results['records']
+    metricas = st.session_state.results.get('metricas')
     
     st.markdown("---")
     st.subheader("📊 Resultados do Processamento")
@@ -273,22 +576,115 @@ if st.session_state.results:
         else:
             st.warning("Nenhum valor de Cartório encontrado")
     
+    # Todas as linhas extraídas, para auditoria
+    if len(records):
+        st.markdown(f"**Exportar todas as {len(records)} linhas** "
+                    "(página, guia, cartório, Valor Pago e valor de Cartório)")
+        # O arquivo só é gerado quando pedido, um formato por vez. O botão de
+        # download lê o arquivo inteiro para a memória a cada exibição
+        exportacao = st.session_state.results.get('exportacao')
+        formatos = available_formats()
+        for col, formato in zip(st.columns(len(formatos)), formatos):
+            with col:
+                if exportacao is not None and exportacao.formato == formato:
+                    with open(exportacao.path, "rb") as fp:
+                        st.download_button(
+                            label=f"📥 Baixar linhas ({formato.upper()})",
+                            data=fp,
+                            file_name=f"linhas_{Path(filename).stem}.{formato}",
+                            mime=MIME_TYPES[formato]
+                        )
+                elif st.button(f"📄 Gerar linhas ({formato.upper()})"):
+                    if exportacao is not None:
+                        exportacao.remove()
+                    with st.spinner("Exportando linhas..."):
+                        st.session_state.results['exportacao'] = RowExport(records, formato)
+                    st.rerun()
+    
+    # Valor Pago agrupado por Cartório
+    st.markdown("---")
+    st.subheader("🏛️ Valor Pago por Cartório")
+    
+    if por_cartorio:
+        st.dataframe(
+            [
+                {
+                    "Cartório": grupo["cartorio"],
+                    "Valor Pago (R$)": grupo["total_valor_pago"],
+                    "Cartório (R$)": grupo["total_cartorio"],
+                    "Linhas": grupo["quantidade"]
+                }
+                for grupo in por_cartorio
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+    else:
+        st.warning("Nenhuma linha de guia encontrada para agrupar")
+    
+    # Busca de uma guia pelo índice do RecordStore
+    st.markdown("---")
+    st.subheader("🔎 Buscar Guia")
+    
+    numero_guia = st.text_input("Número da guia", placeholder="ex: 0024102419")
+    if numero_guia:
+        linhas_guia = records.find_guia(numero_guia)
+        if linhas_guia:
+            st.dataframe(
+                [
+                    {
+                        "Página": linha.pagina,
+                        "Guia": linha.guia,
+                        "Cartório": linha.cartorio,
+                        "Valor Pago": linha.valor_pago,
+                        "Valor Cartório": linha.valor_cartorio,
+                        "Origem": linha.origem
+                    }
+                    for linha in linhas_guia
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.warning(f"Guia {numero_guia} não encontrada")
+    
+    # Tempos e contadores do processamento
+    if metricas:
+        with st.expander("🩺 Diagnóstico", expanded=False):
+            contadores = metricas["contadores"]
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Páginas", contadores.get("paginas_processadas", 0))
+            col2.metric("Linhas encontradas", contadores.get("linhas_encontradas", 0))
+            col3.metric("Valores rejeitados", contadores.get("valores_rejeitados", 0))
+            
+            st.markdown("**Tempo por etapa**")
+            st.dataframe(
+                [
+                    {"Etapa": nome, "Tempo (s)": etapa["tempo_s"], "Chamadas": etapa["chamadas"]}
+                    for nome, etapa in metricas["etapas"].items()
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+            
+            paginas = metricas["paginas"]
+            st.markdown(
+                f"**Páginas mais lentas** (média de {paginas['tempo_medio_s']:.3f} s por página)"
+            )
+            st.dataframe(
+                [
+                    {"Página": item["pagina"], "Tempo (s)": item["tempo_s"]}
+                    for item in paginas["mais_lentas"]
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+    
     # Resumo em JSON
     st.markdown("---")
     st.subheader("📋 Resumo JSON")
     
-    resumo = {
-        "arquivo": filename,
-        "total_valor_pago": round(results['total_valor_pago'], 2),
-        "total_cartorio": round(results['total_cartorio'], 2),
-        "diferenca": round(results['total_valor_pago'] - results['total_cartorio'], 2),
-        "quantidade_valores_pago": len(extracted_data.get('valor_pago', [])),
-        "quantidade_cartorio": len(extracted_data.get('cartorio', [])),
-        "total_de_valores": (
-            len(extracted_data.get('valor_pago', [])) + 
-            len(extracted_data.get('cartorio', []))
-        )
-    }
+    resumo = build_summary(filename, results, extracted_data, por_cartorio, metricas)
     
     col1, col2 = st.columns([3, 1])
     
@@ -310,15 +706,16 @@ if st.session_state.results:
     if st.button("🔄 Processar Outro PDF"):
         st.session_state.results = None
         st.session_state.uploaded_file = None
+        st.session_state.job = None
         st.rerun()
 
-else:
+elif not uploaded_files:
     # Mensagem inicial
     st.info("""
     ### 👋 Bem-vindo à Calculadora FIRC
     
-    1. **Selecione um PDF** de Guias Geradas usando o uploader acima
-    2. **Aguarde o processamento** - a análise é rápida
+    1. **Selecione um ou mais PDFs** de Guias Geradas usando o uploader acima
+    2. **Acompanhe o processamento** - página a página, com totais parciais
     3. **Visualize os resultados** - totais em R$ formatados
     4. **Baixe os dados** - exporte em JSON se necessário
     
@@ -331,6 +728,59 @@ else:
     - Exporte os resultados
     """)
 
+# Consultas ao histórico, sem reabrir os PDFs
+st.markdown("---")
+with st.expander("🗂️ Histórico de Relatórios", expanded=False):
+    historico = get_history_store()
+    col1, col2 = st.columns(2)
+    filtro_periodo = col1.text_input("Período (AAAA-MM)", value="", placeholder="todos")
+    filtro_cartorio = col2.selectbox("Cartório", ["Todos"] + historico.cartorios())
+    try:
+        filtro_periodo = parse_period(filtro_periodo) if filtro_periodo else None
+        totais_historico = historico.cartorio_totals(
+            None if filtro_cartorio == "Todos" else filtro_cartorio, filtro_periodo
+        )
+        arquivos_historico = historico.files(filtro_periodo)
+    except ValueError as e:
+        st.error(str(e))
+        totais_historico, arquivos_historico = [], []
+    
+    if totais_historico:
+        st.markdown("**Totais por período e cartório**")
+        st.dataframe(
+            [
+                {
+                    "Período": item["periodo"],
+                    "Cartório": item["cartorio"],
+                    "Valor Pago": f"R$ {item['total_valor_pago']:.2f}",
+                    "Cartório (R$)": f"R$ {item['total_cartorio']:.2f}",
+                    "Guias": item["quantidade"],
+                    "Arquivos": item["arquivos"]
+                }
+                for item in totais_historico
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+    if arquivos_historico:
+        st.markdown("**Arquivos processados**")
+        st.dataframe(
+            [
+                {
+                    "Arquivo": item["arquivo"],
+                    "Período": item["periodo"],
+                    "Processado em": item["processado_em"].replace("T", " "),
+                    "Valor Pago": f"R$ {item['total_valor_pago']:.2f}",
+                    "Cartório": f"R$ {item['total_cartorio']:.2f}"
+                }
+                for item in arquivos_historico
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+    elif not totais_historico:
+        st.info("Nenhum relatório registrado para este filtro")
+
 # Footer
 st.markdown("---")
 st.markdown("""
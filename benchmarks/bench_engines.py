@@ -0,0 +1,88 @@
+"""
+Benchmark dos motores de extração do PDFFinancialParser.
+
+Compara o motor padrão (extract_tables + extract_text) com o motor de
+passada única em um ou mais PDFs e confere se os resultados são iguais.
+
+Uso:
+    python benchmarks/bench_engines.py relatorio.pdf [outro.pdf ...] [--repeat 3]
+    python benchmarks/bench_engines.py --pages 50   # relatório sintético
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Adiciona a raiz do projeto ao path para importar os módulos
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pdfplumber
+
+from benchmarks.synthetic_pdf import write_report
+from pdf_parser import ENGINES, PDFFinancialParser
+
+
+def time_engine(pdf_path: str, engine: str, repeat: int) -> Dict[str, object]:
+    """
+    Mede o melhor tempo de extração de um motor.
+    
+    Args:
+        pdf_path: Caminho do PDF
+        engine: Nome do motor
+        repeat: Quantidade de repetições (vale o menor tempo)
+        
+    Returns:
+        Dict com o tempo (s) e os dados extraídos
+    """
+    best = float("inf")
+    data = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = PDFFinancialParser(pdf_path, engine=engine).extract_data()
+        best = min(best, time.perf_counter() - start)
+    return {"seconds": best, "data": data}
+
+
+def main(argv: List[str] = None) -> int:
+    """Executa o benchmark e imprime uma tabela comparativa."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("pdfs", nargs="*", help="PDFs de Guias Geradas")
+    parser.add_argument("--pages", type=int, help="gera um relatório sintético com N páginas")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições por motor")
+    args = parser.parse_args(argv)
+    
+    if args.pages:
+        path = os.path.join(tempfile.gettempdir(), f"firc_bench_engines_{args.pages}p.pdf")
+        write_report(path, args.pages)
+        args.pdfs.append(path)
+    if not args.pdfs:
+        parser.error("informe um ou mais PDFs ou --pages")
+    
+    status = 0
+    for pdf_path in args.pdfs:
+        with pdfplumber.open(pdf_path) as pdf:
+            pages = len(pdf.pages)
+        
+        results = {engine: time_engine(pdf_path, engine, args.repeat) for engine in ENGINES}
+        baseline = results["default"]
+        
+        print(f"\n{pdf_path} ({pages} páginas)")
+        print(f"{'motor':<14}{'tempo (s)':>12}{'ms/página':>12}{'speedup':>10}{'igual':>8}")
+        for engine, result in results.items():
+            same = result["data"] == baseline["data"]
+            status |= 0 if same else 1
+            print(
+                f"{engine:<14}{result['seconds']:>12.3f}"
+                f"{1000 * result['seconds'] / max(pages, 1):>12.1f}"
+                f"{baseline['seconds'] / result['seconds']:>9.2f}x"
+                f"{'sim' if same else 'NÃO':>8}"
+            )
+    
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Benchmark de memória da extração em função do número de páginas.
+
+Para cada tamanho, gera um relatório sintético e o extrai em um processo
+novo (um por modo), com e sem low_memory, medindo o RSS inicial, o final,
+o pico e o crescimento por página na segunda metade do arquivo (já sem o
+efeito dos imports e caches da primeira página). Sem low_memory o RSS cresce com as páginas (os
+fluxos de conteúdo decodificados ficam presos ao PDF aberto); com ele o
+crescimento por página deve ficar próximo de zero.
+
+Uso:
+    python benchmarks/bench_memory.py                      # 100, 200 e 400 páginas
+    python benchmarks/bench_memory.py --pages 500 1000 2000 --engine single_pass
+    python benchmarks/bench_memory.py relatorio.pdf
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+# Adiciona a raiz do projeto ao path para importar os módulos
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic_pdf import write_report
+from memory_budget import current_rss_mb
+from pdf_parser import ENGINES, PDFFinancialParser
+
+
+def peak_rss_mb() -> float:
+    """Pico de memória residente do processo (Linux: ru_maxrss em KB)."""
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure_child(pdf_path: str, engine: str, low_memory: bool) -> Dict[str, Any]:
+    """
+    Extrai o PDF no processo atual e mede o RSS.
+    
+    Args:
+        pdf_path: PDF a extrair
+        engine: Motor de extração por página
+        low_memory: Repassado ao PDFFinancialParser
+    
+    Returns:
+        Dict com páginas, linhas e RSS (MB) inicial, na metade das
+        páginas, final e de pico
+    """
+    parser = PDFFinancialParser(pdf_path, engine=engine, low_memory=low_memory)
+    rows = 0
+    middle_mb = None
+    start_mb = current_rss_mb()
+    for page_result in parser.iter_pages():
+        rows += len(page_result["linhas"])
+        if page_result["pagina"] == parser.total_pages // 2:
+            middle_mb = current_rss_mb()
+    gc.collect()
+    return {
+        "paginas": parser.total_pages,
+        "linhas": rows,
+        "rss_inicial_mb": start_mb,
+        "rss_metade_mb": middle_mb,
+        "rss_final_mb": current_rss_mb(),
+        "pico_rss_mb": peak_rss_mb(),
+    }
+
+
+def measure(pdf_path: str, engine: str, low_memory: bool) -> Dict[str, Any]:
+    """Roda measure_child em um interpretador novo, para o pico ser só desta extração."""
+    command = [sys.executable, __file__, "--child", pdf_path, "--engine", engine]
+    if low_memory:
+        command.append("--low-memory")
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdfs", nargs="*", help="PDFs a medir (padrão: relatórios sintéticos)")
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 200, 400],
+                        help="Páginas dos relatórios sintéticos (padrão: 100 200 400)")
+    parser.add_argument("--engine", choices=ENGINES, default="fast",
+                        help="Motor de extração (padrão: fast)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--low-memory", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        print(json.dumps(measure_child(args.child, args.engine, args.low_memory)))
+        return
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdfs = args.pdfs
+        if not pdfs:
+            pdfs = []
+            for pages in args.pages:
+                path = os.path.join(tmp_dir, f"guias_{pages}p.pdf")
+                write_report(path, pages)
+                pdfs.append(path)
+        
+        print(f"motor: {args.engine}")
+        print(f"{'arquivo':<20} {'páginas':>8} {'modo':<11} {'inicial':>9} "
+              f"{'final':>9} {'pico':>9} {'KB/página':>10}")
+        for pdf_path in pdfs:
+            for low_memory in (False, True):
+                result = measure(pdf_path, args.engine, low_memory)
+                growth = result["rss_final_mb"] - (result["rss_metade_mb"] or result["rss_inicial_mb"])
+                per_page = growth * 1024 / max(result["paginas"] - result["paginas"] // 2, 1)
+                print(f"{os.path.basename(pdf_path):<20} {result['paginas']:>8} "
+                      f"{'low_memory' if low_memory else 'padrão':<11} "
+                      f"{result['rss_inicial_mb']:>9.1f} {result['rss_final_mb']:>9.1f} "
+                      f"{result['pico_rss_mb']:>9.1f} {per_page:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
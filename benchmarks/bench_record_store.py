@@ -0,0 +1,143 @@
+"""
+Benchmark de memória do RecordStore.
+
+Compara a memória ocupada pelo resultado de uma extração no formato de
+listas de strings e dicts por linha (extract_data + rows) com o mesmo
+resultado em um RecordStore (extract_records). As páginas são extraídas
+uma vez e, para cada formato, reconstruídas a partir de JSON (strings
+novas, como saem do parser) enquanto o tracemalloc mede o que fica retido.
+
+Uso:
+    python benchmarks/bench_record_store.py               # relatório sintético
+    python benchmarks/bench_record_store.py --pages 2000
+    python benchmarks/bench_record_store.py relatorio.pdf
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Adiciona a raiz do projeto ao path para importar os módulos
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic_pdf import write_report
+from calculator import FinancialCalculator
+from pdf_parser import PDFFinancialParser
+from record_store import RecordStore
+
+
+def as_lists(pages: List[str]) -> Any:
+    """Acumula as páginas como extract_data: listas de strings e dicts por linha."""
+    extracted_data: Dict[str, List[str]] = {"cartorio": [], "valor_pago": []}
+    rows: List[Dict[str, Any]] = []
+    for line in pages:
+        page_result = json.loads(line)
+        extracted_data["cartorio"].extend(page_result["cartorio"])
+        extracted_data["valor_pago"].extend(page_result["valor_pago"])
+        rows.extend(page_result["linhas"])
+    return extracted_data, rows
+
+
+def as_records(pages: List[str]) -> Any:
+    """Acumula as páginas em um RecordStore, como extract_records."""
+    records = RecordStore()
+    for line in pages:
+        records.add_page(json.loads(line))
+    return records
+
+
+def totals_from_lists(result: Any) -> Any:
+    """Totais e subtotais por cartório a partir das listas de strings."""
+    extracted_data, rows = result
+    calculator = FinancialCalculator()
+    return calculator.calculate_totals(extracted_data), calculator.calculate_grouped(rows)
+
+
+def totals_from_records(records: RecordStore) -> Any:
+    """Totais e subtotais por cartório a partir do RecordStore."""
+    calculator = FinancialCalculator()
+    totals = calculator.calculate_totals_from_records(records)
+    return totals, calculator.calculate_grouped(records)
+
+
+def measure(
+    build: Callable[[List[str]], Any], totals: Callable[[Any], Any], pages: List[str]
+) -> Dict[str, Any]:
+    """
+    Mede a memória retida pelo resultado de um formato e o tempo até os totais.
+    
+    Args:
+        build: Função que acumula as páginas
+        totals: Função que calcula os totais a partir do resultado
+        pages: Páginas serializadas em JSON
+    
+    Returns:
+        Dict com os bytes retidos, o pico, o tempo (s) e os totais
+    """
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = build(pages)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    
+    # Tempo medido fora do tracemalloc, incluindo soma e agrupamento
+    start = time.perf_counter()
+    calculated = totals(build(pages))
+    elapsed = time.perf_counter() - start
+    
+    return {
+        "retido_bytes": current - baseline,
+        "pico_bytes": peak - baseline,
+        "tempo_s": round(elapsed, 4),
+        "totais": calculated,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdfs", nargs="*", help="PDFs a medir (padrão: relatório sintético)")
+    parser.add_argument("--pages", type=int, default=500,
+                        help="Páginas do relatório sintético (padrão: 500)")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdfs = args.pdfs
+        if not pdfs:
+            path = os.path.join(tmp_dir, f"guias_{args.pages}p.pdf")
+            write_report(path, args.pages)
+            pdfs = [path]
+        
+        for pdf_path in pdfs:
+            pages = [
+                json.dumps(page_result, ensure_ascii=False)
+                for page_result in PDFFinancialParser(pdf_path).iter_pages()
+            ]
+            lists = measure(as_lists, totals_from_lists, pages)
+            records = measure(as_records, totals_from_records, pages)
+            # Os dois formatos precisam chegar aos mesmos totais
+            assert lists["totais"] == records["totais"]
+            store = as_records(pages)
+            
+            print(f"\n{os.path.basename(pdf_path)}: {len(pages)} páginas, "
+                  f"{len(store)} linhas, "
+                  f"{sum(len(column) for column in store.values.values())} valores")
+            print(f"{'formato':<12} {'retido (KB)':>12} {'pico (KB)':>12} {'tempo (s)':>10}")
+            for name, measured in (("listas", lists), ("RecordStore", records)):
+                print(f"{name:<12} {measured['retido_bytes'] / 1024:>12.1f} "
+                      f"{measured['pico_bytes'] / 1024:>12.1f} {measured['tempo_s']:>10.4f}")
+            reduction = 1 - records["retido_bytes"] / lists["retido_bytes"]
+            print(f"Redução da memória retida: {reduction:.0%} "
+                  f"(arrays: {store.nbytes() / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
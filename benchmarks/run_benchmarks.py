@@ -0,0 +1,218 @@
+"""
+Suíte de benchmarks de vazão da Calculadora FIRC.
+
+Gera relatórios sintéticos de Guias Geradas (ver synthetic_pdf.py) em
+vários tamanhos e mede, para cada um, o tempo das etapas de extração
+(parser), conversão monetária e cálculo, além de páginas/s e pico de
+memória (RSS). Cada tamanho roda em um subprocesso próprio, para que o
+pico de memória de um não contamine o outro. Os resultados são gravados
+em JSON para comparação entre execuções.
+
+Uso:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 10 100 --engine single_pass
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/anterior.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Adiciona a raiz do projeto ao path para importar os módulos
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic_pdf import write_report
+
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+
+def peak_rss_mb() -> float:
+    """Pico de memória residente do processo atual, em MB."""
+    # No Linux ru_maxrss é informado em KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(pdf_path: str, engine: str, workers: int) -> Dict[str, Any]:
+    """
+    Mede as etapas de processamento de um PDF no processo atual.
+    
+    Args:
+        pdf_path: Caminho do PDF
+        engine: Motor de extração do parser
+        workers: Processos usados pelo parser
+    
+    Returns:
+        Dict com tempos por etapa (s), contagens e pico de memória
+    """
+    from calculator import FinancialCalculator
+    from data_processor import parse_centavos_batch
+    from pdf_parser import PDFFinancialParser
+    
+    stages = {}
+    
+    start = time.perf_counter()
+    parser = PDFFinancialParser(pdf_path, engine=engine, workers=workers)
+    extracted_data = parser.extract_data()
+    stages["parser"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    parse_centavos_batch(extracted_data["valor_pago"])
+    parse_centavos_batch(extracted_data["cartorio"])
+    stages["conversao_monetaria"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    calculator = FinancialCalculator()
+    totals = calculator.calculate_totals(extracted_data)
+    calculator.calculate_grouped(parser.rows)
+    stages["calculadora"] = time.perf_counter() - start
+    
+    return {
+        "etapas_s": {name: round(seconds, 4) for name, seconds in stages.items()},
+        "paginas": parser.total_pages,
+        "valores_pago": len(extracted_data["valor_pago"]),
+        "valores_cartorio": len(extracted_data["cartorio"]),
+        "total_valor_pago": totals["total_valor_pago"],
+        "erro": parser.error,
+        "pico_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def run_size(
+    pages: int, workdir: str, engine: str, workers: int, seed: int
+) -> Dict[str, Any]:
+    """
+    Gera (ou reaproveita) o PDF de um tamanho e mede-o em um subprocesso.
+    
+    Args:
+        pages: Quantidade de páginas do relatório
+        workdir: Diretório dos PDFs gerados
+        engine: Motor de extração do parser
+        workers: Processos usados pelo parser
+        seed: Semente do gerador
+    
+    Returns:
+        Dict com as medições do tamanho
+    """
+    pdf_path = os.path.join(workdir, f"guias_{pages}p_seed{seed}.pdf")
+    expected_path = pdf_path + ".json"
+    
+    start = time.perf_counter()
+    if os.path.exists(expected_path):
+        with open(expected_path, "r", encoding="utf-8") as fp:
+            expected = json.load(fp)
+    else:
+        full = write_report(pdf_path, pages, seed=seed)
+        expected = {key: value for key, value in full.items() if key != "linhas"}
+        with open(expected_path, "w", encoding="utf-8") as fp:
+            json.dump(expected, fp)
+    generation_s = time.perf_counter() - start
+    
+    child = subprocess.run(
+        [sys.executable, __file__, "--child", pdf_path,
+         "--engine", engine, "--workers", str(workers)],
+        capture_output=True, text=True, check=True
+    )
+    result = json.loads(child.stdout.strip().splitlines()[-1])
+    
+    parser_s = result["etapas_s"]["parser"]
+    result["paginas_por_s"] = round(pages / parser_s, 2) if parser_s else None
+    result["geracao_s"] = round(generation_s, 3)
+    result["tamanho_mb"] = round(os.path.getsize(pdf_path) / 1024 / 1024, 2)
+    result["confere_valor_pago"] = (
+        round(result["total_valor_pago"] * 100) == expected["total_valor_pago_centavos"]
+    )
+    return result
+
+
+def print_table(results: List[Dict[str, Any]], previous: Optional[Dict[str, Any]] = None) -> None:
+    """Imprime as medições (e a variação em relação a uma execução anterior)."""
+    baseline = {}
+    if previous:
+        baseline = {item["paginas"]: item for item in previous.get("resultados", [])}
+    
+    print(
+        f"{'páginas':>8}{'pág/s':>9}{'parser s':>10}{'moeda s':>9}"
+        f"{'calc s':>8}{'RSS MB':>8}{'confere':>9}{'vs anterior':>13}"
+    )
+    for item in results:
+        stages = item["etapas_s"]
+        delta = ""
+        old = baseline.get(item["paginas"])
+        if old and old.get("paginas_por_s") and item["paginas_por_s"]:
+            delta = f"{item['paginas_por_s'] / old['paginas_por_s']:.2f}x"
+        print(
+            f"{item['paginas']:>8}{item['paginas_por_s']:>9}"
+            f"{stages['parser']:>10.2f}{stages['conversao_monetaria']:>9.3f}"
+            f"{stages['calculadora']:>8.3f}{item['pico_rss_mb']:>8.0f}"
+            f"{'sim' if item['confere_valor_pago'] else 'NÃO':>9}{delta:>13}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Executa a suíte de benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="quantidades de páginas a medir")
+    parser.add_argument("--engine", default="default", help="motor de extração")
+    parser.add_argument("--workers", type=int, default=1, help="processos do parser")
+    parser.add_argument("--seed", type=int, default=42, help="semente do gerador")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "firc_bench"),
+                        help="diretório dos PDFs gerados (reaproveitados entre execuções)")
+    parser.add_argument("--output", help="arquivo JSON de saída")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    
+    if args.child:
+        # Subprocesso: mede um único PDF e devolve uma linha JSON
+        print(json.dumps(measure(args.child, args.engine, args.workers)))
+        return 0
+    
+    os.makedirs(args.workdir, exist_ok=True)
+    results = []
+    for pages in args.sizes:
+        print(f"Medindo {pages} páginas...", file=sys.stderr)
+        results.append(run_size(pages, args.workdir, args.engine, args.workers, args.seed))
+    
+    report = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "parametros": {"engine": args.engine, "workers": args.workers, "seed": args.seed},
+        "resultados": results,
+    }
+    
+    output = args.output or str(
+        RESULTS_DIR / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as fp:
+        json.dump(report, fp, indent=2, ensure_ascii=False)
+    
+    previous = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fp:
+            previous = json.load(fp)
+    
+    print_table(results, previous)
+    print(f"\nResultados gravados em {output}")
+    return 0 if all(item["confere_valor_pago"] for item in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,362 @@
+"""
+Gerador determinístico de PDFs sintéticos de Guias Geradas.
+
+Escreve o PDF diretamente (sem dependências externas) com fontes padrão
+Helvetica, tabelas com réguas, linhas com valores em R$ e cabeçalhos de
+Rateios, no mesmo formato dos relatórios reais.
+"""
+import random
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+PAGE_WIDTH = 842
+PAGE_HEIGHT = 595
+MARGIN = 18
+FONT_SIZE = 6.5
+ROW_HEIGHT = 11
+ROWS_PER_PAGE = 42
+
+# (título, largura) de cada coluna; a 8ª coluna é o Cartório (valor)
+COLUMNS: List[Tuple[str, int]] = [
+    ("Guia", 48),
+    ("Cartório", 150),
+    ("Cidade", 72),
+    ("Tipo", 30),
+    ("Valor Guia", 56),
+    ("Valor Pago", 56),
+    ("Tarifa", 48),
+    ("Cartório", 56),
+    ("Estado", 56),
+    ("Fundos", 52),
+    ("Observação", 182),
+]
+
+# Cada serventia pertence a uma única cidade, como nos relatórios reais
+SERVENTIAS = [
+    ("Serventia Registro Civil 1º Ofício", "Vitória"),
+    ("Serventia Registro de Imóveis 2º Ofício", "Vitória"),
+    ("Serventia Tabelionato de Notas 3º Ofício", "Serra"),
+    ("Serventia Protesto de Títulos", "Vila Velha"),
+    ("Serventia Registro Civil Pessoas Jurídicas", "Cariacica"),
+    ("Serventia Tabelionato 1º de Notas", "Guarapari"),
+    ("Serventia Registro de Imóveis 1ª Zona", "Linhares"),
+    ("Serventia Registro Civil 4º Ofício", "Serra"),
+]
+
+OBSERVACOES = [
+    "Pagamento compensado",
+    "Guia emitida pelo portal",
+    "Rateio conforme tabela vigente",
+    "Compensação bancária D+1",
+    "",
+]
+
+
+def format_brl(centavos: int) -> str:
+    """
+    Formata centavos no padrão brasileiro com símbolo (ex: R$ 1.234,56).
+    
+    Args:
+        centavos: Valor em centavos
+    
+    Returns:
+        str: Valor formatado
+    """
+    reais, cents = divmod(centavos, 100)
+    return f"R$ {reais:,}".replace(",", ".") + f",{cents:02d}"
+
+
+def _escape(text: str) -> bytes:
+    """Codifica texto como string literal PDF (WinAnsiEncoding)."""
+    raw = text.encode("cp1252")
+    raw = raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+    return b"(" + raw + b")"
+
+
+def _text(x: float, y: float, text: str, font: str = "F1") -> bytes:
+    """Operadores para desenhar um texto na posição (x, y)."""
+    return (
+        b"BT /" + font.encode() + b" %.1f Tf %.2f %.2f Td " % (FONT_SIZE, x, y)
+        + _escape(text) + b" Tj ET\n"
+    )
+
+
+def _line(x0: float, y0: float, x1: float, y1: float) -> bytes:
+    """Operadores para desenhar um segmento de reta."""
+    return b"%.2f %.2f m %.2f %.2f l S\n" % (x0, y0, x1, y1)
+
+
+def _generate_rows(total: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Gera as linhas de dados (guias) de forma determinística."""
+    rows = []
+    guia = 24100000
+    for _ in range(total):
+        guia += rng.randint(1, 40)
+        valor_guia = rng.randint(1500, 1500000)
+        tarifa = rng.choice([0, 0, 0, 250, 390])
+        valor_pago = valor_guia
+        valor_cartorio = int(valor_pago * rng.choice([0.7143, 0.7, 0.65]))
+        valor_estado = valor_pago - valor_cartorio - tarifa
+        fundos = max(0, valor_estado // 10)
+        serventia, cidade = rng.choice(SERVENTIAS)
+        rows.append({
+            "guia": f"{guia:010d}",
+            "cartorio": serventia,
+            "cidade": cidade,
+            "tipo": "Geral",
+            "valor_guia": valor_guia,
+            "valor_pago": valor_pago,
+            "tarifa": tarifa,
+            "valor_cartorio": valor_cartorio,
+            "valor_estado": max(0, valor_estado - fundos),
+            "fundos": fundos,
+            "observacao": rng.choice(OBSERVACOES),
+        })
+    return rows
+
+
+def _cells(row: Dict[str, Any]) -> List[str]:
+    """Converte uma linha de dados no texto de cada coluna."""
+    return [
+        row["guia"],
+        row["cartorio"],
+        row["cidade"],
+        row["tipo"],
+        format_brl(row["valor_guia"]),
+        format_brl(row["valor_pago"]),
+        format_brl(row["tarifa"]),
+        format_brl(row["valor_cartorio"]),
+        format_brl(row["valor_estado"]),
+        format_brl(row["fundos"]),
+        row["observacao"],
+    ]
+
+
+def _column_edges() -> List[float]:
+    """Posições x das bordas das colunas da tabela."""
+    edges = [float(MARGIN)]
+    for _, width in COLUMNS:
+        edges.append(edges[-1] + width)
+    return edges
+
+
+def _data_page(
+    rows: List[Dict[str, Any]], page_num: int, total_pages: int,
+    period: str, tables: bool
+) -> bytes:
+    """Monta o conteúdo de uma página de dados."""
+    out = [b"0.5 w\n"]
+    edges = _column_edges()
+    left, right = edges[0], edges[-1]
+    
+    top = PAGE_HEIGHT - MARGIN
+    out.append(_text(MARGIN, top - 10, "Guias Geradas", "F2"))
+    out.append(_text(MARGIN + 300, top - 10, f"Período: {period}"))
+    
+    # Cabeçalho em duas linhas: grupo "Rateios" e títulos das colunas
+    y_group = top - 22
+    y_header = y_group - ROW_HEIGHT
+    rateio_left = edges[6]
+    out.append(_text(rateio_left + 2, y_header + 3, "Rateios", "F2"))
+    for (title, _), x in zip(COLUMNS, edges):
+        out.append(_text(x + 2, y_header - ROW_HEIGHT + 3, title, "F2"))
+    
+    y = y_header - ROW_HEIGHT
+    for row in rows:
+        y -= ROW_HEIGHT
+        for text, x in zip(_cells(row), edges):
+            if text:
+                out.append(_text(x + 2, y + 3, text))
+    bottom = y
+    
+    if tables:
+        # Linha do grupo: bordas externas e o bloco de Rateios
+        out.append(_line(left, y_group, right, y_group))
+        for x in (left, rateio_left, edges[10], right):
+            out.append(_line(x, y_group, x, y_header))
+        y_line = y_header
+        while y_line >= bottom - 0.01:
+            out.append(_line(left, y_line, right, y_line))
+            y_line -= ROW_HEIGHT
+        for x in edges:
+            out.append(_line(x, y_header, x, bottom))
+    
+    out.append(_text(MARGIN, MARGIN, "Emitido pelo sistema de arrecadação"))
+    out.append(_text(right - 60, MARGIN, f"Página {page_num} de {total_pages}"))
+    return b"".join(out)
+
+
+def _cover_page(period: str, total_rows: int) -> bytes:
+    """Monta a capa do relatório (sem valores monetários)."""
+    center = PAGE_WIDTH / 2 - 120
+    return b"".join([
+        _text(center, 400, "Relatório de Guias Geradas", "F2"),
+        _text(center, 380, f"Período de referência: {period}"),
+        _text(center, 365, f"Quantidade de guias: {total_rows}"),
+        _text(center, 350, "Tribunal de Justiça - Fundo de Reaparelhamento"),
+    ])
+
+
+def _summary_page(rows: List[Dict[str, Any]]) -> bytes:
+    """Monta a página de resumo (valores isolados, sem linhas de dados)."""
+    total_pago = sum(row["valor_pago"] for row in rows)
+    total_cartorio = sum(row["valor_cartorio"] for row in rows)
+    out = [_text(MARGIN, 540, "Resumo do Período", "F2")]
+    out.append(_text(MARGIN, 520, f"Total Valor Pago: {format_brl(total_pago)}"))
+    out.append(_text(MARGIN, 505, f"Total Cartório: {format_brl(total_cartorio)}"))
+    out.append(_text(MARGIN, 490, f"Quantidade de guias: {len(rows)}"))
+    return b"".join(out)
+
+
+def _write_pdf(contents: List[bytes], form_xobjects: bool = False) -> bytes:
+    """
+    Serializa as páginas (streams de conteúdo) em um arquivo PDF.
+    
+    Com form_xobjects, cada página só desenha um Form XObject ("/Fx Do")
+    que traz o conteúdo, como fazem alguns geradores de relatório.
+    """
+    objects: List[bytes] = []
+    
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+    
+    catalog_id = add(b"")
+    pages_id = add(b"")
+    font_id = add(
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+        b"/Encoding /WinAnsiEncoding >>"
+    )
+    bold_id = add(
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold "
+        b"/Encoding /WinAnsiEncoding >>"
+    )
+    
+    fonts = b"/Font << /F1 %d 0 R /F2 %d 0 R >>" % (font_id, bold_id)
+    
+    page_ids = []
+    for content in contents:
+        resources = fonts
+        if form_xobjects:
+            data = zlib.compress(content)
+            form_id = add(
+                b"<< /Type /XObject /Subtype /Form /BBox [0 0 %d %d] "
+                b"/Resources << " % (PAGE_WIDTH, PAGE_HEIGHT) + fonts
+                + b" >> /Length %d /Filter /FlateDecode >>\nstream\n" % len(data)
+                + data + b"\nendstream"
+            )
+            resources = b"/XObject << /Fx %d 0 R >>" % form_id
+            content = b"q /Fx Do Q"
+        data = zlib.compress(content)
+        stream_id = add(
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(data)
+            + data + b"\nendstream"
+        )
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << " % (pages_id, PAGE_WIDTH, PAGE_HEIGHT) + resources
+            + b" >> /Contents %d 0 R >>" % stream_id
+        ))
+    
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    objects[pages_id - 1] = (
+        b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+    )
+    
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += (
+        b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, catalog_id, xref_offset)
+    )
+    return bytes(out)
+
+
+def build_report(
+    pages: int,
+    seed: int = 42,
+    tables: bool = True,
+    period: str = "01/03/2026 a 31/03/2026",
+    rows_per_page: int = ROWS_PER_PAGE,
+    edit_rows: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    empty_pages: int = 0,
+    form_xobjects: bool = False
+) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Gera um relatório sintético de Guias Geradas.
+    
+    A primeira página é uma capa e, a partir de 3 páginas, a última é um
+    resumo; as demais são páginas de dados com a tabela de guias.
+    
+    Args:
+        pages: Quantidade total de páginas
+        seed: Semente do gerador (mesma semente, mesmo PDF)
+        tables: Se False, omite as réguas (relatório somente texto)
+        period: Período impresso no cabeçalho
+        rows_per_page: Linhas de dados por página
+        edit_rows: Função aplicada às linhas geradas antes de montar as
+            páginas (ex: simular uma reemissão com valores corrigidos)
+        empty_pages: Páginas de dados sem linhas (só cabeçalho e grade),
+            incluídas depois das demais páginas de dados
+        form_xobjects: Se True, o conteúdo de cada página fica em um Form
+            XObject e todas as páginas têm o mesmo fluxo de conteúdo
+    
+    Returns:
+        Tupla (bytes do PDF, gabarito com as linhas e totais esperados)
+    """
+    pages = max(1, pages)
+    data_pages = pages - 2 if pages >= 3 else pages - 1
+    empty_pages = min(empty_pages, data_pages)
+    data_pages -= empty_pages
+    
+    rng = random.Random(seed)
+    rows = _generate_rows(data_pages * rows_per_page, rng)
+    if edit_rows is not None:
+        edit_rows(rows)
+    
+    contents = [_cover_page(period, len(rows))]
+    for idx in range(data_pages):
+        chunk = rows[idx * rows_per_page:(idx + 1) * rows_per_page]
+        for row in chunk:
+            row["pagina"] = idx + 2
+        contents.append(_data_page(chunk, idx + 2, pages, period, tables))
+    for _ in range(empty_pages):
+        contents.append(_data_page([], len(contents) + 1, pages, period, tables))
+    if len(contents) < pages:
+        contents.append(_summary_page(rows))
+    
+    expected = {
+        "paginas": pages,
+        "linhas": rows,
+        "total_valor_pago_centavos": sum(r["valor_pago"] for r in rows),
+        "total_cartorio_centavos": sum(r["valor_cartorio"] for r in rows),
+    }
+    return _write_pdf(contents, form_xobjects), expected
+
+
+def write_report(path: str, pages: int, **kwargs: Any) -> Dict[str, Any]:
+    """
+    Gera um relatório sintético e grava em disco.
+    
+    Args:
+        path: Caminho do arquivo PDF de saída
+        pages: Quantidade total de páginas
+        **kwargs: Repassados para build_report
+    
+    Returns:
+        Gabarito com as linhas e totais esperados
+    """
+    data, expected = build_report(pages, **kwargs)
+    with open(path, "wb") as fp:
+        fp.write(data)
+    return expected
@@ -2,17 +2,38 @@
 Módulo de cálculo para somar valores extraídos do PDF.
 Realiza somas independentes com validação silenciosa.
 """
-from typing import List, Dict
-from data_processor import clean_monetary_value, validate_decimal
+from typing import Any, Iterable, List, Dict, Optional
+from data_processor import parse_centavos_batch, sum_centavos, validate_decimal
+from metrics import Metrics, NULL_METRICS
+from record_store import MISSING, RecordStore, ValueColumn
+
+
+# Chave usada para linhas cujo cartório não pôde ser identificado
+SEM_CARTORIO = "(sem cartório)"
 
 
 class FinancialCalculator:
     """Calculadora para totalizar valores financeiros extraídos de PDFs."""
     
-    def __init__(self):
-        """Inicializa a calculadora."""
+    def __init__(self, metrics: Optional[Metrics] = None):
+        """
+        Inicializa a calculadora.
+        
+        Args:
+            metrics: Coletor de tempos e contadores (None desativa a coleta)
+        """
+        self.metrics = metrics if metrics is not None else NULL_METRICS
         self.total_valor_pago: float = 0.0
         self.total_cartorio: float = 0.0
+        self.reset()
+    
+    def reset(self) -> None:
+        """Zera os acumuladores do processamento incremental."""
+        # Somas exatas, em centavos inteiros
+        self._sum_valor_pago: int = 0
+        self._sum_cartorio: int = 0
+        self.count_valor_pago: int = 0
+        self.count_cartorio: int = 0
     
     def calculate_totals(self, extracted_data: Dict[str, List[str]]) -> Dict[str, float]:
         """
@@ -32,15 +53,133 @@ class FinancialCalculator:
                 "total_cartorio": float
             }
         """
-        # Calcula total de Valor Pago
-        self.total_valor_pago = self._sum_values(
-            extracted_data.get("valor_pago", [])
-        )
+        self.reset()
+        self.update(extracted_data)
+        return self.current_totals()
+    
+    def update(self, page_data: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Acumula os valores de uma página (ou de qualquer lote parcial).
+        
+        Permite totalizar o resultado de PDFFinancialParser.iter_pages()
+        à medida que as páginas ficam prontas, sem manter a lista completa.
+        
+        Args:
+            page_data: Dicionário com as listas "cartorio" e "valor_pago"
+        
+        Returns:
+            Dict com os totais parciais (mesmo formato de calculate_totals)
+        """
+        valor_pago = page_data.get("valor_pago", [])
+        cartorio = page_data.get("cartorio", [])
+        
+        with self.metrics.stage("sum_values"):
+            self._sum_valor_pago += self._sum_values(valor_pago)
+            self._sum_cartorio += self._sum_values(cartorio)
+        self.count_valor_pago += len(valor_pago)
+        self.count_cartorio += len(cartorio)
+        
+        return self.current_totals()
+    
+    def remove(self, page_data: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Desconta os valores de uma página já acumulada (inverso de update).
+        
+        Usado no reprocessamento incremental, para trocar o resultado de
+        uma página alterada sem somar de novo as demais.
+        
+        Args:
+            page_data: Dicionário com as listas "cartorio" e "valor_pago"
+        
+        Returns:
+            Dict com os totais parciais (mesmo formato de calculate_totals)
+        """
+        valor_pago = page_data.get("valor_pago", [])
+        cartorio = page_data.get("cartorio", [])
+        
+        with self.metrics.stage("sum_values"):
+            self._sum_valor_pago -= self._sum_values(valor_pago)
+            self._sum_cartorio -= self._sum_values(cartorio)
+        self.count_valor_pago -= len(valor_pago)
+        self.count_cartorio -= len(cartorio)
+        
+        return self.current_totals()
+    
+    def state(self) -> Dict[str, int]:
+        """
+        Devolve os acumuladores exatos, para retomar a soma depois (ver load_state).
+        
+        Returns:
+            Dict com as somas em centavos e as quantidades de valores
+        """
+        return {
+            "soma_valor_pago": self._sum_valor_pago,
+            "soma_cartorio": self._sum_cartorio,
+            "quantidade_valor_pago": self.count_valor_pago,
+            "quantidade_cartorio": self.count_cartorio,
+        }
+    
+    def load_state(self, state: Dict[str, int]) -> Dict[str, float]:
+        """
+        Restaura os acumuladores gravados por state().
+        
+        Args:
+            state: Dict no formato de state()
+        
+        Returns:
+            Dict com os totais restaurados (mesmo formato de calculate_totals)
+        """
+        self._sum_valor_pago = state["soma_valor_pago"]
+        self._sum_cartorio = state["soma_cartorio"]
+        self.count_valor_pago = state["quantidade_valor_pago"]
+        self.count_cartorio = state["quantidade_cartorio"]
+        return self.current_totals()
+    
+    def calculate_totals_from_pages(
+        self, pages: Iterable[Dict[str, Any]]
+    ) -> Dict[str, float]:
+        """
+        Calcula os totais consumindo um fluxo de páginas.
+        
+        Args:
+            pages: Iterável de resultados por página
+                (ex: PDFFinancialParser.iter_pages())
+        
+        Returns:
+            Dict com os totais calculados (mesmo formato de calculate_totals)
+        """
+        self.reset()
+        for page_data in pages:
+            self.update(page_data)
+        return self.current_totals()
+    
+    def calculate_totals_from_records(self, records: RecordStore) -> Dict[str, float]:
+        """
+        Calcula os totais de um RecordStore, direto dos arrays de centavos.
+        
+        Args:
+            records: Valores extraídos (ex: PDFFinancialParser.extract_records())
+        
+        Returns:
+            Dict com os totais calculados (mesmo formato de calculate_totals)
+        """
+        self.reset()
+        return self.update(records.values)
+    
+    def current_totals(self) -> Dict[str, float]:
+        """
+        Devolve os totais acumulados até o momento.
         
-        # Calcula total de Cartório
-        self.total_cartorio = self._sum_values(
-            extracted_data.get("cartorio", [])
-        )
+        Returns:
+            Dict com os totais calculados:
+            {
+                "total_valor_pago": float,
+                "total_cartorio": float
+            }
+        """
+        # Converte os centavos exatos para reais
+        self.total_valor_pago = self._sum_valor_pago / 100
+        self.total_cartorio = self._sum_cartorio / 100
         
         # Validação silenciosa
         self._validate_totals()
@@ -50,25 +189,43 @@ class FinancialCalculator:
             "total_cartorio": self.total_cartorio
         }
     
-    def _sum_values(self, values: List[str]) -> float:
+    def calculate_grouped(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Soma uma lista de valores monetários (strings).
+        Calcula o Valor Pago (e o valor de Cartório) agrupado por cartório.
         
         Args:
-            values: Lista de valores como strings
-            
+            rows: Linhas extraídas (ex: PDFFinancialParser.rows, iter_rows()
+                ou um RecordStore)
+        
         Returns:
-            float: Soma total
+            Lista de subtotais por cartório (ver GroupedTotals.to_list)
+        """
+        grouped = GroupedTotals()
+        with self.metrics.stage("group_by_cartorio"):
+            if isinstance(rows, RecordStore):
+                grouped.add_records(rows)
+            else:
+                grouped.add_rows(rows)
+        return grouped.to_list()
+    
+    @staticmethod
+    def _sum_values(values: Any) -> int:
         """
-        total = 0.0
+        Soma uma lista de valores monetários (strings) ou uma ValueColumn.
         
-        for value in values:
-            cleaned_value = clean_monetary_value(value)
-            if validate_decimal(cleaned_value):
-                total += cleaned_value
+        Único caminho de soma da calculadora: a soma é feita em centavos
+        inteiros, sem erro de arredondamento acumulado, e convertida para
+        reais apenas em current_totals.
         
-        # Arredonda para 2 casas decimais (precisão monetária)
-        return round(total, 2)
+        Args:
+            values: Lista de valores como strings, ou ValueColumn (já em centavos)
+            
+        Returns:
+            int: Soma total em centavos
+        """
+        if isinstance(values, ValueColumn):
+            return values.total
+        return sum_centavos(values)
     
     def _validate_totals(self) -> None:
         """
@@ -86,3 +243,130 @@ class FinancialCalculator:
         # Garante que não são negativos
         self.total_valor_pago = max(0.0, self.total_valor_pago)
         self.total_cartorio = max(0.0, self.total_cartorio)
+
+
+class GroupedTotals:
+    """
+    Subtotais de Valor Pago e Cartório agrupados pelo nome do cartório.
+    
+    A agregação é feita em uma única passada com um dicionário, em centavos
+    inteiros. Instâncias podem ser combinadas com merge(), o que permite
+    agregar páginas, blocos paralelos ou arquivos separadamente e juntar
+    o resultado no final.
+    """
+    
+    def __init__(self):
+        """Inicializa sem nenhum grupo."""
+        # cartório -> [valor pago (centavos), cartório (centavos), linhas]
+        self.groups: Dict[str, List[int]] = {}
+    
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Acumula linhas extraídas nos grupos.
+        
+        Args:
+            rows: Linhas com as chaves "cartorio", "valor_pago" e "valor_cartorio"
+        """
+        rows = list(rows)
+        pagos = parse_centavos_batch(row.get("valor_pago") for row in rows)
+        cartorios = parse_centavos_batch(row.get("valor_cartorio") for row in rows)
+        groups = self.groups
+        
+        for row, pago, cartorio in zip(rows, pagos, cartorios):
+            key = row.get("cartorio") or SEM_CARTORIO
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [pago, cartorio, 1]
+            else:
+                group[0] += pago
+                group[1] += cartorio
+                group[2] += 1
+    
+    def add_records(self, records: RecordStore) -> None:
+        """
+        Acumula as linhas de um RecordStore, sem converter valores.
+        
+        Args:
+            records: Linhas extraídas em colunas (ver RecordStore)
+        """
+        names = records.names
+        # Um acumulador por nome distinto, somado depois pelo nome agrupado
+        by_name = [[0, 0, 0] for _ in names]
+        for name_id, pago, cartorio in zip(
+            records.row_cartorio, records.row_valor_pago, records.row_valor_cartorio
+        ):
+            group = by_name[name_id]
+            if pago != MISSING:
+                group[0] += pago
+            if cartorio != MISSING:
+                group[1] += cartorio
+            group[2] += 1
+        
+        groups = self.groups
+        for name, (pago, cartorio, linhas) in zip(names, by_name):
+            if not linhas:
+                continue
+            group = groups.setdefault(name or SEM_CARTORIO, [0, 0, 0])
+            group[0] += pago
+            group[1] += cartorio
+            group[2] += linhas
+    
+    def merge(self, other: "GroupedTotals") -> "GroupedTotals":
+        """
+        Soma os grupos de outra instância a esta.
+        
+        Args:
+            other: Subtotais calculados em outra página, bloco ou arquivo
+        
+        Returns:
+            A própria instância, para encadear chamadas
+        """
+        for key, (pago, cartorio, linhas) in other.groups.items():
+            group = self.groups.setdefault(key, [0, 0, 0])
+            group[0] += pago
+            group[1] += cartorio
+            group[2] += linhas
+        return self
+    
+    def to_list(self) -> List[Dict[str, Any]]:
+        """
+        Converte os grupos em uma lista serializável, ordenada por cartório.
+        
+        Returns:
+            Lista de dicts:
+            {
+                "cartorio": str,
+                "total_valor_pago": float,
+                "total_cartorio": float,
+                "quantidade": int
+            }
+        """
+        return [
+            {
+                "cartorio": key,
+                "total_valor_pago": pago / 100,
+                "total_cartorio": cartorio / 100,
+                "quantidade": linhas
+            }
+            for key, (pago, cartorio, linhas) in sorted(self.groups.items())
+        ]
+    
+    @classmethod
+    def from_list(cls, items: Iterable[Dict[str, Any]]) -> "GroupedTotals":
+        """
+        Reconstrói os subtotais a partir de to_list(), para combiná-los.
+        
+        Args:
+            items: Lista no formato de to_list()
+        
+        Returns:
+            GroupedTotals equivalente
+        """
+        grouped = cls()
+        for item in items:
+            grouped.groups[item["cartorio"]] = [
+                round(item["total_valor_pago"] * 100),
+                round(item["total_cartorio"] * 100),
+                item["quantidade"]
+            ]
+        return grouped
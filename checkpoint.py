@@ -0,0 +1,161 @@
+"""
+Checkpoints de extração para retomar PDFs grandes interrompidos.
+Os resultados por página são gravados em disco a cada N páginas; uma nova
+execução sobre o mesmo PDF continua da última página gravada.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from file_lock import FileLock
+from pdf_parser import PDFFinancialParser
+from result_cache import DEFAULT_CACHE_DIR
+
+
+# Diretório e intervalo padrão, configuráveis por variável de ambiente
+DEFAULT_CHECKPOINT_DIR = os.environ.get(
+    "FIRC_CHECKPOINT_DIR",
+    str(Path(DEFAULT_CACHE_DIR) / "checkpoints")
+)
+DEFAULT_CHECKPOINT_PAGES = int(os.environ.get("FIRC_CHECKPOINT_PAGES", "50"))
+
+
+class CheckpointStore:
+    """
+    Resultados parciais de extração, um arquivo JSON Lines por PDF.
+    
+    Cada linha do arquivo é o resultado de uma página, na ordem. Uma linha
+    incompleta (processo morto no meio da gravação) é descartada ao
+    retomar. O arquivo é apagado quando a extração chega ao fim.
+    
+    Só um processo por vez grava o checkpoint de um PDF (trava em
+    "<arquivo>.lock", apagada junto com o checkpoint); execuções
+    simultâneas do mesmo PDF extraem sem checkpoint.
+    """
+    
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        every: int = DEFAULT_CHECKPOINT_PAGES
+    ):
+        """
+        Inicializa o repositório de checkpoints.
+        
+        Args:
+            directory: Diretório dos arquivos (padrão: DEFAULT_CHECKPOINT_DIR)
+            every: Quantidade de páginas entre gravações
+        """
+        self.directory = Path(directory or DEFAULT_CHECKPOINT_DIR)
+        self.every = max(1, every)
+    
+    def resume(self, parser: PDFFinancialParser, key: str) -> Iterator[Dict[str, Any]]:
+        """
+        Entrega os resultados por página, retomando de onde a última execução parou.
+        
+        As páginas já gravadas são lidas do checkpoint e o parser continua
+        a partir da seguinte. O resultado é idêntico ao de
+        parser.iter_pages() em uma execução sem interrupção.
+        
+        Args:
+            parser: Parser configurado para o PDF
+            key: Hash do conteúdo do PDF (ver result_cache.compute_cache_key)
+        
+        Yields:
+            Resultado de cada página, em ordem (ver PDFFinancialParser.iter_pages)
+        """
+        path = self._path(key, parser)
+        lock = FileLock(f"{path}.lock")
+        if not lock.acquire(blocking=False):
+            # Outro processo já grava este checkpoint: extrai sem retomar
+            # nem gravar, para não intercalar linhas no mesmo arquivo
+            yield from parser.iter_pages()
+            return
+        
+        try:
+            saved = self._load(path)
+            if saved:
+                parser.metrics.count("paginas_retomadas", len(saved))
+            yield from saved
+            
+            parser.first_page = len(saved) + 1
+            pending: List[Dict[str, Any]] = []
+            with open(path, "a", encoding="utf-8") as fp:
+                try:
+                    for page_result in parser.iter_pages():
+                        yield page_result
+                        pending.append(page_result)
+                        if len(pending) >= self.every:
+                            self._append(fp, pending)
+                finally:
+                    # Páginas entregues continuam válidas mesmo após erro ou cancelamento
+                    self._append(fp, pending)
+            
+            if not parser.cancelled:
+                self.discard(key, parser)
+                # Ainda com a trava, para não deixar travas órfãs no diretório
+                lock.unlink()
+        finally:
+            lock.release()
+    
+    def discard(self, key: str, parser: PDFFinancialParser) -> None:
+        """Apaga o checkpoint de um PDF, se existir."""
+        try:
+            os.unlink(self._path(key, parser))
+        except FileNotFoundError:
+            pass
+    
+    def _path(self, key: str, parser: PDFFinancialParser) -> Path:
+        """
+        Arquivo do checkpoint de um PDF.
+        
+        Inclui as opções do parser que alteram o resultado, para que uma
+        execução com outras opções não retome páginas incompatíveis.
+        """
+        options = json.dumps(parser.output_options())
+        suffix = hashlib.sha256(options.encode()).hexdigest()[:12]
+        return self.directory / f"{key}-{suffix}.jsonl"
+    
+    @staticmethod
+    def _load(path: Path) -> List[Dict[str, Any]]:
+        """
+        Lê as páginas gravadas, contíguas a partir da página 1.
+        
+        O arquivo é truncado na última linha válida, para que as próximas
+        gravações continuem dali.
+        """
+        try:
+            with open(path, "rb") as fp:
+                data = fp.read()
+        except FileNotFoundError:
+            return []
+        
+        pages: List[Dict[str, Any]] = []
+        valid_end = 0
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                page_result = json.loads(line)
+            except ValueError:
+                break
+            if page_result.get("pagina") != len(pages) + 1:
+                break
+            pages.append(page_result)
+            valid_end += len(line)
+        
+        if valid_end < len(data):
+            with open(path, "r+b") as fp:
+                fp.truncate(valid_end)
+        return pages
+    
+    @staticmethod
+    def _append(fp: Any, pages: List[Dict[str, Any]]) -> None:
+        """Grava páginas no fim do arquivo e força a escrita em disco."""
+        if not pages:
+            return
+        fp.write("".join(json.dumps(page, ensure_ascii=False) + "\n" for page in pages))
+        fp.flush()
+        os.fsync(fp.fileno())
+        pages.clear()
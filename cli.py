@@ -0,0 +1,243 @@
+"""
+Processamento em lote de PDFs de Guias Geradas pela linha de comando.
+
+Aceita arquivos, padrões glob e diretórios, processa os arquivos em
+paralelo e imprime uma linha JSON por arquivo, seguida do total geral.
+
+Uso:
+    python cli.py relatorios/ "extras/*.pdf" --jobs 4
+
+Códigos de saída:
+    0 - todos os arquivos processados
+    1 - um ou mais arquivos falharam
+    2 - nenhum PDF encontrado ou argumentos inválidos
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from checkpoint import CheckpointStore, DEFAULT_CHECKPOINT_DIR
+from history_store import DEFAULT_HISTORY_PATH, parse_period
+from incremental import DEFAULT_PAGE_STORE_DIR, PageResultStore
+from layout_template import LayoutTemplateStore
+from memory_budget import DEFAULT_MEMORY_BUDGET_MB
+from pdf_parser import ENGINES
+from pipeline import consolidate_summaries, summarize_pdf
+from result_cache import ResultCache, DEFAULT_CACHE_DIR
+
+
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_NO_INPUT = 2
+
+
+def collect_pdf_paths(inputs: Iterable[str], recursive: bool = False) -> List[str]:
+    """
+    Expande arquivos, padrões glob e diretórios em uma lista de PDFs.
+    
+    Args:
+        inputs: Caminhos informados na linha de comando
+        recursive: Se True, busca PDFs também nos subdiretórios
+    
+    Returns:
+        Lista de caminhos sem repetição, na ordem em que foram encontrados
+    """
+    paths: List[str] = []
+    seen = set()
+    
+    def add(path: str) -> None:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            paths.append(path)
+    
+    for item in inputs:
+        matches = glob.glob(item, recursive=recursive) if glob.has_magic(item) else [item]
+        for match in sorted(matches):
+            if os.path.isdir(match):
+                pattern = "**/*" if recursive else "*"
+                for path in sorted(Path(match).glob(pattern)):
+                    if path.is_file() and path.suffix.lower() == ".pdf":
+                        add(str(path))
+            elif os.path.isfile(match):
+                add(match)
+    
+    return paths
+
+
+def process_file(
+    pdf_path: str,
+    cache_dir: Optional[str] = None,
+    engine: str = "default",
+    collect_metrics: bool = False,
+    crop_columns: bool = False,
+    templates_path: Optional[str] = None,
+    checkpoint_dir: Optional[str] = None,
+    page_store_dir: Optional[str] = None,
+    low_memory: bool = False,
+    memory_budget_mb: Optional[float] = None,
+    history_path: Optional[str] = None,
+    periodo: Optional[str] = None,
+    prefilter: bool = False
+) -> Dict[str, Any]:
+    """
+    Processa um arquivo e monta a linha de resultado.
+    
+    Args:
+        pdf_path: Caminho do PDF
+        cache_dir: Diretório do cache de resultados (None desativa)
+        engine: Motor de extração do parser
+        collect_metrics: Se True, inclui tempos por etapa e por página
+        crop_columns: Se True, recorta as páginas à faixa de colunas usadas
+        templates_path: Arquivo de modelos de layout (None não usa modelos)
+        checkpoint_dir: Diretório de checkpoints para retomar execuções
+            interrompidas (None desativa)
+        page_store_dir: Diretório dos resultados por página para reprocessar
+            só as páginas alteradas de uma reemissão (None desativa)
+        low_memory: Se True, libera os caches de cada página logo após a
+            extração, com memória estável em PDFs grandes
+        memory_budget_mb: RSS máximo por processo, em MB; acima dele o
+            arquivo termina com status "erro" (None desativa)
+        history_path: Histórico SQLite onde o resultado é registrado (None
+            não registra)
+        periodo: Período de referência do relatório no histórico (AAAA-MM)
+        prefilter: Se True, pula sem extrair as páginas sem sinal de valores
+    
+    Returns:
+        Dict com o resumo do arquivo, status e tempo de processamento
+    """
+    start = time.perf_counter()
+    try:
+        cache = ResultCache(cache_dir) if cache_dir else None
+        templates = LayoutTemplateStore(templates_path) if templates_path else None
+        checkpoints = CheckpointStore(checkpoint_dir) if checkpoint_dir else None
+        revisions = PageResultStore(page_store_dir) if page_store_dir else None
+        line = summarize_pdf(
+            pdf_path, pdf_path, cache=cache, engine=engine, collect_metrics=collect_metrics,
+            crop_columns=crop_columns, templates=templates, checkpoints=checkpoints,
+            revisions=revisions, low_memory=low_memory, memory_budget_mb=memory_budget_mb,
+            history=history_path, periodo=periodo, prefilter=prefilter
+        )
+        if templates is not None:
+            templates.save()
+    except Exception as e:
+        line = {"arquivo": pdf_path, "status": "erro", "erro": str(e), "cache": False}
+    
+    line["tempo_s"] = round(time.perf_counter() - start, 3)
+    return line
+
+
+def _emit(line: Dict[str, Any]) -> None:
+    """Imprime uma linha JSON imediatamente."""
+    print(json.dumps(line, ensure_ascii=False), flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Ponto de entrada da linha de comando.
+    
+    Args:
+        argv: Argumentos (padrão: sys.argv[1:])
+    
+    Returns:
+        int: Código de saída
+    """
+    parser = argparse.ArgumentParser(
+        description="Processa PDFs de Guias Geradas em lote e imprime JSON Lines."
+    )
+    parser.add_argument("inputs", nargs="+", help="arquivos, padrões glob ou diretórios")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="busca PDFs também nos subdiretórios")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="arquivos processados em paralelo (padrão: núcleos)")
+    parser.add_argument("--engine", choices=ENGINES, default="default",
+                        help="motor de extração por página")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="diretório do cache de resultados")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="não consulta nem grava o cache")
+    parser.add_argument("--metrics", action="store_true",
+                        help="inclui tempos por etapa e por página (diagnostico)")
+    parser.add_argument("--crop-columns", action="store_true",
+                        help="analisa só a faixa das colunas Guia até Cartório")
+    parser.add_argument("--prefilter", action="store_true",
+                        help="pula sem extrair as páginas sem sinal de valores (capas, cabeçalhos)")
+    parser.add_argument("--templates", metavar="ARQUIVO",
+                        help="arquivo JSON de modelos de layout (lido e atualizado)")
+    parser.add_argument("--resume", action="store_true",
+                        help="grava o progresso a cada N páginas e retoma execuções interrompidas")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reextrai só as páginas alteradas desde a última versão do arquivo")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="libera os caches de cada página logo após a extração")
+    parser.add_argument("--memory-budget", type=float, metavar="MB",
+                        default=DEFAULT_MEMORY_BUDGET_MB,
+                        help="interrompe o arquivo se o processo passar de MB de RSS "
+                             "(padrão: FIRC_MEMORY_BUDGET_MB)")
+    parser.add_argument("--history", action="store_true",
+                        help="registra cada arquivo no histórico SQLite (FIRC_HISTORY_DB)")
+    parser.add_argument("--periodo", type=parse_period, metavar="AAAA-MM",
+                        help="período de referência no histórico (padrão: mês atual)")
+    args = parser.parse_args(argv)
+    
+    paths = collect_pdf_paths(args.inputs, recursive=args.recursive)
+    if not paths:
+        print("Nenhum PDF encontrado.", file=sys.stderr)
+        return EXIT_NO_INPUT
+    
+    cache_dir = None if args.no_cache else args.cache_dir
+    checkpoint_dir = DEFAULT_CHECKPOINT_DIR if args.resume else None
+    page_store_dir = DEFAULT_PAGE_STORE_DIR if args.incremental else None
+    history_path = DEFAULT_HISTORY_PATH if args.history else None
+    start = time.perf_counter()
+    lines = []
+    
+    if args.jobs <= 1 or len(paths) == 1:
+        for path in paths:
+            line = process_file(
+                path, cache_dir, args.engine, args.metrics, args.crop_columns,
+                args.templates, checkpoint_dir, page_store_dir, args.low_memory,
+                args.memory_budget, history_path, args.periodo, args.prefilter
+            )
+            lines.append(line)
+            _emit(line)
+    else:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(paths))) as executor:
+            futures = {
+                executor.submit(
+                    process_file, path, cache_dir, args.engine, args.metrics,
+                    args.crop_columns, args.templates, checkpoint_dir, page_store_dir,
+                    args.low_memory, args.memory_budget, history_path, args.periodo,
+                    args.prefilter
+                ): path
+                for path in paths
+            }
+            for future in as_completed(futures):
+                try:
+                    line = future.result()
+                except Exception as e:
+                    # Processo de trabalho abortado (ex: falta de memória)
+                    line = {"arquivo": futures[future], "status": "erro",
+                            "erro": str(e), "cache": False, "tempo_s": None}
+                lines.append(line)
+                _emit(line)
+    
+    failures = sum(1 for line in lines if line["status"] != "ok")
+    _emit({
+        "total_geral": consolidate_summaries(lines),
+        "arquivos": len(lines),
+        "falhas": failures,
+        "tempo_s": round(time.perf_counter() - start, 3)
+    })
+    
+    return EXIT_FAILURES if failures else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
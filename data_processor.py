@@ -2,8 +2,13 @@
 Módulo para processar dados monetários extraídos de PDFs.
 Converte strings monetárias em valores decimais.
 """
+import math
 import re
-from typing import Union
+from typing import Iterable, List, Union
+
+
+# Símbolos de moeda removidos antes da conversão (R$, US$, etc)
+_CURRENCY_SYMBOLS = re.compile(r'[R$US$€£¥]+')
 
 
 def clean_monetary_value(value: Union[str, float, int, None]) -> float:
@@ -47,7 +52,7 @@ def clean_monetary_value(value: Union[str, float, int, None]) -> float:
     
     try:
         # Remove símbolo de moeda (R$, US$, etc)
-        value_str = re.sub(r'[R$US$€£¥]+', '', value_str)
+        value_str = _CURRENCY_SYMBOLS.sub('', value_str)
         
         # Remove espaços
         value_str = value_str.strip()
@@ -82,3 +87,88 @@ def validate_decimal(value: float) -> bool:
         bool: True se válido, False caso contrário
     """
     return isinstance(value, (int, float)) and not (value != value)  # Check for NaN
+
+
+def parse_centavos(value: Union[str, float, int, None]) -> int:
+    """
+    Converte um valor monetário em centavos inteiros.
+    
+    Segue as mesmas regras de clean_monetary_value: valores ausentes,
+    vazios ou ilegíveis valem 0.
+    
+    Args:
+        value: Valor monetário como string, número ou None
+        
+    Returns:
+        int: Valor em centavos
+        
+    Examples:
+        >>> parse_centavos("R$ 1.234,56")
+        123456
+        >>> parse_centavos("234,5")
+        23450
+        >>> parse_centavos(None)
+        0
+    """
+    return parse_centavos_batch((value,))[0]
+
+
+def parse_centavos_batch(values: Iterable[Union[str, float, int, None]]) -> List[int]:
+    """
+    Converte uma sequência de valores monetários em centavos inteiros.
+    
+    O formato brasileiro usual ("R$ 1.234,56", "234,5", "100") é
+    convertido direto para inteiro, sem expressão regular nem float.
+    Qualquer outro formato passa por clean_monetary_value, então o
+    resultado é sempre o mesmo da conversão valor a valor.
+    
+    Args:
+        values: Lista (ou qualquer iterável) de valores monetários
+        
+    Returns:
+        Lista com o valor de cada item em centavos
+    """
+    result = []
+    append = result.append
+    
+    for value in values:
+        if value.__class__ is str:
+            text = value.replace('R$', '').strip() if 'R$' in value else value.strip()
+            reais, comma, cents = text.rpartition(',')
+            if comma:
+                # Pontos são separadores de milhar; a fração tem 1 ou 2 dígitos
+                reais = reais.replace('.', '')
+                if reais.isdecimal() and cents.isdecimal() and len(cents) <= 2:
+                    append(int(reais) * 100 + int(cents) * (10 if len(cents) == 1 else 1))
+                    continue
+            elif text.isdecimal():
+                append(int(text) * 100)
+                continue
+        
+        append(_float_to_centavos(clean_monetary_value(value)))
+    
+    return result
+
+
+def sum_centavos(values: Iterable[Union[str, float, int, None]]) -> int:
+    """
+    Soma valores monetários de forma exata, em centavos inteiros.
+    
+    Args:
+        values: Lista (ou qualquer iterável) de valores monetários
+        
+    Returns:
+        int: Soma em centavos
+        
+    Examples:
+        >>> sum_centavos(["0,10", "0,20", "R$ 1.000,00"])
+        100030
+    """
+    return sum(parse_centavos_batch(values))
+
+
+def _float_to_centavos(value: float) -> int:
+    """Converte um float já limpo em centavos (inválidos valem 0)."""
+    if not validate_decimal(value) or not math.isfinite(value):
+        return 0
+    return round(value * 100)
@@ -0,0 +1,330 @@
+"""
+Exportação das linhas de guia extraídas em CSV, JSON Lines ou Parquet.
+
+As linhas são gravadas em blocos, direto de um iterador (parser.iter_rows(),
+um RecordStore ou uma lista de dicts), sem montar o arquivo inteiro em
+memória. O formato Parquet depende do pyarrow, opcional: só é oferecido
+quando a biblioteca está instalada.
+
+Uso:
+    python exporters.py guias.pdf -o linhas.csv
+    python exporters.py guias.pdf -o linhas.parquet --engine fast
+"""
+import argparse
+import csv
+import importlib.util
+import io
+import json
+import os
+import sys
+from decimal import Decimal
+from itertools import islice
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Tuple, Union
+
+from data_processor import parse_centavos_batch
+from record_store import MISSING, ORIGINS, RecordStore
+
+
+# Colunas exportadas, na ordem dos arquivos
+EXPORT_COLUMNS = (
+    "pagina", "linha", "guia", "cartorio", "valor_pago", "valor_cartorio", "origem"
+)
+
+# Formatos aceitos por export_rows (Parquet só com pyarrow instalado)
+FORMATS = ("csv", "jsonl", "parquet")
+
+# Linhas convertidas e gravadas de cada vez
+DEFAULT_CHUNK_ROWS = 5000
+
+# Tipos MIME, para downloads (ex: st.download_button)
+MIME_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+Destination = Union[str, Path, BinaryIO]
+RowTuple = Tuple[int, int, Optional[str], str, Optional[int], Optional[int], str]
+
+
+def parquet_available() -> bool:
+    """Indica se o pyarrow está instalado (sem importá-lo)."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def available_formats() -> List[str]:
+    """Formatos que podem ser gravados neste ambiente."""
+    return [fmt for fmt in FORMATS if fmt != "parquet" or parquet_available()]
+
+
+def iter_row_chunks(
+    rows: Iterable[Any], chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> Iterator[List[RowTuple]]:
+    """
+    Converte as linhas em blocos de tuplas, na ordem de EXPORT_COLUMNS.
+    
+    Os valores saem em centavos inteiros (None quando ausentes). Um
+    RecordStore é lido direto dos arrays; dicts (ver
+    PDFFinancialParser.iter_rows) têm os valores convertidos bloco a bloco.
+    
+    Args:
+        rows: RecordStore ou iterável de linhas como dicts
+        chunk_rows: Linhas por bloco
+    
+    Yields:
+        Listas com até chunk_rows tuplas
+    """
+    if isinstance(rows, RecordStore):
+        for start in range(0, len(rows), chunk_rows):
+            yield [
+                (
+                    rows.row_page[i],
+                    rows.row_line[i],
+                    rows.guia(i),
+                    rows.names[rows.row_cartorio[i]],
+                    _centavos_or_none(rows.row_valor_pago[i]),
+                    _centavos_or_none(rows.row_valor_cartorio[i]),
+                    ORIGINS[rows.row_origin[i]],
+                )
+                for i in range(start, min(start + chunk_rows, len(rows)))
+            ]
+        return
+    
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, chunk_rows))
+        if not chunk:
+            return
+        pagos = parse_centavos_batch(row["valor_pago"] for row in chunk)
+        cartorios = parse_centavos_batch(row["valor_cartorio"] for row in chunk)
+        yield [
+            (
+                row["pagina"],
+                row["linha"],
+                row["guia"],
+                row["cartorio"],
+                None if row["valor_pago"] is None else pago,
+                None if row["valor_cartorio"] is None else cartorio,
+                row["origem"],
+            )
+            for row, pago, cartorio in zip(chunk, pagos, cartorios)
+        ]
+
+
+def write_csv(
+    rows: Iterable[Any], fp: Any, chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> int:
+    """
+    Grava as linhas em CSV, com cabeçalho e valores com ponto decimal.
+    
+    Args:
+        rows: RecordStore ou iterável de linhas como dicts
+        fp: Arquivo de texto aberto com newline=""
+        chunk_rows: Linhas convertidas e gravadas de cada vez
+    
+    Returns:
+        int: Quantidade de linhas gravadas
+    """
+    writer = csv.writer(fp)
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for chunk in iter_row_chunks(rows, chunk_rows):
+        writer.writerows(
+            (page, line, guia, cartorio, _decimal_text(pago), _decimal_text(valor), origem)
+            for page, line, guia, cartorio, pago, valor, origem in chunk
+        )
+        count += len(chunk)
+    return count
+
+
+def write_jsonl(
+    rows: Iterable[Any], fp: Any, chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> int:
+    """
+    Grava as linhas em JSON Lines, um objeto por linha.
+    
+    Args:
+        rows: RecordStore ou iterável de linhas como dicts
+        fp: Arquivo de texto aberto
+        chunk_rows: Linhas convertidas e gravadas de cada vez
+    
+    Returns:
+        int: Quantidade de linhas gravadas
+    """
+    count = 0
+    for chunk in iter_row_chunks(rows, chunk_rows):
+        fp.write("".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, (
+                page, line, guia, cartorio, _decimal_number(pago),
+                _decimal_number(valor), origem
+            ))), ensure_ascii=False) + "\n"
+            for page, line, guia, cartorio, pago, valor, origem in chunk
+        ))
+        count += len(chunk)
+    return count
+
+
+def write_parquet(
+    rows: Iterable[Any], destination: Destination, chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> int:
+    """
+    Grava as linhas em Parquet, um grupo de linhas por bloco.
+    
+    Os valores usam decimal(18, 2), sem arredondamento de ponto flutuante.
+    
+    Args:
+        rows: RecordStore ou iterável de linhas como dicts
+        destination: Caminho ou arquivo binário aberto
+        chunk_rows: Linhas convertidas e gravadas de cada vez
+    
+    Returns:
+        int: Quantidade de linhas gravadas
+    
+    Raises:
+        ImportError: Se o pyarrow não está instalado
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("exportação Parquet requer o pyarrow (pip install pyarrow)")
+    
+    money = pa.decimal128(18, 2)
+    schema = pa.schema([
+        ("pagina", pa.int32()),
+        ("linha", pa.int32()),
+        ("guia", pa.string()),
+        ("cartorio", pa.string()),
+        ("valor_pago", money),
+        ("valor_cartorio", money),
+        ("origem", pa.string()),
+    ])
+    
+    count = 0
+    writer = pq.ParquetWriter(
+        str(destination) if isinstance(destination, Path) else destination, schema
+    )
+    try:
+        for chunk in iter_row_chunks(rows, chunk_rows):
+            columns = [list(column) for column in zip(*chunk)]
+            for index in (4, 5):
+                columns[index] = [_decimal(value) for value in columns[index]]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            ))
+            count += len(chunk)
+    finally:
+        writer.close()
+    return count
+
+
+def export_rows(
+    rows: Iterable[Any],
+    destination: Destination,
+    fmt: Optional[str] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> int:
+    """
+    Exporta as linhas de guia no formato pedido.
+    
+    Args:
+        rows: RecordStore, parser.iter_rows() ou lista de linhas como dicts
+        destination: Caminho do arquivo ou arquivo binário aberto
+        fmt: "csv", "jsonl" ou "parquet" (padrão: extensão do caminho)
+        chunk_rows: Linhas convertidas e gravadas de cada vez
+    
+    Returns:
+        int: Quantidade de linhas gravadas
+    
+    Raises:
+        ValueError: Formato desconhecido ou não informado
+        ImportError: Parquet sem o pyarrow instalado
+    """
+    if fmt is None and isinstance(destination, (str, Path)):
+        fmt = Path(destination).suffix.lstrip(".").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+    
+    if fmt == "parquet":
+        return write_parquet(rows, destination, chunk_rows)
+    
+    write = write_csv if fmt == "csv" else write_jsonl
+    if isinstance(destination, (str, Path)):
+        with open(destination, "w", encoding="utf-8", newline="") as fp:
+            return write(rows, fp, chunk_rows)
+    
+    # Arquivo binário do chamador: escreve texto sem fechá-lo ao terminar
+    text = io.TextIOWrapper(destination, encoding="utf-8", newline="")
+    try:
+        return write(rows, text, chunk_rows)
+    finally:
+        text.flush()
+        text.detach()
+
+
+def _centavos_or_none(centavos: int) -> Optional[int]:
+    """Centavos de um array do RecordStore (MISSING vira None)."""
+    return None if centavos == MISSING else centavos
+
+
+def _decimal_text(centavos: Optional[int]) -> str:
+    """Centavos como texto com ponto decimal, ex: 123456 -> "1234.56"."""
+    if centavos is None:
+        return ""
+    sign = "-" if centavos < 0 else ""
+    reais, cents = divmod(abs(centavos), 100)
+    return f"{sign}{reais}.{cents:02d}"
+
+
+def _decimal_number(centavos: Optional[int]) -> Optional[float]:
+    """Centavos como número JSON (mesmo arredondamento dos resumos)."""
+    return None if centavos is None else round(centavos / 100, 2)
+
+
+def _decimal(centavos: Optional[int]) -> Optional[Decimal]:
+    """Centavos como Decimal exato, para o Parquet."""
+    return None if centavos is None else Decimal(centavos).scaleb(-2)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Extrai um PDF e grava as linhas de guia à medida que as páginas são lidas.
+    
+    Args:
+        argv: Argumentos (padrão: sys.argv[1:])
+    
+    Returns:
+        int: Código de saída (0 sucesso, 1 erro na leitura do PDF)
+    """
+    # Importado aqui: exportar um RecordStore não precisa do parser
+    from pdf_parser import ENGINES, PDFFinancialParser
+    
+    parser = argparse.ArgumentParser(description="Exporta as linhas de guia de um PDF.")
+    parser.add_argument("pdf", help="PDF de Guias Geradas")
+    parser.add_argument("-o", "--output", required=True,
+                        help="arquivo de saída (.csv, .jsonl ou .parquet)")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="formato de saída (padrão: extensão do arquivo)")
+    parser.add_argument("--engine", choices=ENGINES, default="default",
+                        help="motor de extração por página")
+    args = parser.parse_args(argv)
+    
+    fmt = args.format or Path(args.output).suffix.lstrip(".").lower()
+    if fmt not in available_formats():
+        parser.error(f"formato indisponível: {fmt} (use {', '.join(available_formats())})")
+    
+    pdf_parser = PDFFinancialParser(args.pdf, engine=args.engine)
+    try:
+        count = export_rows(pdf_parser.iter_rows(), args.output, fmt)
+    except Exception as e:
+        # As linhas das páginas anteriores ao erro ficam no arquivo
+        print(f"Erro ao processar PDF: {e}", file=sys.stderr)
+        return 1
+    print(f"{count} linhas gravadas em {os.path.abspath(args.output)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,434 @@
+"""
+Leitura rápida do texto de uma página, direto do fluxo de conteúdo.
+Interpreta só os operadores de texto e de caminho, sem montar objetos de
+layout (LTChar, caracteres do pdfplumber): guarda trechos de texto com a
+posição e reconstrói as linhas, que é o que a busca por valores em R$ precisa.
+"""
+import re
+from typing import Any, Dict, List, Tuple
+
+from pdfminer.pdffont import PDFType3Font, PDFUnicodeNotDefined
+from pdfminer.pdfinterp import PDFTextState
+from pdfminer.pdftypes import PDFObjRef, dict_value, list_value, stream_value
+from pdfminer.psparser import LIT
+from pdfminer.utils import mult_matrix
+from pdfplumber.utils import cluster_objects
+from pdfplumber.utils.text import LIGATURES
+
+
+# Mesmas tolerâncias usadas pelo pdfplumber em extract_text()
+X_TOLERANCE = 3
+Y_TOLERANCE = 3
+
+# Uma tabela com 8 colunas (até a coluna Cartório) tem pelo menos 9 bordas
+# verticais; páginas com menos que isso não podem ter tabela útil ao parser
+MIN_TABLE_VERTICAL_EDGES = 9
+
+# Operadores que pintam o caminho atual (os demais o descartam com "n")
+PAINT_OPERATORS = frozenset(["S", "s", "f", "F", "f*", "B", "B*", "b", "b*"])
+
+LITERAL_IMAGE = LIT("Image")
+
+# Tokens de um fluxo de conteúdo; espaços em branco ficam entre os matches
+_TOKEN = re.compile(
+    rb"(?P<comment>%[^\r\n]*)"
+    rb"|(?P<num>[+-]?(?:\d+\.?\d*|\.\d+))"
+    rb"|(?P<name>/[^\s\x00/\[\]()<>{}%]*)"
+    rb"|(?P<str>\((?:[^\\()]|\\.|\((?:[^\\()]|\\.)*\))*\))"
+    rb"|(?P<dict><<|>>)"
+    rb"|(?P<hex><[0-9A-Fa-f\s]*>)"
+    rb"|(?P<arr>[\[\]])"
+    rb"|(?P<op>[^\s\x00/\[\]()<>{}%]+)",
+    re.S
+)
+_ESCAPE = re.compile(rb"\\(?:([0-7]{1,3})|(\r\n|\r|\n)|(.))", re.S)
+_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+_NAME_ESCAPE = re.compile(rb"#([0-9A-Fa-f]{2})")
+_WHITESPACE = re.compile(rb"\s")
+
+
+class UnsupportedPage(Exception):
+    """A página precisa da extração completa (tabela, formulário ou texto não horizontal)."""
+
+
+def _unescape(match: "re.Match") -> bytes:
+    """Traduz uma sequência de escape de string literal do PDF."""
+    octal, newline, char = match.groups()
+    if octal:
+        return bytes([int(octal, 8) & 0xFF])
+    if newline:
+        return b""
+    return _ESCAPES.get(char, char)
+
+
+class _PageTextReader:
+    """
+    Interpretador mínimo do fluxo de conteúdo de uma página.
+    
+    Segue a semântica do PDFPageInterpreter do pdfminer para o estado de
+    texto (matrizes, fonte, espaçamentos) e usa as mesmas fontes, mas
+    guarda trechos de texto [x0, x1, topo, texto] em vez de criar um objeto
+    por caractere. Caracteres consecutivos na mesma altura são unidos
+    enquanto não houver espaço maior que X_TOLERANCE entre eles.
+    """
+    
+    def __init__(self, page_obj: Any, rsrcmgr: Any, stop_at_grid: bool = True):
+        self.page_obj = page_obj
+        self.rsrcmgr = rsrcmgr
+        self.stop_at_grid = stop_at_grid
+        self.resources = dict_value(page_obj.resources) if page_obj.resources else {}
+        self.fontmap: Dict[str, Any] = {}
+        self.runs: List[List[Any]] = []
+        self.vertical_edges = 0
+        # (fonte, cid) -> (texto, largura); as mesmas fontes se repetem
+        self._glyphs: Dict[Tuple[int, int], Tuple[str, float]] = {}
+        
+        # Mesma matriz inicial do pdfminer (PDFPageInterpreter.process_page)
+        x0, y0, x1, y1 = page_obj.mediabox
+        rotate = page_obj.rotate
+        if rotate == 90:
+            self.ctm = (0, -1, 1, 0, -y0, x1)
+        elif rotate == 180:
+            self.ctm = (-1, 0, 0, -1, x1, y1)
+        elif rotate == 270:
+            self.ctm = (0, 1, -1, 0, y1, -x0)
+        else:
+            self.ctm = (1, 0, 0, 1, -x0, -y0)
+        self.textstate = PDFTextState()
+    
+    def read(self) -> List[List[Any]]:
+        """Interpreta o conteúdo da página e devolve os trechos de texto."""
+        data = page_content(self.page_obj)
+        
+        operands: List[Any] = []
+        arrays: List[List[Any]] = []
+        path: List[Tuple[Any, ...]] = []
+        gstack: List[Tuple[Any, PDFTextState]] = []
+        textstate = self.textstate
+        
+        for match in _TOKEN.finditer(data):
+            kind = match.lastgroup
+            token = match.group()
+            if kind == "num":
+                operands.append(float(token))
+                continue
+            if kind == "str":
+                token = token[1:-1]
+                if b"\\" in token:
+                    token = _ESCAPE.sub(_unescape, token)
+                operands.append(token)
+                continue
+            if kind == "name":
+                if b"#" in token:
+                    token = _NAME_ESCAPE.sub(lambda m: bytes([int(m.group(1), 16)]), token)
+                operands.append(token[1:].decode("latin-1"))
+                continue
+            if kind == "arr":
+                if token == b"[":
+                    arrays.append(operands)
+                    operands = []
+                elif arrays:
+                    array = operands
+                    operands = arrays.pop()
+                    operands.append(array)
+                continue
+            if kind == "hex":
+                digits = _WHITESPACE.sub(b"", token[1:-1])
+                if len(digits) % 2:
+                    digits += b"0"
+                operands.append(bytes.fromhex(digits.decode()))
+                continue
+            if kind != "op":
+                continue
+            
+            op = token.decode("latin-1")
+            try:
+                if op == "Tj" or op == "TJ":
+                    if textstate.font is not None:
+                        self.render_string(operands[-1] if op == "TJ" else [operands[-1]])
+                elif op == "Td" or op == "TD":
+                    tx, ty = operands[-2:]
+                    a, b, c, d, e, f = textstate.matrix
+                    textstate.matrix = (a, b, c, d, tx * a + ty * c + e, tx * b + ty * d + f)
+                    textstate.linematrix = (0, 0)
+                    if op == "TD":
+                        textstate.leading = ty
+                elif op == "Tm":
+                    textstate.matrix = tuple(operands[-6:])
+                    textstate.linematrix = (0, 0)
+                elif op == "Tf":
+                    self.set_font(operands[-2], operands[-1])
+                elif op == "BT":
+                    textstate.reset()
+                elif op == "m" or op == "l":
+                    path.append((op, operands[-2], operands[-1]))
+                elif op == "re":
+                    path.append(("re",) + tuple(operands[-4:]))
+                elif op in PAINT_OPERATORS:
+                    self.paint_path(path)
+                    path = []
+                elif op == "n":
+                    path = []
+                elif op == "q":
+                    gstack.append((self.ctm, textstate.copy()))
+                elif op == "Q":
+                    if gstack:
+                        self.ctm, textstate = gstack.pop()
+                        self.textstate = textstate
+                elif op == "cm":
+                    self.ctm = mult_matrix(tuple(operands[-6:]), self.ctm)
+                elif op == "T*" or op == "'":
+                    a, b, c, d, e, f = textstate.matrix
+                    textstate.matrix = (
+                        a, b, c, d,
+                        textstate.leading * c + e,
+                        textstate.leading * d + f
+                    )
+                    textstate.linematrix = (0, 0)
+                    if op == "'" and textstate.font is not None:
+                        self.render_string([operands[-1]])
+                elif op == '"':
+                    # Como no pdfminer: ajusta os espaçamentos e mostra o texto
+                    textstate.wordspace, textstate.charspace = operands[-3], operands[-2]
+                    if textstate.font is not None:
+                        self.render_string([operands[-1]])
+                elif op == "Tc":
+                    textstate.charspace = operands[-1]
+                elif op == "Tw":
+                    textstate.wordspace = operands[-1]
+                elif op == "Tz":
+                    textstate.scaling = operands[-1]
+                elif op == "TL":
+                    textstate.leading = -operands[-1]
+                elif op == "Ts":
+                    textstate.rise = operands[-1]
+                elif op == "Do":
+                    self.check_xobject(operands[-1])
+                elif op == "BI":
+                    raise UnsupportedPage("imagem embutida no conteúdo")
+            except (IndexError, TypeError, ValueError):
+                # Operandos faltando ou de tipo inesperado: deixa para o pdfminer
+                raise UnsupportedPage(f"operador {op} com operandos inesperados")
+            operands = []
+        
+        return self.runs
+    
+    def set_font(self, name: str, fontsize: float) -> None:
+        """Seleciona a fonte (operador Tf), como o pdfminer faz."""
+        font = self.fontmap.get(name)
+        if font is None:
+            spec = dict_value(self.resources.get("Font", {})).get(name)
+            if spec is None:
+                font = self.rsrcmgr.get_font(None, {})
+            else:
+                objid = spec.objid if isinstance(spec, PDFObjRef) else None
+                font = self.rsrcmgr.get_font(objid, dict_value(spec))
+            if isinstance(font, PDFType3Font):
+                raise UnsupportedPage("fonte Type3")
+            self.fontmap[name] = font
+        self.textstate.font = font
+        self.textstate.fontsize = fontsize
+    
+    def check_xobject(self, name: str) -> None:
+        """Imagens não têm texto; formulários podem ter e não são tratados aqui."""
+        xobj = dict_value(self.resources.get("XObject", {})).get(name)
+        if xobj is not None and stream_value(xobj).get("Subtype") is not LITERAL_IMAGE:
+            raise UnsupportedPage("formulário (XObject) com conteúdo próprio")
+    
+    def paint_path(self, path: List[Tuple[Any, ...]]) -> None:
+        """Conta bordas verticais, que indicam uma possível tabela."""
+        rotated = self.ctm[1] or self.ctm[2]
+        x = None
+        for segment in path:
+            op = segment[0]
+            if op == "re":
+                self.vertical_edges += 2
+            elif op == "l" and x is not None and (rotated or abs(segment[1] - x) < 0.5):
+                self.vertical_edges += 1
+            if op != "re":
+                x = segment[1]
+        if self.stop_at_grid and self.vertical_edges >= MIN_TABLE_VERTICAL_EDGES:
+            raise UnsupportedPage("página com grade de tabela")
+    
+    def render_string(self, seq: List[Any]) -> None:
+        """Registra o texto de um operador Tj/TJ, sem criar objetos por caractere."""
+        textstate = self.textstate
+        a, b, c, d, e, f = mult_matrix(textstate.matrix, self.ctm)
+        font = textstate.font
+        if b or c or font.is_vertical():
+            raise UnsupportedPage("texto não horizontal")
+        
+        fontsize = textstate.fontsize
+        scaling = textstate.scaling * 0.01
+        charspace = textstate.charspace * scaling
+        wordspace = 0 if font.is_multibyte() else textstate.wordspace * scaling
+        dxscale = 0.001 * fontsize * scaling
+        advance = fontsize * scaling
+        glyphs = self._glyphs
+        font_id = id(font)
+        
+        x, y = textstate.linematrix
+        # Topo dos caracteres, calculado como no LTChar do pdfminer
+        top = d * (y + textstate.rise + font.get_descent() * fontsize + fontsize) + f
+        runs = self.runs
+        run = runs[-1] if runs else None
+        needcharspace = False
+        
+        for obj in seq:
+            if isinstance(obj, float):
+                x -= obj * dxscale
+                needcharspace = True
+                continue
+            if not isinstance(obj, bytes):
+                continue
+            for cid in font.decode(obj):
+                if needcharspace:
+                    x += charspace
+                glyph = glyphs.get((font_id, cid))
+                if glyph is None:
+                    try:
+                        text = font.to_unichr(cid)
+                    except PDFUnicodeNotDefined:
+                        text = f"(cid:{cid})"
+                    text = LIGATURES.get(text, text)
+                    glyph = glyphs[(font_id, cid)] = (text, font.char_width(cid))
+                text, width = glyph
+                
+                x_page = a * x + e
+                width_page = a * width * advance
+                if (run is not None and run[2] == top
+                        and -X_TOLERANCE <= x_page - run[1] <= X_TOLERANCE):
+                    run[1] = x_page + width_page
+                    run[3] += text
+                else:
+                    run = [x_page, x_page + width_page, top, text]
+                    runs.append(run)
+                
+                x += width * advance
+                if cid == 32 and wordspace:
+                    x += wordspace
+                needcharspace = True
+        
+        textstate.linematrix = (x, y)
+
+
+def page_content(page_obj: Any) -> bytes:
+    """
+    Junta os fluxos de conteúdo de uma página, já descomprimidos.
+    
+    Args:
+        page_obj: Página do pdfminer (PDFPage; em pdfplumber, page.page_obj)
+    
+    Returns:
+        bytes: Operadores da página (o pdfminer guarda os fluxos decodificados)
+    """
+    streams = list_value(page_obj.contents) if page_obj.contents else []
+    return b"\n".join(stream_value(stream).get_data() for stream in streams)
+
+
+def extract_page_text(page_obj: Any, rsrcmgr: Any) -> str:
+    """
+    Reconstrói o texto de uma página sem a análise de layout completa.
+    
+    O resultado segue o formato de page.extract_text() do pdfplumber: uma
+    linha por linha visual (tolerância vertical de Y_TOLERANCE), de cima
+    para baixo, com palavras separadas por um espaço.
+    
+    Args:
+        page_obj: Página do pdfminer (PDFPage; em pdfplumber, page.page_obj)
+        rsrcmgr: Gerenciador de recursos do documento (pdf.rsrcmgr)
+    
+    Returns:
+        str: Texto da página
+    
+    Raises:
+        UnsupportedPage: Se a página tem grade de tabela, formulários,
+            imagens embutidas ou texto não horizontal e deve passar pela
+            extração completa
+    """
+    return runs_to_text(extract_page_runs(page_obj, rsrcmgr))
+
+
+def extract_page_runs(page_obj: Any, rsrcmgr: Any) -> List[List[Any]]:
+    """
+    Lê os trechos de texto [x0, x1, topo, texto] de uma página.
+    
+    Mesma leitura de extract_page_text, sem montar as linhas; as posições
+    permitem separar as colunas (ver runs_to_words).
+    
+    Args:
+        page_obj: Página do pdfminer (PDFPage; em pdfplumber, page.page_obj)
+        rsrcmgr: Gerenciador de recursos do documento (pdf.rsrcmgr)
+    
+    Returns:
+        Trechos na ordem em que aparecem no fluxo de conteúdo
+    
+    Raises:
+        UnsupportedPage: Nos mesmos casos de extract_page_text
+    """
+    return _PageTextReader(page_obj, rsrcmgr).read()
+
+
+def page_text_runs(page_obj: Any, rsrcmgr: Any) -> List[str]:
+    """
+    Lê os trechos de texto de uma página, sem montá-los em linhas.
+    
+    Ao contrário de extract_page_text, páginas com grade de tabela são
+    lidas normalmente (os desenhos são ignorados). Serve à pré-classificação
+    das páginas, que só precisa saber que textos existem na página.
+    
+    Args:
+        page_obj: Página do pdfminer (PDFPage; em pdfplumber, page.page_obj)
+        rsrcmgr: Gerenciador de recursos do documento (pdf.rsrcmgr)
+    
+    Returns:
+        Textos dos trechos, na ordem em que aparecem no fluxo de conteúdo
+    
+    Raises:
+        UnsupportedPage: Se a página tem formulários, imagens embutidas ou
+            texto não horizontal
+    """
+    reader = _PageTextReader(page_obj, rsrcmgr, stop_at_grid=False)
+    return [run[3] for run in reader.read()]
+
+
+def runs_to_text(runs: List[List[Any]]) -> str:
+    """
+    Agrupa trechos de texto [x0, x1, topo, texto] em linhas.
+    
+    Args:
+        runs: Trechos na ordem em que aparecem no fluxo de conteúdo
+    
+    Returns:
+        str: Linhas de cima para baixo, com palavras separadas por um espaço
+    """
+    lines = []
+    for line in cluster_objects(runs_to_words(runs), "top", Y_TOLERANCE):
+        line.sort(key=lambda item: item["x0"])
+        parts = []
+        end = None
+        for item in line:
+            if end is not None and item["x0"] - end > X_TOLERANCE:
+                parts.append(" ")
+            parts.append(item["text"])
+            end = item["x1"]
+        text = " ".join("".join(parts).split())
+        if text:
+            lines.append(text)
+    
+    return "\n".join(lines)
+
+
+def runs_to_words(runs: List[List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Converte trechos [x0, x1, topo, texto] no formato de page.extract_words().
+    
+    Args:
+        runs: Trechos lidos por extract_page_runs
+    
+    Returns:
+        Lista de dicts com "text", "x0", "x1" e "top" (a altura com o sinal
+        invertido, para ordenar de cima para baixo como no pdfplumber); um
+        trecho pode ter várias palavras
+    """
+    return [{"top": -top, "x0": x0, "x1": x1, "text": text} for x0, x1, top, text in runs]
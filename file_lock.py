@@ -0,0 +1,129 @@
+"""
+Trava de arquivo entre processos.
+Serializa o acesso de vários processos (ex: a linha de comando com --jobs,
+sessões do app) a um mesmo arquivo em disco.
+"""
+import os
+import time
+from pathlib import Path
+from typing import Any, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Intervalo entre tentativas da trava bloqueante no Windows, em segundos
+_RETRY_S = 0.05
+
+
+class FileLock:
+    """
+    Trava exclusiva sobre um arquivo auxiliar (ex: "modelos.json.lock").
+    
+    Vale entre processos e também entre instâncias diferentes no mesmo
+    processo. O arquivo da trava é criado se não existir; quem tem a trava
+    pode apagá-lo com unlink() (ex: junto com o arquivo protegido). Quem
+    obtiver a trava de um arquivo já apagado tenta de novo com o atual.
+    """
+    
+    def __init__(self, path: Union[str, Path]):
+        """
+        Inicializa a trava (ela só é obtida com acquire() ou with).
+        
+        Args:
+            path: Arquivo da trava
+        """
+        self.path = Path(path)
+        self._fd = None
+    
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        Obtém a trava.
+        
+        Args:
+            blocking: Se True, espera a trava ser liberada por outro processo
+        
+        Returns:
+            bool: True se a trava foi obtida; False se blocking é False e
+            outro processo já a tem
+        """
+        while True:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                _lock(fd, blocking)
+            except OSError:
+                os.close(fd)
+                if blocking:
+                    raise
+                return False
+            if _same_file(fd, self.path):
+                self._fd = fd
+                return True
+            # O arquivo foi apagado (unlink) por quem tinha a trava antes
+            _unlock(fd)
+            os.close(fd)
+    
+    def unlink(self) -> None:
+        """Apaga o arquivo da trava; chamar com a trava obtida, antes de release()."""
+        try:
+            os.unlink(self.path)
+        except OSError:
+            # Ausente, ou aberto por outro processo no Windows
+            pass
+    
+    def release(self) -> None:
+        """Libera a trava, se obtida."""
+        if self._fd is None:
+            return
+        try:
+            _unlock(self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+    
+    @property
+    def locked(self) -> bool:
+        """Indica se esta instância tem a trava."""
+        return self._fd is not None
+    
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+def _lock(fd: int, blocking: bool) -> None:
+    """Trava o arquivo; sem espera, falha com OSError se já estiver travado."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return
+        except OSError:
+            if not blocking:
+                raise
+            time.sleep(_RETRY_S)
+
+
+def _same_file(fd: int, path: Path) -> bool:
+    """Indica se o descritor ainda corresponde ao arquivo no caminho."""
+    try:
+        return os.path.samestat(os.fstat(fd), os.stat(path))
+    except OSError:
+        return False
+
+
+def _unlock(fd: int) -> None:
+    """Libera a trava do arquivo."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,477 @@
+"""
+Histórico local (SQLite) dos relatórios processados.
+
+Cada arquivo processado fica registrado com o hash do conteúdo, o nome, o
+período de referência, a data do processamento, os totais, os subtotais
+por cartório e as linhas de guia. Os índices por período, hash e cartório
+permitem responder consultas como "total de Cartório em março para a
+serventia X" sem reabrir os PDFs.
+
+Uso:
+    python history_store.py --periodo 2026-03 --cartorio "1º Ofício"
+    python history_store.py --guia 0024102419
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from calculator import GroupedTotals
+from exporters import iter_row_chunks
+from pdf_input import PdfSource, as_buffer, is_path
+from pdf_parser import PARSER_VERSION
+from record_store import guia_key
+from result_cache import DEFAULT_CACHE_DIR, HASH_CHUNK_SIZE
+
+
+# Arquivo padrão, configurável por variável de ambiente
+DEFAULT_HISTORY_PATH = os.environ.get(
+    "FIRC_HISTORY_DB",
+    str(Path(DEFAULT_CACHE_DIR) / "historico.sqlite3")
+)
+
+# Linhas de guia gravadas por executemany (todas na mesma transação)
+INSERT_CHUNK_ROWS = 5000
+
+# Período de referência: ano e mês, ex: 2026-03
+_PERIODO = re.compile(r"\d{4}-(0[1-9]|1[0-2])")
+
+# Valores em centavos inteiros; "hash" UNIQUE já cria o índice por hash
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS arquivos (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL UNIQUE,
+    nome TEXT NOT NULL,
+    periodo TEXT NOT NULL,
+    processado_em TEXT NOT NULL,
+    versao_parser TEXT NOT NULL,
+    total_valor_pago INTEGER NOT NULL,
+    total_cartorio INTEGER NOT NULL,
+    quantidade_valores_pago INTEGER NOT NULL,
+    quantidade_cartorio INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS arquivos_periodo ON arquivos (periodo);
+
+CREATE TABLE IF NOT EXISTS cartorios (
+    arquivo_id INTEGER NOT NULL REFERENCES arquivos (id) ON DELETE CASCADE,
+    periodo TEXT NOT NULL,
+    cartorio TEXT NOT NULL,
+    total_valor_pago INTEGER NOT NULL,
+    total_cartorio INTEGER NOT NULL,
+    quantidade INTEGER NOT NULL,
+    PRIMARY KEY (arquivo_id, cartorio)
+);
+CREATE INDEX IF NOT EXISTS cartorios_cartorio ON cartorios (cartorio, periodo);
+CREATE INDEX IF NOT EXISTS cartorios_periodo ON cartorios (periodo);
+
+CREATE TABLE IF NOT EXISTS linhas (
+    arquivo_id INTEGER NOT NULL REFERENCES arquivos (id) ON DELETE CASCADE,
+    pagina INTEGER NOT NULL,
+    linha INTEGER NOT NULL,
+    guia TEXT,
+    cartorio TEXT NOT NULL,
+    valor_pago INTEGER,
+    valor_cartorio INTEGER,
+    origem TEXT NOT NULL,
+    guia_chave TEXT
+);
+CREATE INDEX IF NOT EXISTS linhas_arquivo ON linhas (arquivo_id);
+"""
+
+# Busca por guia pela chave sem zeros à esquerda (ver record_store.guia_key).
+# Bancos criados antes da coluna guia_chave ganham a coluna, preenchida a
+# partir de guia, e perdem o índice antigo por guia
+_GUIA_KEY_INDEX = "CREATE INDEX IF NOT EXISTS linhas_guia_chave ON linhas (guia_chave)"
+_MIGRATE_GUIA_KEY = """
+ALTER TABLE linhas ADD COLUMN guia_chave TEXT;
+UPDATE linhas SET guia_chave = CASE
+    WHEN guia <> '' AND guia NOT GLOB '*[^0-9]*'
+        THEN coalesce(nullif(ltrim(guia, '0'), ''), '0')
+    ELSE guia
+END;
+DROP INDEX IF EXISTS linhas_guia;
+"""
+
+
+def parse_period(value: str) -> str:
+    """
+    Valida um período de referência.
+    
+    Args:
+        value: Período no formato AAAA-MM (ex: "2026-03")
+    
+    Returns:
+        str: O próprio período, sem espaços
+    
+    Raises:
+        ValueError: Se o formato é inválido
+    """
+    value = value.strip()
+    if not _PERIODO.fullmatch(value):
+        raise ValueError(f"Período inválido: {value!r} (use AAAA-MM, ex: 2026-03)")
+    return value
+
+
+def file_hash(pdf_path: PdfSource) -> str:
+    """
+    Calcula o hash do conteúdo de um PDF (sem a versão do parser).
+    
+    O mesmo arquivo tem o mesmo hash em qualquer versão do parser, então
+    reprocessá-lo atualiza o registro em vez de duplicá-lo no histórico.
+    
+    Args:
+        pdf_path: Caminho do PDF ou o conteúdo em memória
+    
+    Returns:
+        str: Hash SHA-256 (hex) do conteúdo
+    """
+    digest = hashlib.sha256()
+    if is_path(pdf_path):
+        with open(pdf_path, "rb") as fp:
+            for chunk in iter(lambda: fp.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    else:
+        digest.update(as_buffer(pdf_path))
+    return digest.hexdigest()
+
+
+class HistoryStore:
+    """
+    Histórico de relatórios processados em um banco SQLite local.
+    
+    Pode ser compartilhado entre threads (ex: sessões do Streamlit); vários
+    processos podem gravar no mesmo arquivo (modo WAL).
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Abre (ou cria) o banco.
+        
+        Args:
+            path: Arquivo do banco (padrão: DEFAULT_HISTORY_PATH); ":memory:"
+                mantém o histórico só em memória
+        """
+        self.path = path or DEFAULT_HISTORY_PATH
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+            columns = [row["name"] for row in self._conn.execute("PRAGMA table_info(linhas)")]
+            if "guia_chave" not in columns:
+                self._conn.executescript(_MIGRATE_GUIA_KEY)
+            self._conn.execute(_GUIA_KEY_INDEX)
+    
+    def close(self) -> None:
+        """Fecha a conexão com o banco."""
+        self._conn.close()
+    
+    def __enter__(self) -> "HistoryStore":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+    
+    def record(
+        self,
+        content_hash: str,
+        filename: str,
+        totals: Dict[str, float],
+        por_cartorio: List[Dict[str, Any]],
+        rows: Optional[Iterable[Any]] = None,
+        quantidades: Optional[Dict[str, int]] = None,
+        periodo: Optional[str] = None,
+        processado_em: Optional[datetime] = None
+    ) -> int:
+        """
+        Registra um arquivo processado, substituindo um registro anterior do mesmo hash.
+        
+        Tudo é gravado em uma única transação: as linhas de guia vão em
+        blocos de INSERT_CHUNK_ROWS por executemany.
+        
+        Args:
+            content_hash: Hash do conteúdo (ver file_hash)
+            filename: Nome do arquivo
+            totals: Totais (ver FinancialCalculator.calculate_totals)
+            por_cartorio: Subtotais por cartório (ver calculate_grouped)
+            rows: Linhas de guia (RecordStore ou dicts); None não grava linhas
+            quantidades: {"valor_pago": int, "cartorio": int}, valores extraídos
+            periodo: Período de referência AAAA-MM (padrão: o do registro
+                anterior do mesmo arquivo, ou o mês do processamento)
+            processado_em: Data do processamento (padrão: agora)
+        
+        Returns:
+            int: Identificador do arquivo no histórico
+        
+        Raises:
+            ValueError: Se o período é inválido
+        """
+        processado_em = processado_em or datetime.now()
+        quantidades = quantidades or {}
+        if periodo is not None:
+            periodo = parse_period(periodo)
+        grouped = GroupedTotals.from_list(por_cartorio)
+        
+        with self._lock, self._conn:
+            previous = self._conn.execute(
+                "SELECT periodo FROM arquivos WHERE hash = ?", (content_hash,)
+            ).fetchone()
+            if periodo is None:
+                periodo = previous["periodo"] if previous else processado_em.strftime("%Y-%m")
+            if previous:
+                # Subtotais e linhas saem junto (ON DELETE CASCADE)
+                self._conn.execute("DELETE FROM arquivos WHERE hash = ?", (content_hash,))
+            
+            file_id = self._conn.execute(
+                "INSERT INTO arquivos (hash, nome, periodo, processado_em, versao_parser,"
+                " total_valor_pago, total_cartorio, quantidade_valores_pago,"
+                " quantidade_cartorio) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    content_hash, filename, periodo, processado_em.isoformat(timespec="seconds"),
+                    PARSER_VERSION, round(totals["total_valor_pago"] * 100),
+                    round(totals["total_cartorio"] * 100),
+                    quantidades.get("valor_pago", 0), quantidades.get("cartorio", 0),
+                )
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO cartorios VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (file_id, periodo, cartorio, pago, valor, linhas)
+                    for cartorio, (pago, valor, linhas) in grouped.groups.items()
+                ]
+            )
+            if rows is not None:
+                for chunk in iter_row_chunks(rows, INSERT_CHUNK_ROWS):
+                    self._conn.executemany(
+                        "INSERT INTO linhas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(file_id,) + row + (_guia_search_key(row[2]),) for row in chunk]
+                    )
+        return file_id
+    
+    def record_result(
+        self,
+        processed: Dict[str, Any],
+        content_hash: str,
+        filename: str,
+        periodo: Optional[str] = None
+    ) -> int:
+        """
+        Registra o resultado de pipeline.process_pdf (ou de ExtractionJob).
+        
+        Args:
+            processed: Resultado com "totals", "por_cartorio", "records" e
+                "extracted_data"
+            content_hash: Hash do conteúdo (ver file_hash)
+            filename: Nome do arquivo
+            periodo: Período de referência AAAA-MM (ver record)
+        
+        Returns:
+            int: Identificador do arquivo no histórico
+        """
+        extracted_data = processed["extracted_data"]
+        return self.record(
+            content_hash, filename, processed["totals"], processed["por_cartorio"],
+            rows=processed["records"],
+            quantidades={
+                "valor_pago": len(extracted_data["valor_pago"]),
+                "cartorio": len(extracted_data["cartorio"]),
+            },
+            periodo=periodo
+        )
+    
+    def get_file(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca um arquivo pelo hash do conteúdo.
+        
+        Returns:
+            Dict como em files(), mais "por_cartorio", ou None se ausente
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM arquivos WHERE hash = ?", (content_hash,)
+            ).fetchone()
+            if row is None:
+                return None
+            cartorios = self._conn.execute(
+                "SELECT cartorio, total_valor_pago, total_cartorio, quantidade"
+                " FROM cartorios WHERE arquivo_id = ? ORDER BY cartorio", (row["id"],)
+            ).fetchall()
+        result = _file_dict(row)
+        result["por_cartorio"] = [_money_dict(item) for item in cartorios]
+        return result
+    
+    def files(self, periodo: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Lista os arquivos registrados, do processamento mais recente ao mais antigo.
+        
+        Args:
+            periodo: Só os arquivos deste período (AAAA-MM)
+            limit: Quantidade máxima de arquivos
+        
+        Returns:
+            Lista de dicts:
+            {
+                "id": int,
+                "hash": str,
+                "arquivo": str,
+                "periodo": str,
+                "processado_em": str,  # ISO 8601
+                "versao_parser": str,
+                "total_valor_pago": float,
+                "total_cartorio": float,
+                "quantidade_valores_pago": int,
+                "quantidade_cartorio": int
+            }
+        """
+        query = "SELECT * FROM arquivos"
+        params: List[Any] = []
+        if periodo is not None:
+            query += " WHERE periodo = ?"
+            params.append(parse_period(periodo))
+        query += " ORDER BY processado_em DESC, id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [_file_dict(row) for row in rows]
+    
+    def cartorio_totals(
+        self, cartorio: Optional[str] = None, periodo: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Soma os subtotais por cartório e período de todos os arquivos.
+        
+        Args:
+            cartorio: Só este cartório (nome exato, como no relatório)
+            periodo: Só este período (AAAA-MM)
+        
+        Returns:
+            Lista de dicts, ordenada por período e cartório:
+            {
+                "periodo": str,
+                "cartorio": str,
+                "total_valor_pago": float,
+                "total_cartorio": float,
+                "quantidade": int,
+                "arquivos": int
+            }
+        """
+        conditions = []
+        params: List[Any] = []
+        if cartorio is not None:
+            conditions.append("cartorio = ?")
+            params.append(cartorio)
+        if periodo is not None:
+            conditions.append("periodo = ?")
+            params.append(parse_period(periodo))
+        query = (
+            "SELECT periodo, cartorio, SUM(total_valor_pago) AS total_valor_pago,"
+            " SUM(total_cartorio) AS total_cartorio, SUM(quantidade) AS quantidade,"
+            " COUNT(*) AS arquivos FROM cartorios"
+        )
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " GROUP BY periodo, cartorio ORDER BY periodo, cartorio"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [_money_dict(row) for row in rows]
+    
+    def cartorios(self) -> List[str]:
+        """Nomes de cartório já registrados, em ordem alfabética."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT cartorio FROM cartorios ORDER BY cartorio"
+            ).fetchall()
+        return [row["cartorio"] for row in rows]
+    
+    def find_guia(self, guia: str) -> List[Dict[str, Any]]:
+        """
+        Busca as linhas de uma guia em todos os arquivos registrados.
+        
+        Como em RecordStore.find_guia, os zeros à esquerda são opcionais.
+        
+        Args:
+            guia: Número da guia (ex: "0024102419" ou "24102419")
+        
+        Returns:
+            Lista de dicts com as colunas da linha (valores em reais) mais
+            "arquivo" e "periodo"
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT a.nome AS arquivo, a.periodo, l.pagina, l.linha, l.guia,"
+                " l.cartorio, l.valor_pago, l.valor_cartorio, l.origem"
+                " FROM linhas l JOIN arquivos a ON a.id = l.arquivo_id"
+                " WHERE l.guia_chave = ? ORDER BY a.periodo, a.nome, l.pagina, l.linha",
+                (_guia_search_key(guia.strip()),)
+            ).fetchall()
+        return [_money_dict(row, ("valor_pago", "valor_cartorio")) for row in rows]
+
+
+def _guia_search_key(guia: Optional[str]) -> Optional[str]:
+    """Valor da coluna guia_chave de uma guia (None se ausente)."""
+    return None if guia is None else str(guia_key(guia))
+
+
+def _money_dict(
+    row: sqlite3.Row, money: Iterable[str] = ("total_valor_pago", "total_cartorio")
+) -> Dict[str, Any]:
+    """Linha do banco como dict, com os centavos das colunas de valor em reais."""
+    result = dict(row)
+    for key in money:
+        if result[key] is not None:
+            result[key] = result[key] / 100
+    return result
+
+
+def _file_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    """Linha da tabela arquivos no formato de HistoryStore.files()."""
+    return {
+        ("arquivo" if key == "nome" else key): value
+        for key, value in _money_dict(row).items()
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Consulta o histórico e imprime o resultado em JSON.
+    
+    Args:
+        argv: Argumentos (padrão: sys.argv[1:])
+    
+    Returns:
+        int: Código de saída
+    """
+    parser = argparse.ArgumentParser(description="Consulta o histórico de relatórios.")
+    parser.add_argument("--db", default=DEFAULT_HISTORY_PATH, help="arquivo do histórico")
+    parser.add_argument("--periodo", type=parse_period, help="período de referência (AAAA-MM)")
+    parser.add_argument("--cartorio", help="nome do cartório")
+    parser.add_argument("--guia", help="linhas de uma guia em todos os arquivos")
+    args = parser.parse_args(argv)
+    
+    with HistoryStore(args.db) as store:
+        if args.guia:
+            result: Any = store.find_guia(args.guia)
+        else:
+            result = {
+                "arquivos": store.files(args.periodo),
+                "por_cartorio": store.cartorio_totals(args.cartorio, args.periodo),
+            }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,388 @@
+"""
+Reprocessamento incremental de relatórios reemitidos.
+Cada página é identificada pela impressão digital do seu conteúdo; numa
+nova versão do mesmo relatório só as páginas alteradas são extraídas e os
+totais são atualizados trocando apenas a contribuição dessas páginas.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from calculator import FinancialCalculator
+from metrics import Metrics
+from pdf_input import PdfSource
+from pdf_parser import PARSER_VERSION, PDFFinancialParser
+from result_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+
+
+# Diretório padrão, configurável por variável de ambiente
+DEFAULT_PAGE_STORE_DIR = os.environ.get(
+    "FIRC_PAGE_STORE_DIR",
+    str(Path(DEFAULT_CACHE_DIR) / "paginas")
+)
+
+
+# Resumos dos objetos já visitados, por documento aberto (ver _hash_object)
+_object_digests: "weakref.WeakKeyDictionary[Any, Dict[int, bytes]]" = weakref.WeakKeyDictionary()
+
+
+def page_fingerprint(page: Any, options: Any = None) -> str:
+    """
+    Calcula a impressão digital do conteúdo de uma página.
+    
+    Considera os fluxos de conteúdo (texto e desenhos), os recursos que
+    eles usam (Form XObjects com seus próprios recursos, imagens, fontes e
+    ToUnicode), o tamanho e a rotação da página, sem montar caracteres nem
+    tabelas. Objetos compartilhados entre páginas são lidos uma vez por
+    documento.
+    
+    Args:
+        page: Objeto página do pdfplumber
+        options: Opções do parser que alteram o resultado (serializáveis em JSON)
+    
+    Returns:
+        str: Hash SHA-256 (hex) do conteúdo, das opções e da versão do parser
+    """
+    page_obj = page.page_obj
+    digest = hashlib.sha256(PARSER_VERSION.encode() + b"\0")
+    digest.update(json.dumps([options, list(page_obj.mediabox), page_obj.rotate]).encode())
+    for stream in page_obj.contents:
+        # Referências indiretas são resolvidas pelo pdfminer ao ler o fluxo
+        stream = stream.resolve() if hasattr(stream, "resolve") else stream
+        digest.update(b"\0")
+        digest.update(stream.get_data())
+    
+    # Mesmo fluxo de conteúdo pode desenhar outro XObject ou usar outra fonte
+    memo = _object_digests.setdefault(page_obj.doc, {})
+    digest.update(b"\0recursos")
+    _hash_object(digest, page_obj.resources, memo, set())
+    return digest.hexdigest()
+
+
+def _hash_object(digest: Any, obj: Any, memo: Dict[int, bytes], visiting: Set[int]) -> None:
+    """
+    Acrescenta ao hash um objeto PDF e tudo o que ele referencia.
+    
+    Referências indiretas entram pelo conteúdo, não pelo número do objeto,
+    para que páginas iguais de documentos diferentes tenham o mesmo hash.
+    
+    Args:
+        digest: Hash em construção (hashlib)
+        obj: Objeto do pdfminer (referência, fluxo, dicionário, lista ou valor)
+        memo: Resumo de cada objeto indireto já visitado no documento
+        visiting: Objetos indiretos em visita, para interromper ciclos
+    """
+    objid = getattr(obj, "objid", None)
+    if objid is not None and hasattr(obj, "resolve"):
+        if objid not in memo:
+            if objid in visiting:
+                digest.update(b"C")
+                return
+            visiting.add(objid)
+            sub_digest = hashlib.sha256()
+            _hash_object(sub_digest, obj.resolve(), memo, visiting)
+            visiting.discard(objid)
+            memo[objid] = sub_digest.digest()
+        digest.update(b"R" + memo[objid])
+    elif hasattr(obj, "get_data"):
+        # Fluxo: dicionário (filtros, subtipo, recursos do Form...) e dados
+        digest.update(b"S")
+        _hash_object(digest, obj.attrs, memo, visiting)
+        digest.update(hashlib.sha256(obj.get_data()).digest())
+    elif isinstance(obj, dict):
+        digest.update(b"D%d" % len(obj))
+        for key in sorted(obj, key=str):
+            digest.update(str(key).encode("utf-8", "replace") + b"\0")
+            _hash_object(digest, obj[key], memo, visiting)
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b"L%d" % len(obj))
+        for item in obj:
+            _hash_object(digest, item, memo, visiting)
+    else:
+        # Nomes e palavras-chave do pdfminer (PSLiteral, PSKeyword) ou valores simples
+        value = getattr(obj, "name", obj)
+        digest.update(repr(value).encode("utf-8", "replace") + b"\0")
+
+
+class PageResultStore:
+    """
+    Resultados de extração por página, endereçados pela impressão digital.
+    
+    Guarda também o manifesto de cada documento (impressões das páginas e
+    acumuladores da última versão processada), usado para comparar uma
+    reemissão com a versão anterior.
+    
+    Os resultados por página têm o mesmo limite de tamanho do ResultCache
+    (FIRC_CACHE_MAX_MB): evict() descarta os usados há mais tempo. Uma
+    página descartada só faz a próxima versão extraí-la de novo.
+    """
+    
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Inicializa o repositório.
+        
+        Args:
+            directory: Diretório dos arquivos (padrão: DEFAULT_PAGE_STORE_DIR)
+            max_bytes: Tamanho máximo somado dos resultados por página
+        """
+        self.directory = Path(directory or DEFAULT_PAGE_STORE_DIR)
+        self.max_bytes = max_bytes
+    
+    def fingerprint(self, page: Any, parser: PDFFinancialParser) -> str:
+        """Impressão digital de uma página com as opções do parser que a extrai."""
+        return page_fingerprint(page, parser.output_options())
+    
+    def get(self, fingerprint: str, page_num: int) -> Optional[Dict[str, Any]]:
+        """
+        Busca o resultado de uma página já extraída.
+        
+        Args:
+            fingerprint: Impressão digital da página
+            page_num: Número da página no PDF atual (a página pode ter mudado
+                de posição entre versões)
+        
+        Returns:
+            Resultado da página (ver PDFFinancialParser.iter_pages), ou None
+        """
+        path = self._page_path(fingerprint)
+        page_result = _read_json(path)
+        if page_result is None:
+            return None
+        # Atualiza o horário de acesso usado pelo descarte
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        page_result["pagina"] = page_num
+        for row in page_result["linhas"]:
+            row["pagina"] = page_num
+        return page_result
+    
+    def put(self, fingerprint: str, page_result: Dict[str, Any]) -> None:
+        """Guarda o resultado de uma página extraída."""
+        _write_json(self._page_path(fingerprint), page_result)
+    
+    def size_bytes(self) -> int:
+        """
+        Calcula o tamanho total ocupado pelos resultados por página.
+        
+        Returns:
+            int: Soma dos tamanhos em bytes
+        """
+        return sum(size for _, size, _ in self._page_entries())
+    
+    def evict(self) -> None:
+        """Descarta os resultados por página menos usados até caber no limite."""
+        entries = self._page_entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+    
+    def load_manifest(self, document: str) -> Optional[Dict[str, Any]]:
+        """
+        Lê o manifesto da última versão processada de um documento.
+        
+        Args:
+            document: Identificação do relatório (ex: nome do arquivo)
+        
+        Returns:
+            Dict com "paginas" (impressões, em ordem) e "estado" (ver
+            FinancialCalculator.state), ou None na primeira versão
+        """
+        return _read_json(self._manifest_path(document))
+    
+    def save_manifest(self, document: str, manifest: Dict[str, Any]) -> None:
+        """Grava o manifesto da versão processada de um documento."""
+        _write_json(self._manifest_path(document), manifest)
+    
+    def _page_path(self, fingerprint: str) -> Path:
+        """Arquivo do resultado de uma página (subdiretórios pelo início do hash)."""
+        return self.directory / fingerprint[:2] / f"{fingerprint}.json"
+    
+    def _page_entries(self) -> List[Tuple[Path, int, float]]:
+        """Lista (caminho, tamanho, último acesso) de cada resultado por página."""
+        entries = []
+        for path in self.directory.glob("??/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+    
+    def _manifest_path(self, document: str) -> Path:
+        """Arquivo do manifesto de um documento."""
+        name = hashlib.sha256(document.encode("utf-8")).hexdigest()
+        return self.directory / "manifestos" / f"{name}.json"
+
+
+def process_revision(
+    pdf_path: PdfSource,
+    document: str,
+    store: Optional[PageResultStore] = None,
+    collect_metrics: bool = False,
+    **parser_options: Any
+) -> Dict[str, Any]:
+    """
+    Processa uma versão de um relatório reaproveitando as páginas inalteradas.
+    
+    As páginas com o mesmo conteúdo de uma extração anterior vêm do
+    repositório; só as demais passam pelo parser. Quando há uma versão
+    anterior do documento, os totais partem dos acumuladores dela e só as
+    páginas alteradas, incluídas ou removidas são trocadas na calculadora.
+    
+    Args:
+        pdf_path: Caminho do PDF ou o conteúdo em memória
+        document: Identificação do relatório entre versões (ex: nome do arquivo)
+        store: Repositório de páginas e manifestos (padrão: DEFAULT_PAGE_STORE_DIR)
+        collect_metrics: Se True, inclui tempos por etapa e por página
+        **parser_options: Opções repassadas ao PDFFinancialParser
+    
+    Returns:
+        Dict no formato de pipeline.process_pdf, mais "revisao":
+        {
+            "documento": str,
+            "versao_anterior": bool,
+            "paginas": int,
+            "paginas_alteradas": [...],  # mesmo número, conteúdo diferente
+            "paginas_incluidas": [...],
+            "paginas_removidas": [...],
+            "paginas_reaproveitadas": int,
+            "totais_anteriores": {...} ou None,
+            "diferenca": {"total_valor_pago": float, "total_cartorio": float} ou None,
+            "por_pagina": [...]  # valores antes/depois das páginas trocadas
+        }
+    """
+    store = store if store is not None else PageResultStore()
+    # Os contadores são sempre coletados: o relatório usa paginas_reaproveitadas
+    metrics = Metrics()
+    previous = store.load_manifest(document)
+    old_prints: List[str] = previous["paginas"] if previous else []
+    
+    parser = PDFFinancialParser(pdf_path, metrics=metrics, page_store=store, **parser_options)
+    prints: List[str] = []
+    changed_pages: List[int] = []
+    new_results: Dict[int, Dict[str, Any]] = {}
+    
+    def pages() -> Iterator[Dict[str, Any]]:
+        for page_result in parser.iter_pages():
+            page_num = page_result["pagina"]
+            prints.append(page_result["impressao"])
+            if page_num > len(old_prints) or old_prints[page_num - 1] != prints[-1]:
+                changed_pages.append(page_num)
+                if previous is not None:
+                    # Só as páginas trocadas ficam em memória, para a calculadora
+                    new_results[page_num] = page_result
+            yield page_result
+    
+    with metrics.stage("parser"):
+        records = parser.extract_records(pages())
+    
+    changed = [n for n in changed_pages if n <= len(old_prints)]
+    added = [n for n in changed_pages if n > len(old_prints)]
+    # Após erro de leitura as páginas seguintes não foram vistas, não removidas
+    removed = [] if parser.error else list(range(len(prints) + 1, len(old_prints) + 1))
+    old_results = {n: store.get(old_prints[n - 1], n) for n in changed + removed}
+    
+    calculator = FinancialCalculator(metrics=metrics)
+    incremental = (
+        previous is not None
+        and parser.error is None
+        and all(result is not None for result in old_results.values())
+    )
+    if incremental:
+        calculator.load_state(previous["estado"])
+        for old_result in old_results.values():
+            calculator.remove(old_result)
+        for page_result in new_results.values():
+            calculator.update(page_result)
+        totals = calculator.current_totals()
+    else:
+        totals = calculator.calculate_totals_from_records(records)
+    
+    if parser.error is None:
+        store.save_manifest(document, {
+            "paginas": prints, "estado": calculator.state(), "totals": totals
+        })
+    # Uma vez por documento, depois de ler as páginas antigas ainda necessárias
+    store.evict()
+    
+    previous_totals = previous["totals"] if previous else None
+    revision = {
+        "documento": document,
+        "versao_anterior": previous is not None,
+        "paginas": len(prints),
+        "paginas_alteradas": changed,
+        "paginas_incluidas": added,
+        "paginas_removidas": removed,
+        "paginas_reaproveitadas": metrics.counters.get("paginas_reaproveitadas", 0),
+        "totais_anteriores": previous_totals,
+        "diferenca": None,
+        "por_pagina": [
+            _page_change(n, old_results.get(n), new_results.get(n))
+            for n in sorted(changed + added + removed)
+        ] if previous else [],
+    }
+    if previous_totals is not None:
+        revision["diferenca"] = {
+            key: round(totals[key] - previous_totals[key], 2) for key in totals
+        }
+    
+    return {
+        "records": records,
+        "extracted_data": records.values,
+        "totals": totals,
+        "rows": records,
+        "por_cartorio": calculator.calculate_grouped(records),
+        "from_cache": False,
+        "error": parser.error,
+        "metricas": metrics.to_dict() if collect_metrics else None,
+        "revisao": revision,
+    }
+
+
+def _page_change(
+    page_num: int, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Valores de uma página antes e depois da revisão (None se ausente)."""
+    def totals(page_result: Optional[Dict[str, Any]]) -> Optional[Dict[str, float]]:
+        if page_result is None:
+            return None
+        return FinancialCalculator().calculate_totals(page_result)
+    
+    return {"pagina": page_num, "antes": totals(old), "depois": totals(new)}
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    """Lê um arquivo JSON; ausente ou corrompido conta como inexistente."""
+    try:
+        with open(path, "r", encoding="utf-8") as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    """Grava um arquivo JSON de forma atômica (arquivo temporário + rename)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fp:
+            json.dump(data, fp, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,412 @@
+"""
+Extração de PDFs em segundo plano, com progresso e cancelamento.
+Permite que o app continue respondendo enquanto um PDF grande (ou um lote
+de PDFs) é lido.
+"""
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from calculator import FinancialCalculator
+from checkpoint import CheckpointStore
+from pdf_input import PdfSource
+from pdf_parser import PDFFinancialParser
+from pipeline import consolidate_summaries, process_pdf, summarize_pdf
+from result_cache import ResultCache
+
+
+# Estados de uma extração
+RUNNING = "em_andamento"
+DONE = "concluido"
+CANCELLED = "cancelado"
+FAILED = "erro"
+
+
+class ExtractionJob:
+    """
+    Extração de um PDF em uma thread própria.
+    
+    O progresso (páginas lidas, tempo restante estimado e totais parciais)
+    pode ser consultado a qualquer momento com progress(). Ao terminar,
+    result traz o mesmo dicionário de pipeline.process_pdf; com erro de
+    leitura o estado é "erro" e result traz as páginas lidas até ali.
+    """
+    
+    def __init__(
+        self,
+        pdf_path: PdfSource,
+        filename: str,
+        cache: Optional[ResultCache] = None,
+        cache_key: Optional[str] = None,
+        collect_metrics: bool = False,
+        checkpoints: Optional[CheckpointStore] = None,
+        **parser_options: Any
+    ):
+        """
+        Prepara a extração (ela só começa com start()).
+        
+        Args:
+            pdf_path: Caminho do PDF ou o próprio conteúdo (bytes, buffer...)
+            filename: Nome do arquivo, para exibição
+            cache: Cache de resultados (None desativa)
+            cache_key: Chave do PDF no cache, obrigatória com cache
+            collect_metrics: Se True, o resultado traz "metricas"
+            checkpoints: Grava o progresso e retoma extrações interrompidas
+                do mesmo PDF (None desativa)
+            **parser_options: Opções repassadas ao PDFFinancialParser
+        """
+        self.pdf_path = pdf_path
+        self.filename = filename
+        self.cache = cache
+        self.cache_key = cache_key
+        self.collect_metrics = collect_metrics
+        self.checkpoints = checkpoints
+        self.parser_options = parser_options
+        
+        self.state = RUNNING
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.pages_done = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        
+        self._parser: Optional[PDFFinancialParser] = None
+        self._calculator = FinancialCalculator()
+        self._partial_totals = {"total_valor_pago": 0.0, "total_cartorio": 0.0}
+        self._cancel_requested = threading.Event()
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def start(self) -> "ExtractionJob":
+        """Inicia a extração em segundo plano e devolve o próprio job."""
+        self.started_at = time.monotonic()
+        self._thread.start()
+        return self
+    
+    def cancel(self) -> None:
+        """Pede o cancelamento; os processos de extração param na página seguinte."""
+        self._cancel_requested.set()
+        parser = self._parser
+        if parser is not None:
+            parser.cancel()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Aguarda o fim da extração.
+        
+        Args:
+            timeout: Tempo máximo de espera, em segundos (None espera sempre)
+        
+        Returns:
+            bool: True se a extração terminou
+        """
+        return self._finished.wait(timeout)
+    
+    @property
+    def done(self) -> bool:
+        """Indica se a extração terminou (com sucesso, cancelada ou com erro)."""
+        return self.state != RUNNING
+    
+    def progress(self) -> Dict[str, Any]:
+        """
+        Situação atual da extração.
+        
+        Returns:
+            Dict com o progresso:
+            {
+                "estado": "em_andamento", "concluido", "cancelado" ou "erro",
+                "paginas_processadas": int,
+                "total_paginas": int ou None,  # None até o PDF ser aberto
+                "decorrido_s": float,
+                "restante_s": float ou None,   # estimativa pelo ritmo atual
+                "totais_parciais": {"total_valor_pago": float, "total_cartorio": float}
+            }
+        """
+        with self._lock:
+            pages_done = self.pages_done
+            totals = dict(self._partial_totals)
+        
+        total_pages = self._parser.total_pages if self._parser is not None else None
+        end = self.finished_at or time.monotonic()
+        elapsed = end - self.started_at if self.started_at is not None else 0.0
+        
+        remaining = None
+        if self.state == RUNNING and total_pages and pages_done:
+            remaining = elapsed / pages_done * (total_pages - pages_done)
+        
+        return {
+            "estado": self.state,
+            "paginas_processadas": pages_done,
+            "total_paginas": total_pages,
+            "decorrido_s": round(elapsed, 1),
+            "restante_s": round(remaining, 1) if remaining is not None else None,
+            "totais_parciais": totals,
+        }
+    
+    def _run(self) -> None:
+        """Corpo da thread: process_pdf, acompanhando página a página."""
+        try:
+            result = process_pdf(
+                self.pdf_path, cache=self.cache, cache_key=self.cache_key,
+                collect_metrics=self.collect_metrics, checkpoints=self.checkpoints,
+                on_start=self._attach, on_page=self._page_done, **self.parser_options
+            )
+        except Exception as e:
+            self.error = str(e)
+            self._finish(FAILED, None)
+            return
+        
+        if self._parser is not None and self._parser.cancelled:
+            self._finish(CANCELLED, None)
+        elif result["error"] is not None:
+            # Como em process_pdf: as páginas lidas até o erro ficam em result
+            self.error = result["error"]
+            self._finish(FAILED, result)
+        else:
+            self._finish(DONE, result)
+    
+    def _attach(self, parser: PDFFinancialParser) -> None:
+        """Guarda o parser (progresso e cancelamento) antes da primeira página."""
+        self._parser = parser
+        if self._cancel_requested.is_set():
+            parser.cancel()
+    
+    def _page_done(self, page_result: Dict[str, Any]) -> None:
+        """Atualiza as páginas lidas e os totais parciais."""
+        totals = self._calculator.update(page_result)
+        with self._lock:
+            self.pages_done += 1
+            self._partial_totals = totals
+    
+    def _finish(self, state: str, result: Optional[Dict[str, Any]]) -> None:
+        """Registra o estado final e acorda quem espera em wait()."""
+        self.result = result
+        self.finished_at = time.monotonic()
+        self.state = state
+        self._finished.set()
+
+
+# Fila pela qual os processos do lote avisam que começaram um arquivo
+# (definida em cada processo por _init_worker)
+_started_queue: Optional[Any] = None
+
+
+def _init_worker(started_queue: Any) -> None:
+    """Inicializa um processo do pool do lote."""
+    global _started_queue
+    _started_queue = started_queue
+
+
+def _summarize_upload(
+    index: int,
+    data: bytes,
+    filename: str,
+    cache_dir: Optional[str],
+    collect_metrics: bool,
+    parser_options: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Processa um arquivo do lote em um processo do pool."""
+    if _started_queue is not None:
+        _started_queue.put(index)
+    cache = ResultCache(cache_dir) if cache_dir else None
+    return summarize_pdf(
+        data, filename, cache=cache, collect_metrics=collect_metrics, **parser_options
+    )
+
+
+class BatchJob:
+    """
+    Extração de vários PDFs ao mesmo tempo, em um pool de processos.
+    
+    Cada arquivo é processado de forma independente: um PDF corrompido
+    vira uma linha com status "erro" sem afetar os outros.
+    """
+    
+    def __init__(
+        self,
+        files: List[Tuple[str, bytes]],
+        workers: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        collect_metrics: bool = False,
+        **parser_options: Any
+    ):
+        """
+        Prepara o lote (ele só começa com start()).
+        
+        Args:
+            files: Pares (nome do arquivo, conteúdo do PDF)
+            workers: Arquivos processados ao mesmo tempo (None usa todos os núcleos)
+            cache_dir: Diretório do cache de resultados (None desativa)
+            collect_metrics: Se True, cada linha traz "diagnostico"
+            **parser_options: Opções repassadas a process_pdf (checkpoints
+                e opções do PDFFinancialParser)
+        """
+        self.files = files
+        self.workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+        self.cache_dir = cache_dir
+        self.collect_metrics = collect_metrics
+        self.parser_options = parser_options
+        
+        self.lines: List[Optional[Dict[str, Any]]] = [None] * len(files)
+        self.cancelled = False
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        
+        self._futures: List[Future] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._started_queue: Optional[Any] = None
+        self._started: Set[int] = set()
+        self._remaining = len(files)
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+    
+    def start(self) -> "BatchJob":
+        """Envia todos os arquivos ao pool e devolve o próprio lote."""
+        self.started_at = time.monotonic()
+        if not self.files:
+            self.finished_at = self.started_at
+            self._finished.set()
+            return self
+        
+        # O executor marca como "running" também o próximo arquivo da fila;
+        # o início real vem dos próprios processos
+        self._started_queue = multiprocessing.Queue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker,
+            initargs=(self._started_queue,)
+        )
+        for index, (filename, data) in enumerate(self.files):
+            future = self._executor.submit(
+                _summarize_upload, index, data, filename, self.cache_dir,
+                self.collect_metrics, self.parser_options
+            )
+            future.add_done_callback(lambda f, index=index: self._file_done(index, f))
+            self._futures.append(future)
+        return self
+    
+    def cancel(self) -> None:
+        """Descarta os arquivos que ainda não começaram; os em andamento terminam."""
+        self.cancelled = True
+        for future in self._futures:
+            future.cancel()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Aguarda o fim do lote.
+        
+        Args:
+            timeout: Tempo máximo de espera, em segundos (None espera sempre)
+        
+        Returns:
+            bool: True se todos os arquivos terminaram
+        """
+        return self._finished.wait(timeout)
+    
+    @property
+    def state(self) -> str:
+        """Estado do lote: em andamento, concluído ou cancelado."""
+        if self._remaining:
+            return RUNNING
+        return CANCELLED if self.cancelled else DONE
+    
+    @property
+    def done(self) -> bool:
+        """Indica se todos os arquivos terminaram."""
+        return self.state != RUNNING
+    
+    def progress(self) -> Dict[str, Any]:
+        """
+        Situação atual do lote.
+        
+        Returns:
+            Dict com o progresso:
+            {
+                "estado": "em_andamento", "concluido" ou "cancelado",
+                "arquivos": [...],       # uma linha por arquivo, com "status"
+                                         # "aguardando", "processando",
+                                         # "cancelado", "ok" ou "erro"
+                "concluidos": int,
+                "total_arquivos": int,
+                "decorrido_s": float,
+                "total_geral": {...}     # dos arquivos já concluídos
+            }
+        """
+        with self._lock:
+            lines = list(self.lines)
+        started = self._collect_started()
+        
+        arquivos = []
+        for index, ((filename, _), future, line) in enumerate(
+            zip(self.files, self._futures, lines)
+        ):
+            if line is not None:
+                arquivos.append(line)
+            elif future.cancelled():
+                arquivos.append({"arquivo": filename, "status": "cancelado"})
+            else:
+                status = "processando" if index in started else "aguardando"
+                arquivos.append({"arquivo": filename, "status": status})
+        
+        finished = [line for line in lines if line is not None]
+        end = self.finished_at or time.monotonic()
+        elapsed = end - self.started_at if self.started_at is not None else 0.0
+        
+        return {
+            "estado": self.state,
+            "arquivos": arquivos,
+            "concluidos": len(finished),
+            "total_arquivos": len(self.files),
+            "decorrido_s": round(elapsed, 1),
+            "total_geral": consolidate_summaries(finished),
+        }
+    
+    def summary(self) -> Dict[str, Any]:
+        """
+        Resultado consolidado do lote, para exportação.
+        
+        Returns:
+            Dict no mesmo formato do total da linha de comando:
+            {"arquivos": [...], "total_geral": {...}, "falhas": int}
+        """
+        lines = [line for line in self.lines if line is not None]
+        return {
+            "arquivos": lines,
+            "total_geral": consolidate_summaries(lines),
+            "falhas": sum(1 for line in lines if line["status"] != "ok"),
+        }
+    
+    def _collect_started(self) -> Set[int]:
+        """Lê os avisos de início enviados pelos processos até agora."""
+        with self._lock:
+            while self._started_queue is not None:
+                try:
+                    self._started.add(self._started_queue.get_nowait())
+                except (queue.Empty, OSError, ValueError):
+                    break
+            return set(self._started)
+    
+    def _file_done(self, index: int, future: Future) -> None:
+        """Registra o resultado de um arquivo e encerra o pool no último."""
+        if not future.cancelled():
+            try:
+                line = future.result()
+            except Exception as e:
+                # Processo de trabalho abortado (ex: falta de memória)
+                filename = self.files[index][0]
+                line = {"arquivo": filename, "status": "erro", "erro": str(e),
+                        "cache": False, "tempo_s": None}
+            with self._lock:
+                self.lines[index] = line
+        
+        with self._lock:
+            self._remaining -= 1
+            last = self._remaining == 0
+        if last:
+            self.finished_at = time.monotonic()
+            self._executor.shutdown(wait=False)
+            self._finished.set()
@@ -0,0 +1,182 @@
+"""
+Modelos de layout reaproveitáveis para relatórios com o mesmo formato.
+Aprende as divisões de colunas da tabela uma vez e as reaplica nas páginas
+seguintes como linhas verticais explícitas do pdfplumber.
+"""
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from file_lock import FileLock
+from metrics import Metrics, NULL_METRICS
+
+
+# Versão do formato do arquivo de modelos
+TEMPLATE_FORMAT_VERSION = 1
+
+
+def layout_fingerprint(page: Any) -> Optional[str]:
+    """
+    Calcula uma assinatura barata da estrutura de uma página.
+    
+    Usa o tamanho da página e as posições horizontais (arredondadas) das
+    bordas verticais desenhadas, que se repetem em todas as páginas de um
+    mesmo formato de relatório, independentemente da quantidade de linhas.
+    
+    Args:
+        page: Objeto página do pdfplumber
+    
+    Returns:
+        str com a assinatura, ou None se a página não tem bordas verticais
+        (e portanto nenhuma tabela para a estratégia "lines")
+    """
+    xs = sorted({round(edge["x0"]) for edge in page.vertical_edges})
+    if not xs:
+        return None
+    return f"{round(page.width)}x{round(page.height)}:" + ",".join(map(str, xs))
+
+
+class LayoutTemplate:
+    """Divisões de colunas aprendidas para uma assinatura de página."""
+    
+    def __init__(self, fingerprint: str, vertical_lines: List[float]):
+        """
+        Inicializa o modelo.
+        
+        Args:
+            fingerprint: Assinatura da página (ver layout_fingerprint)
+            vertical_lines: Posições x das divisões de colunas
+        """
+        self.fingerprint = fingerprint
+        self.vertical_lines = vertical_lines
+    
+    @classmethod
+    def from_tables(cls, fingerprint: str, tables: List[Any]) -> "LayoutTemplate":
+        """
+        Aprende as divisões de colunas a partir das tabelas detectadas.
+        
+        Args:
+            fingerprint: Assinatura da página
+            tables: Tabelas devolvidas por page.find_tables()
+        
+        Returns:
+            LayoutTemplate com as bordas esquerda e direita de todas as células
+        """
+        xs = set()
+        for table in tables:
+            for x0, _, x1, _ in table.cells:
+                xs.add(round(x0, 2))
+                xs.add(round(x1, 2))
+        return cls(fingerprint, sorted(xs))
+    
+    def table_settings(self) -> Dict[str, Any]:
+        """Configuração do pdfplumber que reaproveita as colunas aprendidas."""
+        return {
+            "vertical_strategy": "explicit",
+            "explicit_vertical_lines": self.vertical_lines,
+            "horizontal_strategy": "lines",
+        }
+
+
+class LayoutTemplateStore:
+    """
+    Modelos de layout indexados pela assinatura da página.
+    
+    Os modelos ficam em memória durante o processamento e podem ser
+    gravados em um arquivo JSON para serem reaproveitados por outros
+    relatórios do mesmo formato.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Inicializa o repositório, carregando o arquivo se ele existir.
+        
+        Args:
+            path: Arquivo JSON dos modelos (None mantém só em memória)
+        """
+        self.path = Path(path) if path else None
+        self.templates: Dict[str, LayoutTemplate] = {}
+        if self.path is not None:
+            self.load()
+    
+    def find_tables(self, page: Any, metrics: Metrics = NULL_METRICS) -> List[Any]:
+        """
+        Detecta as tabelas da página usando o modelo correspondente.
+        
+        Páginas cuja assinatura não tem modelo passam pela detecção
+        completa (contada em "layout_fallbacks") e ensinam um novo modelo.
+        
+        Args:
+            page: Objeto página do pdfplumber
+            metrics: Coletor de tempos e contadores
+        
+        Returns:
+            Lista de tabelas, como page.find_tables()
+        """
+        fingerprint = layout_fingerprint(page)
+        if fingerprint is None:
+            return []
+        
+        template = self.templates.get(fingerprint)
+        if template is not None:
+            metrics.count("layout_template_hits")
+            return page.find_tables(template.table_settings())
+        
+        metrics.count("layout_fallbacks")
+        tables = page.find_tables()
+        if tables:
+            self.templates[fingerprint] = LayoutTemplate.from_tables(fingerprint, tables)
+        return tables
+    
+    def load(self) -> None:
+        """Carrega os modelos do arquivo, ignorando arquivos ausentes ou inválidos."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            return
+        
+        if data.get("versao") != TEMPLATE_FORMAT_VERSION:
+            return
+        for fingerprint, vertical_lines in data.get("modelos", {}).items():
+            self.templates[fingerprint] = LayoutTemplate(fingerprint, vertical_lines)
+    
+    def save(self) -> None:
+        """
+        Grava os modelos no arquivo de forma atômica.
+        
+        Vários processos podem gravar o mesmo arquivo (ex: a linha de
+        comando com --jobs): sob uma trava do arquivo, os modelos já
+        gravados por outros processos são relidos e mantidos junto com os
+        aprendidos aqui, em vez de o último a gravar descartar os demais.
+        """
+        if self.path is None:
+            return
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with FileLock(f"{self.path}.lock"):
+            learned = self.templates
+            self.templates = {}
+            self.load()
+            self.templates.update(learned)
+            self._write()
+    
+    def _write(self) -> None:
+        """Grava o arquivo (arquivo temporário + rename); chamado sob a trava."""
+        data = {
+            "versao": TEMPLATE_FORMAT_VERSION,
+            "modelos": {
+                fingerprint: template.vertical_lines
+                for fingerprint, template in self.templates.items()
+            },
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fp:
+                json.dump(data, fp, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
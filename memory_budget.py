@@ -0,0 +1,97 @@
+"""
+Limite de memória (RSS) para o processamento de PDFs grandes.
+
+Com um limite definido, o parser confere o RSS do processo depois de cada
+página e interrompe a extração com MemoryBudgetError antes que o container
+seja encerrado por falta de memória. As páginas lidas até ali continuam no
+resultado (e nos checkpoints, quando ativados).
+"""
+import gc
+import os
+import sys
+from typing import Optional
+
+
+def _env_budget() -> Optional[float]:
+    """Limite padrão lido de FIRC_MEMORY_BUDGET_MB (vazio ou 0 desativa)."""
+    value = os.environ.get("FIRC_MEMORY_BUDGET_MB", "")
+    return float(value) if value and float(value) > 0 else None
+
+
+# Limite padrão, configurável por variável de ambiente (None: sem limite)
+DEFAULT_MEMORY_BUDGET_MB = _env_budget()
+
+
+class MemoryBudgetError(Exception):
+    """O RSS do processo passou do limite configurado durante a extração."""
+    
+    def __init__(self, page_num: int, rss_mb: float, budget_mb: float):
+        super().__init__(
+            f"limite de memória excedido na página {page_num}: "
+            f"{rss_mb:.0f} MB em uso, limite de {budget_mb:.0f} MB"
+        )
+        self.page_num = page_num
+        self.rss_mb = rss_mb
+        self.budget_mb = budget_mb
+
+
+def current_rss_mb() -> Optional[float]:
+    """
+    Memória residente (RSS) atual do processo, em MB.
+    
+    Usa /proc/self/statm (Linux). Sem ele, recorre ao pico de RSS do
+    resource, que nunca é menor que o valor atual.
+    
+    Returns:
+        float em MB, ou None se a plataforma não informa o RSS
+    """
+    try:
+        with open("/proc/self/statm", "rb") as fp:
+            resident_pages = int(fp.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em bytes no macOS e em KB nos demais sistemas
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class MemoryBudget:
+    """Confere o RSS do processo contra um limite fixo."""
+    
+    def __init__(self, limit_mb: float):
+        """
+        Inicializa o limite.
+        
+        Args:
+            limit_mb: RSS máximo do processo, em MB
+        """
+        self.limit_mb = limit_mb
+        self.peak_mb = 0.0
+    
+    def check(self, page_num: int) -> None:
+        """
+        Confere o RSS depois de uma página.
+        
+        Acima do limite, força uma coleta de lixo e mede de novo antes de
+        desistir, para não interromper por objetos que já podiam ser liberados.
+        
+        Args:
+            page_num: Página recém-extraída (usada na mensagem de erro)
+        
+        Raises:
+            MemoryBudgetError: Se o RSS continua acima do limite
+        """
+        rss = current_rss_mb()
+        if rss is None:
+            return
+        if rss > self.limit_mb:
+            gc.collect()
+            rss = current_rss_mb()
+        self.peak_mb = max(self.peak_mb, rss)
+        if rss > self.limit_mb:
+            raise MemoryBudgetError(page_num, rss, self.limit_mb)
@@ -0,0 +1,163 @@
+"""
+Instrumentação leve de tempos e contadores do processamento.
+Mede o tempo de cada etapa (abertura do PDF, tabelas, texto, regex, soma)
+e de cada página, além de contadores como páginas e linhas encontradas.
+"""
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Quantidade de páginas mais lentas listadas no resumo
+SLOWEST_PAGES = 10
+
+# Contexto reaproveitado quando a coleta está desligada
+_NULL_STAGE = nullcontext()
+
+
+class _Stage:
+    """Cronômetro de uma etapa, usado como gerenciador de contexto."""
+    
+    __slots__ = ("metrics", "name", "start")
+    
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+    
+    def __enter__(self) -> "_Stage":
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.metrics.add_time(self.name, time.perf_counter() - self.start)
+
+
+class Metrics:
+    """
+    Coletor de tempos por etapa, tempos por página e contadores.
+    
+    Desligado (enabled=False), todas as chamadas retornam imediatamente,
+    então o código instrumentado pode chamá-las sem condicionais.
+    
+    Examples:
+        >>> metrics = Metrics()
+        >>> with metrics.stage("extract_text"):
+        ...     pass
+        >>> metrics.count("paginas")
+        >>> metrics.to_dict()["contadores"]
+        {'paginas': 1}
+    """
+    
+    def __init__(self, enabled: bool = True):
+        """
+        Inicializa o coletor.
+        
+        Args:
+            enabled: Se False, nada é medido nem guardado
+        """
+        self.enabled = enabled
+        # etapa -> [segundos somados, chamadas]
+        self.stages: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.pages: List[Tuple[int, float]] = []
+    
+    def stage(self, name: str):
+        """
+        Mede o tempo de um bloco de código.
+        
+        Args:
+            name: Nome da etapa (ex: "extract_tables")
+        
+        Returns:
+            Gerenciador de contexto que soma o tempo do bloco à etapa
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+    
+    def add_time(self, name: str, seconds: float, calls: int = 1) -> None:
+        """Soma um tempo já medido a uma etapa."""
+        if not self.enabled:
+            return
+        entry = self.stages.get(name)
+        if entry is None:
+            self.stages[name] = [seconds, calls]
+        else:
+            entry[0] += seconds
+            entry[1] += calls
+    
+    def count(self, name: str, amount: int = 1) -> None:
+        """Incrementa um contador."""
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def record_page(self, page_num: int, seconds: float) -> None:
+        """Registra o tempo total de uma página."""
+        if not self.enabled:
+            return
+        self.pages.append((page_num, seconds))
+    
+    def merge(self, other: Optional[Dict[str, Any]]) -> None:
+        """
+        Incorpora medições vindas de outro coletor (ex: de um processo).
+        
+        Args:
+            other: Resultado de Metrics.snapshot() de outro coletor
+        """
+        if not self.enabled or not other:
+            return
+        for name, (seconds, calls) in other["stages"].items():
+            self.add_time(name, seconds, calls)
+        for name, amount in other["counters"].items():
+            self.count(name, amount)
+        self.pages.extend((page, seconds) for page, seconds in other["pages"])
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado bruto e serializável, para ser combinado com merge()."""
+        return {
+            "stages": {name: list(entry) for name, entry in self.stages.items()},
+            "counters": dict(self.counters),
+            "pages": list(self.pages),
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Resume as medições para exibição e exportação em JSON.
+        
+        Returns:
+            Dict no formato:
+            {
+                "etapas": {nome: {"tempo_s": float, "chamadas": int}},
+                "contadores": {nome: int},
+                "paginas": {"quantidade": int, "tempo_medio_s": float,
+                            "mais_lentas": [{"pagina": int, "tempo_s": float}]}
+            }
+        """
+        page_times = [seconds for _, seconds in self.pages]
+        slowest = sorted(self.pages, key=lambda item: item[1], reverse=True)[:SLOWEST_PAGES]
+        
+        return {
+            "etapas": {
+                name: {"tempo_s": round(seconds, 4), "chamadas": calls}
+                for name, (seconds, calls) in sorted(
+                    self.stages.items(), key=lambda item: item[1][0], reverse=True
+                )
+            },
+            "contadores": dict(sorted(self.counters.items())),
+            "paginas": {
+                "quantidade": len(page_times),
+                "tempo_medio_s": (
+                    round(sum(page_times) / len(page_times), 4) if page_times else 0.0
+                ),
+                "mais_lentas": [
+                    {"pagina": page, "tempo_s": round(seconds, 4)}
+                    for page, seconds in slowest
+                ],
+            },
+        }
+
+
+# Coletor desligado compartilhado, usado quando nenhum é informado
+NULL_METRICS = Metrics(enabled=False)
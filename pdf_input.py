@@ -0,0 +1,159 @@
+"""
+Abertura de PDFs a partir de caminhos, bytes, buffers e arquivos abertos.
+Evita cópias e arquivos temporários: buffers em memória são lidos no lugar
+e arquivos em disco são mapeados em memória (mmap).
+"""
+import io
+import mmap
+import os
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Iterator, Optional, Sequence, Union
+
+
+# Tipos aceitos como origem de um PDF
+PdfSource = Union[str, "os.PathLike[str]", bytes, bytearray, memoryview, mmap.mmap, BinaryIO]
+
+
+class BufferReader(io.RawIOBase):
+    """
+    Arquivo somente leitura sobre um buffer em memória, sem copiá-lo.
+    
+    Cada read() copia apenas o trecho pedido (o pdfminer lê em blocos
+    pequenos), nunca o PDF inteiro como io.BytesIO(bytearray) faria.
+    """
+    
+    def __init__(self, buffer: Any):
+        """
+        Inicializa o leitor.
+        
+        Args:
+            buffer: Qualquer objeto com protocolo de buffer (bytes,
+                bytearray, memoryview, mmap)
+        """
+        super().__init__()
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError(f"posição negativa: {offset}")
+        self._pos = offset
+        return offset
+    
+    def read(self, size: Optional[int] = -1) -> bytes:
+        start = min(self._pos, len(self._view))
+        end = len(self._view) if size is None or size < 0 else min(start + size, len(self._view))
+        self._pos = end
+        return self._view[start:end].tobytes()
+    
+    def readinto(self, target: Any) -> int:
+        data = self.read(len(target))
+        target[:len(data)] = data
+        return len(data)
+    
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def is_path(source: Any) -> bool:
+    """Indica se a origem é um caminho de arquivo."""
+    return isinstance(source, (str, os.PathLike))
+
+
+def as_buffer(source: Any) -> Any:
+    """
+    Obtém o conteúdo de uma origem em memória sem copiá-lo, quando possível.
+    
+    Args:
+        source: bytes, bytearray, memoryview, mmap ou arquivo aberto
+    
+    Returns:
+        Objeto com protocolo de buffer. Arquivos com getbuffer() (BytesIO,
+        uploads do Streamlit) são expostos sem cópia; outros são lidos.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        return source
+    if hasattr(source, "getbuffer"):
+        return source.getbuffer()
+    source.seek(0)
+    return source.read()
+
+
+@contextmanager
+def open_pdf(source: PdfSource, pages: Optional[Sequence[int]] = None) -> Iterator[Any]:
+    """
+    Abre um PDF com o pdfplumber a partir de qualquer origem aceita.
+    
+    Caminhos são mapeados em memória (com leitura comum como alternativa
+    quando o mmap não é possível, ex: arquivo vazio). Buffers são lidos no
+    lugar, e arquivos abertos são usados como estão.
+    
+    Args:
+        source: Caminho, bytes, bytearray, memoryview, mmap ou arquivo aberto
+        pages: Números das páginas a carregar (a partir de 1); None carrega todas
+    
+    Yields:
+        Objeto PDF do pdfplumber, fechado ao sair do bloco
+    """
+    # Importado só ao abrir um PDF, para não pesar no início do app e da CLI
+    import pdfplumber
+    
+    if is_path(source):
+        with open(source, "rb") as fp:
+            try:
+                stream = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                stream = None
+            try:
+                with pdfplumber.open(stream if stream is not None else fp, pages=pages) as pdf:
+                    yield pdf
+            finally:
+                if stream is not None:
+                    stream.close()
+    elif isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        with BufferReader(source) as stream, pdfplumber.open(stream, pages=pages) as pdf:
+            yield pdf
+    else:
+        source.seek(0)
+        with pdfplumber.open(source, pages=pages) as pdf:
+            yield pdf
+
+
+def release_page(page: Any) -> None:
+    """
+    Libera o que o pdfplumber e o pdfminer guardam de uma página já lida.
+    
+    Além dos objetos de layout (page.close()), descarta o mapa de texto
+    guardado por page.get_textmap (com todos os caracteres da página; o
+    close() do pdfplumber não o limpa) e os fluxos de conteúdo
+    decodificados, presos ao PDFPage e ao cache de objetos do documento
+    até o PDF ser fechado. A página não pode ser lida de novo depois disso.
+    
+    Args:
+        page: Página do pdfplumber (a original, não um recorte)
+    """
+    page.close()
+    page.get_textmap.cache_clear()
+    page_obj = page.page_obj
+    cached_objs = getattr(page.pdf.doc, "_cached_objs", None)
+    if cached_objs is not None:
+        for stream in page_obj.contents or []:
+            objid = getattr(stream, "objid", None)
+            if objid is not None:
+                cached_objs.pop(objid, None)
+    page_obj.contents = []
@@ -2,52 +2,563 @@
 Módulo para extração de dados de PDFs financeiros.
 Identifica e extrai valores da coluna Cartório (8ª coluna) e campo Valor Pago.
 """
-import pdfplumber
-from typing import List, Dict, Any, Optional
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple
+import multiprocessing
+import os
 import re
+import sys
+import time
+
+from layout_template import LayoutTemplateStore
+from memory_budget import MemoryBudget
+from metrics import Metrics, NULL_METRICS
+from pdf_input import PdfSource, as_buffer, is_path, open_pdf, release_page
+from record_store import RecordStore
+
+if TYPE_CHECKING:
+    # incremental importa este módulo; a referência é só para anotações
+    from incremental import PageResultStore
+
+# Motores de extração por página:
+# - "default": extract_tables() + extract_text(), como o pdfplumber faz
+# - "single_pass": agrupa caracteres em palavras uma única vez e alimenta
+#   tanto a leitura da tabela quanto a varredura de linhas com R$
+# - "fast": lê o texto direto do fluxo de conteúdo, sem objetos de layout;
+#   páginas com grade de tabela caem no motor "default"
+ENGINES = ("default", "single_pass", "fast")
+
+# Mesma tolerância vertical usada pelo pdfplumber para montar linhas de texto
+LINE_Y_TOLERANCE = 3
+
+# Padrões compilados uma única vez, no carregamento do módulo
+_VALOR_PAGO_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r'Valor\s+Pago[:\s]+([R$\s]*[\d.,]+)',
+        r'VALOR\s+PAGO[:\s]+([R$\s]*[\d.,]+)',
+        r'Valor Pago[:\s]+([R$\s]*[\d.,]+)',
+    )
+)
+_RS_VALUE = re.compile(r'R\$\s*([\d.,]+)')
+_MONETARY = re.compile(r'^[\d.,]+$')
+_GUIA_PREFIX = re.compile(r'\s*(\d+)\s+(.*)')
+# Pré-classificação: rótulo "Valor Pago" seguido de valor, em qualquer caixa
+_VALOR_PAGO_LABEL = re.compile(r'Valor\s+Pago[:\s]+[R$\s]*[\d.,]', re.IGNORECASE)
+
+
+# Versão do formato de saída do parser; entra na chave do cache de resultados
+PARSER_VERSION = "1.5.0"
+
+# Abaixo deste número de páginas o custo de subir processos supera o ganho
+DEFAULT_MIN_PAGES_PARALLEL = 40
+
+# Quantidade de blocos de páginas por processo (equilibra páginas lentas)
+CHUNKS_PER_WORKER = 4
+
+# Recorte por faixa de colunas: o parser só lê da 1ª à 8ª coluna (Guia até
+# Cartório), então o que fica à direita da 8ª pode ser descartado
+BAND_COLUMNS = 8
+# Páginas iniciais consultadas para achar o cabeçalho da tabela (capa etc.)
+BAND_PROBE_PAGES = 3
+# Folga em pontos para manter as linhas verticais das bordas da faixa
+BAND_MARGIN = 2
+# Folga em pontos antes do título de uma coluna ao separar colunas no texto
+COLUMN_TOLERANCE = 1
+
+
+def output_options(parser_options: Dict[str, Any]) -> List[Any]:
+    """
+    Seleciona as opções do parser que alteram o resultado da extração.
+    
+    Entram nas chaves do cache de resultados, dos checkpoints e do
+    repositório de páginas, para que resultados de configurações diferentes
+    (ex: outro motor) não sejam servidos uns pelos outros.
+    
+    Args:
+        parser_options: Opções do PDFFinancialParser; as que não alteram o
+            resultado (workers, low_memory...) são ignoradas
+    
+    Returns:
+        Lista serializável em JSON: motor, recorte de colunas, faixa de
+        colunas e uso de modelos de layout
+    """
+    column_band = parser_options.get("column_band")
+    return [
+        parser_options.get("engine", "default"),
+        bool(parser_options.get("crop_columns", False)),
+        list(column_band) if column_band is not None else None,
+        parser_options.get("templates") is not None,
+    ]
+
+
+class ExtractionTimeout(Exception):
+    """O prazo da extração (deadline) passou antes de uma página começar."""
+    
+    def __init__(self, page_num: int):
+        super().__init__(f"prazo da extração esgotado antes da página {page_num}")
+        self.page_num = page_num
 
 
 class PDFFinancialParser:
     """Parser especializado para documentos PDF financeiros (Guias Geradas)."""
     
-    def __init__(self, pdf_path: str):
+    def __init__(
+        self,
+        pdf_path: PdfSource,
+        workers: Optional[int] = 1,
+        min_pages_parallel: int = DEFAULT_MIN_PAGES_PARALLEL,
+        engine: str = "default",
+        metrics: Optional[Metrics] = None,
+        crop_columns: bool = False,
+        column_band: Optional[Tuple[float, float]] = None,
+        templates: Optional[LayoutTemplateStore] = None,
+        first_page: int = 1,
+        page_store: Optional["PageResultStore"] = None,
+        prefilter: bool = False,
+        low_memory: bool = False,
+        memory_budget_mb: Optional[float] = None,
+        deadline: Optional[float] = None
+    ):
         """
         Inicializa o parser com o caminho do PDF.
         
         Args:
-            pdf_path: Caminho completo para o arquivo PDF
+            pdf_path: Caminho do arquivo PDF ou o próprio conteúdo (bytes,
+                bytearray, memoryview, mmap ou arquivo aberto), lido sem
+                cópia nem arquivo temporário
+            workers: Número de processos para extração paralela.
+                1 mantém o processamento serial; None usa todos os núcleos.
+            min_pages_parallel: PDFs com menos páginas que isso são
+                processados serialmente mesmo com workers > 1
+            engine: Motor de extração por página ("default", "single_pass"
+                ou "fast"; ver ENGINES)
+            metrics: Coletor de tempos e contadores (None desativa a coleta)
+            crop_columns: Se True, detecta a faixa horizontal das colunas
+                usadas (Guia até Cartório) e recorta as páginas a ela
+            column_band: Faixa (x0, x1) já conhecida; dispensa a detecção
+            templates: Modelos de layout reaproveitados na detecção de
+                tabelas (None usa a detecção padrão em todas as páginas)
+            first_page: Primeira página a extrair (a partir de 1); as
+                anteriores são puladas, ex: ao retomar de um checkpoint
+            page_store: Resultados por página já extraídos, pela impressão
+                digital do conteúdo; páginas iguais às de uma versão
+                anterior do PDF não são extraídas de novo (None desativa)
+            prefilter: Se True, páginas sem sinal de valores (capa, páginas
+                só de cabeçalho etc.) são reconhecidas por uma leitura
+                barata do texto e não passam pela extração completa. Vale
+                em relatórios com muitas páginas sem dados; em fontes
+                codificadas (hex/CID) a leitura é feita em todas as páginas
+            low_memory: Se True, os fluxos de conteúdo decodificados de cada
+                página são descartados depois da extração (ver
+                pdf_input.release_page), e a memória fica estável mesmo em
+                PDFs com milhares de páginas
+            memory_budget_mb: RSS máximo do processo, em MB; acima dele a
+                extração para com MemoryBudgetError (None desativa). No modo
+                paralelo o limite vale para cada processo de trabalho
+            deadline: Prazo da extração (instante de time.time()); uma
+                página só começa antes dele, depois a extração para com
+                ExtractionTimeout (None desativa). Vale também nos processos
+                da extração paralela
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Motor de extração desconhecido: {engine}")
+        
         self.pdf_path = pdf_path
+        self.engine = engine
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.min_pages_parallel = min_pages_parallel
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.crop_columns = crop_columns
+        self.column_band = column_band
+        self.templates = templates
+        self.first_page = first_page
+        self.page_store = page_store
+        self.prefilter = prefilter
+        self.low_memory = low_memory
+        self.memory_budget_mb = memory_budget_mb
+        self.deadline = deadline
+        self._memory_budget = (
+            MemoryBudget(memory_budget_mb) if memory_budget_mb is not None else None
+        )
         self.cartorio_values: List[str] = []
         self.valor_pago_values: List[str] = []
+        self.rows: List[Dict[str, Any]] = []
+        # (página, guia) -> posições em self.rows, para juntar a mesma linha
+        # lida pela tabela e pelo texto; só vale para a página atual
+        self._row_index: Dict[Tuple[int, str], List[int]] = {}
+        self._merged_rows: Set[int] = set()
+        self.records: Optional[RecordStore] = None
+        self.error: Optional[str] = None
+        self.total_pages: Optional[int] = None
+        self.cancelled = False
+        self._current_page = 0
+        self._stop_event: Any = None
+    
+    def output_options(self) -> List[Any]:
+        """Opções deste parser que alteram o resultado (ver output_options)."""
+        return output_options({
+            "engine": self.engine,
+            "crop_columns": self.crop_columns,
+            "column_band": self.column_band,
+            "templates": self.templates,
+        })
     
-    def extract_data(self) -> Dict[str, List[str]]:
+    def extract_data(
+        self, pages: Optional[Iterable[Dict[str, Any]]] = None
+    ) -> Dict[str, List[str]]:
         """
         Extrai dados de todas as páginas do PDF.
         
+        Args:
+            pages: Resultados por página a usar no lugar de iter_pages()
+                (ex: CheckpointStore.resume, que retoma execuções anteriores)
+        
         Returns:
             Dict com listas de valores extraídos:
             {
                 "cartorio": [...],
                 "valor_pago": [...]
             }
+            Se cancel() for chamado durante a extração, traz apenas as
+            páginas lidas até ali (e self.cancelled fica True).
         """
-        self.cartorio_values = []
-        self.valor_pago_values = []
+        cartorio_values: List[str] = []
+        valor_pago_values: List[str] = []
+        rows: List[Dict[str, Any]] = []
+        self.error = None
         
         try:
-            with pdfplumber.open(self.pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, start=1):
-                    self._extract_from_page(page, page_num)
+            for page_result in (self.iter_pages() if pages is None else pages):
+                cartorio_values.extend(page_result["cartorio"])
+                valor_pago_values.extend(page_result["valor_pago"])
+                rows.extend(page_result["linhas"])
         except Exception as e:
             # Em caso de erro, retorna listas vazias (soma será 0.0)
-            print(f"Erro ao processar PDF: {e}", file=__import__('sys').stderr)
+            self.error = str(e)
+            print(f"Erro ao processar PDF: {e}", file=sys.stderr)
+        
+        self.cartorio_values = cartorio_values
+        self.valor_pago_values = valor_pago_values
+        self.rows = rows
         
         return {
             "cartorio": self.cartorio_values,
             "valor_pago": self.valor_pago_values
         }
     
+    def extract_records(
+        self, pages: Optional[Iterable[Dict[str, Any]]] = None
+    ) -> RecordStore:
+        """
+        Extrai todas as páginas direto para um RecordStore compacto.
+        
+        Mesmo conteúdo de extract_data e rows, mas em arrays de centavos e
+        índices, sem manter as listas de strings e os dicts por linha.
+        
+        Args:
+            pages: Resultados por página a usar no lugar de iter_pages()
+                (ex: CheckpointStore.resume)
+        
+        Returns:
+            RecordStore com os valores (records.values) e as linhas. Em caso
+            de erro traz as páginas lidas até ali e self.error é preenchido.
+        """
+        records = RecordStore()
+        self.records = records
+        self.error = None
+        
+        try:
+            for page_result in (self.iter_pages() if pages is None else pages):
+                records.add_page(page_result)
+        except Exception as e:
+            self.error = str(e)
+            print(f"Erro ao processar PDF: {e}", file=sys.stderr)
+        
+        return records
+    
+    def iter_pages(self) -> Iterator[Dict[str, Any]]:
+        """
+        Extrai o PDF página a página, entregando cada resultado assim que fica pronto.
+        
+        Nada é acumulado no parser: cada página é liberada depois de
+        entregue, então o consumo de memória não cresce com o número de
+        páginas. No modo paralelo as páginas continuam saindo em ordem.
+        Erros de leitura são propagados para quem consome o gerador.
+        
+        Yields:
+            Dict com os valores de uma página:
+            {
+                "pagina": int,
+                "cartorio": [...],
+                "valor_pago": [...],
+                "linhas": [...]  # registros por linha (ver iter_rows)
+            }
+        """
+        with ExitStack() as stack:
+            with self.metrics.stage("pdfplumber.open"):
+                pdf = stack.enter_context(open_pdf(self.pdf_path))
+            self.total_pages = len(pdf.pages)
+            if self.crop_columns and self.column_band is None:
+                with self.metrics.stage("detect_column_band"):
+                    self.column_band = detect_column_band(pdf.pages[:BAND_PROBE_PAGES])
+            if not self._should_parallelize(self.total_pages):
+                pages = pdf.pages[self.first_page - 1:]
+                for page_num, page in enumerate(pages, start=self.first_page):
+                    if self.cancelled:
+                        return
+                    yield self._page_result(page, page_num)
+                    self._release_page(page, page_num)
+                return
+        
+        yield from self._iter_parallel(self.total_pages)
+    
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """
+        Extrai o PDF entregando um registro por valor encontrado.
+        
+        Yields:
+            Dict com um valor extraído:
+            {
+                "pagina": int,
+                "campo": "cartorio" ou "valor_pago",
+                "valor": str
+            }
+        """
+        for page_result in self.iter_pages():
+            for campo in ("cartorio", "valor_pago"):
+                for valor in page_result[campo]:
+                    yield {"pagina": page_result["pagina"], "campo": campo, "valor": valor}
+    
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        """
+        Extrai o PDF entregando um registro por linha de guia.
+        
+        Cada registro mantém juntos os campos da mesma linha do relatório,
+        o que permite agrupar o Valor Pago por cartório.
+        
+        Yields:
+            Dict com uma linha extraída:
+            {
+                "pagina": int,
+                "linha": int,             # ordem da linha na página
+                "origem": "tabela" ou "texto",
+                "guia": str ou None,
+                "cartorio": str,          # nome do cartório/serventia
+                "valor_pago": str ou None,
+                "valor_cartorio": str ou None
+            }
+        """
+        for page_result in self.iter_pages():
+            yield from page_result["linhas"]
+    
+    def _page_result(self, page: Any, page_num: int) -> Dict[str, Any]:
+        """
+        Extrai uma página isoladamente.
+        
+        Args:
+            page: Objeto página do pdfplumber
+            page_num: Número da página
+            
+        Returns:
+            Dict com o número da página e seus valores (mais "impressao",
+            a impressão digital do conteúdo, quando há page_store)
+        
+        Raises:
+            ExtractionTimeout: Se o prazo (deadline) já passou
+        """
+        if self.deadline is not None and time.time() >= self.deadline:
+            raise ExtractionTimeout(page_num)
+        
+        if self.page_store is not None:
+            fingerprint = self.page_store.fingerprint(page, self)
+            stored = self.page_store.get(fingerprint, page_num)
+            if stored is not None:
+                self.metrics.count("paginas_reaproveitadas")
+                return stored
+        
+        self.cartorio_values = []
+        self.valor_pago_values = []
+        self.rows = []
+        self._row_index = {}
+        self._merged_rows = set()
+        
+        if self.crop_columns and self.column_band is not None:
+            page = self._crop_to_band(page)
+        
+        if self.metrics.enabled:
+            start = time.perf_counter()
+            self._extract_from_page(page, page_num)
+            self.metrics.record_page(page_num, time.perf_counter() - start)
+            self.metrics.count("paginas_processadas")
+            self.metrics.count("linhas_encontradas", len(self.rows))
+        else:
+            self._extract_from_page(page, page_num)
+        
+        page_result = {
+            "pagina": page_num,
+            "cartorio": self.cartorio_values,
+            "valor_pago": self.valor_pago_values,
+            "linhas": self.rows
+        }
+        if self.page_store is not None:
+            page_result["impressao"] = fingerprint
+            self.page_store.put(fingerprint, page_result)
+        return page_result
+    
+    def _release_page(self, page: Any, page_num: int) -> None:
+        """
+        Libera uma página já extraída e confere o limite de memória.
+        
+        Args:
+            page: Objeto página do pdfplumber
+            page_num: Número da página
+        
+        Raises:
+            MemoryBudgetError: Se o RSS passou de memory_budget_mb
+        """
+        if self.low_memory:
+            release_page(page)
+        else:
+            page.close()
+        if self._memory_budget is not None:
+            self._memory_budget.check(page_num)
+    
+    def cancel(self) -> None:
+        """
+        Interrompe a extração em andamento (pode ser chamado de outra thread).
+        
+        iter_pages() termina depois da página atual; no modo paralelo os
+        processos também param na página seguinte, em vez de terminarem
+        seus blocos.
+        """
+        self.cancelled = True
+        if self._stop_event is not None:
+            self._stop_event.set()
+    
+    def _crop_to_band(self, page: Any) -> Any:
+        """
+        Recorta a página à faixa de colunas detectada, na altura inteira.
+        
+        Args:
+            page: Objeto página do pdfplumber
+            
+        Returns:
+            Página recortada (ou a original, se a faixa não couber nela)
+        """
+        x0, x1 = self.column_band
+        left, top, right, bottom = page.bbox
+        x0, x1 = max(x0, left), min(x1, right)
+        if x0 >= x1:
+            return page
+        
+        self.metrics.count("paginas_recortadas")
+        return page.crop((x0, top, x1, bottom))
+    
+    def _should_parallelize(self, total_pages: int) -> bool:
+        """
+        Decide se vale a pena distribuir as páginas entre processos.
+        
+        Args:
+            total_pages: Quantidade de páginas do PDF
+            
+        Returns:
+            bool: True se a extração deve ser paralela
+        """
+        return (
+            self.workers > 1
+            and total_pages > 1
+            and total_pages >= self.min_pages_parallel
+        )
+    
+    def _iter_parallel(self, total_pages: int) -> Iterator[Dict[str, Any]]:
+        """
+        Distribui blocos de páginas entre processos e entrega os resultados.
+        
+        Cada processo abre o PDF por conta própria. Os blocos são
+        consumidos na ordem das páginas, então a sequência é idêntica à do
+        processamento serial. Só alguns blocos ficam em andamento por vez,
+        para que resultados não se acumulem quando o consumidor é lento.
+        
+        Args:
+            total_pages: Quantidade de páginas do PDF
+            
+        Yields:
+            Resultado de cada página, em ordem
+        """
+        skipped = self.first_page - 1
+        remaining = total_pages - skipped
+        if remaining <= 0:
+            return
+        workers = min(self.workers, remaining)
+        ranges = iter([
+            (first + skipped, last + skipped)
+            for first, last in split_page_range(remaining, workers * CHUNKS_PER_WORKER)
+        ])
+        options = {
+            "engine": self.engine,
+            "collect_metrics": self.metrics.enabled,
+            "crop_columns": self.crop_columns,
+            "column_band": self.column_band,
+            "templates": self.templates,
+            "page_store": self.page_store,
+            "prefilter": self.prefilter,
+            "low_memory": self.low_memory,
+            "memory_budget_mb": self.memory_budget_mb,
+            "deadline": self.deadline,
+        }
+        
+        # Caminhos são reabertos por cada processo; conteúdo em memória é
+        # entregue uma vez a cada processo, na inicialização
+        if is_path(self.pdf_path):
+            worker_source = None
+            task_source = self.pdf_path
+        else:
+            worker_source = as_buffer(self.pdf_path)
+            task_source = None
+            if multiprocessing.get_start_method() != "fork":
+                # Sem fork os argumentos são serializados; memoryview não é
+                worker_source = bytes(worker_source)
+        
+        # Sinal compartilhado com os processos para cancel()
+        self._stop_event = multiprocessing.Event()
+        if self.cancelled:
+            self._stop_event.set()
+        
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(worker_source, self._stop_event)
+        ) as executor:
+            pending = deque(
+                executor.submit(_extract_page_range, task_source, first, last, options)
+                for first, last in islice(ranges, workers * 2)
+            )
+            try:
+                while pending:
+                    page_results, error, worker_metrics = pending.popleft().result()
+                    self.metrics.merge(worker_metrics)
+                    for first, last in islice(ranges, 1):
+                        pending.append(executor.submit(
+                            _extract_page_range, task_source, first, last, options
+                        ))
+                    
+                    yield from page_results
+                    if error:
+                        # Mesmo comportamento do serial: mantém o que veio antes
+                        raise RuntimeError(error)
+                    if self.cancelled:
+                        return
+            finally:
+                # Blocos em andamento param na próxima página, inclusive
+                # quando o consumidor abandona o gerador
+                self._stop_event.set()
+                for future in pending:
+                    future.cancel()
+    
     def _extract_from_page(self, page: Any, page_num: int) -> None:
         """
         Extrai dados de uma página específica do PDF.
@@ -56,17 +567,140 @@ class PDFFinancialParser:
             page: Objeto página do pdfplumber
             page_num: Número da página
         """
+        self._current_page = page_num
+        
+        # No motor "fast" as páginas sem grade já são lidas pelo caminho
+        # barato; a pré-classificação só antecede a extração completa
+        if self.engine == "fast" and self._extract_from_page_fast(page):
+            return
+        
+        if self.prefilter and not self._may_have_values(page):
+            self.metrics.count("paginas_ignoradas")
+            return
+        
+        if self.engine == "single_pass":
+            self._extract_from_page_single_pass(page, page_num)
+            return
+        
         # Extrai tabelas da página
-        tables = page.extract_tables()
+        with self.metrics.stage("extract_tables"):
+            tables = [table.extract() for table in self._find_tables(page)]
         
         if tables:
             for table in tables:
                 self._extract_from_table(table)
         
         # Extrai texto para buscar dados em formato não-tabular
-        text = page.extract_text()
+        with self.metrics.stage("extract_text"):
+            text = page.extract_text()
         if text:
-            self._extract_from_text(text)
+            with self.metrics.stage("regex_scan"):
+                self._extract_from_text(text)
+            # O mapa de texto já montado por extract_text() traz as posições
+            self._name_text_rows(lambda: words_to_lines(textmap_words(page.get_textmap())))
+    
+    def _may_have_values(self, page: Any) -> bool:
+        """
+        Pré-classifica a página pelos trechos de texto do fluxo de conteúdo.
+        
+        A leitura não monta caracteres, palavras nem tabelas. A página só é
+        descartada quando nenhum dos caminhos de extração poderia achar um
+        valor nela; na dúvida (página que o leitor rápido não interpreta),
+        segue para a extração completa.
+        
+        Args:
+            page: Objeto página do pdfplumber
+            
+        Returns:
+            bool: False se a página certamente não tem valores
+        """
+        # Importado só quando usado: depende do pdfminer (carregamento lento)
+        from fast_text import UnsupportedPage, page_content, page_text_runs
+        
+        with self.metrics.stage("prefilter"):
+            # Em fontes simples o texto aparece literal no fluxo: basta achar
+            # R$ para manter a página, sem decodificar os caracteres
+            if b"R$" in page_content(page.page_obj):
+                return True
+            try:
+                texts = page_text_runs(page.page_obj, page.pdf.rsrcmgr)
+            except UnsupportedPage:
+                return True
+        return has_value_signal(texts)
+    
+    def _extract_from_page_fast(self, page: Any) -> bool:
+        """
+        Extrai as linhas com R$ lendo o texto direto do fluxo de conteúdo.
+        
+        Não monta caracteres nem tabelas do pdfplumber. Páginas com grade
+        de tabela (ou texto não horizontal) não são tratadas aqui e ficam
+        para a extração completa. O recorte por faixa de colunas só se
+        aplica a essas páginas.
+        
+        Args:
+            page: Objeto página do pdfplumber
+            
+        Returns:
+            bool: False se a página deve passar pela extração completa
+        """
+        # Importado só quando usado: depende do pdfminer (carregamento lento)
+        from fast_text import UnsupportedPage, extract_page_runs, runs_to_text, runs_to_words
+        
+        try:
+            with self.metrics.stage("fast_text"):
+                runs = extract_page_runs(page.page_obj, page.pdf.rsrcmgr)
+                text = runs_to_text(runs)
+        except UnsupportedPage:
+            self.metrics.count("fast_fallbacks")
+            return False
+        
+        if text:
+            with self.metrics.stage("regex_scan"):
+                self._extract_from_text(text)
+            self._name_text_rows(lambda: words_to_lines(runs_to_words(runs)))
+        return True
+    
+    def _extract_from_page_single_pass(self, page: Any, page_num: int) -> None:
+        """
+        Extrai dados de uma página com uma única análise de caracteres.
+        
+        As palavras da página são montadas uma vez e reaproveitadas para
+        preencher as células das tabelas e para reconstruir as linhas de
+        texto, evitando que o pdfplumber reagrupe os mesmos caracteres em
+        extract_tables() e depois em extract_text().
+        
+        Args:
+            page: Objeto página do pdfplumber
+            page_num: Número da página
+        """
+        with self.metrics.stage("extract_words"):
+            words = page.extract_words()
+        
+        with self.metrics.stage("find_tables"):
+            tables = self._find_tables(page)
+        for table in tables:
+            self._extract_from_table(table_rows_from_words(table, words))
+        
+        with self.metrics.stage("words_to_text"):
+            text = words_to_text(words)
+        if text:
+            with self.metrics.stage("regex_scan"):
+                self._extract_from_text(text)
+            self._name_text_rows(lambda: words_to_lines(words))
+    
+    def _find_tables(self, page: Any) -> List[Any]:
+        """
+        Detecta as tabelas da página, reaproveitando o modelo de layout.
+        
+        Args:
+            page: Objeto página do pdfplumber
+            
+        Returns:
+            Lista de tabelas do pdfplumber
+        """
+        if self.templates is None:
+            return page.find_tables()
+        return self.templates.find_tables(page, self.metrics)
     
     def _extract_from_table(self, table: List[List[str]]) -> None:
         """
@@ -89,7 +723,12 @@ class PDFFinancialParser:
                 if cartorio_value:
                     # Verifica se parece um valor monetário
                     if self._is_monetary_value(cartorio_value):
-                        self.cartorio_values.append(cartorio_value)
+                        self._add_row(
+                            origem="tabela",
+                            guia=_guia_from_cell(row[0]),
+                            cartorio=row[1],
+                            valor_cartorio=cartorio_value
+                        )
     
     def _extract_valor_pago_from_text(self, text: str) -> None:
         """
@@ -99,14 +738,8 @@ class PDFFinancialParser:
             text: Texto extraído da página
         """
         # Padrões para identificar "Valor Pago"
-        patterns = [
-            r'Valor\s+Pago[:\s]+([R$\s]*[\d.,]+)',
-            r'VALOR\s+PAGO[:\s]+([R$\s]*[\d.,]+)',
-            r'Valor Pago[:\s]+([R$\s]*[\d.,]+)',
-        ]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
+        for pattern in _VALOR_PAGO_PATTERNS:
+            matches = pattern.finditer(text)
             for match in matches:
                 valor = match.group(1).strip()
                 if self._is_monetary_value(valor):
@@ -132,9 +765,12 @@ class PDFFinancialParser:
             # Exemplo: "0024102419 Serventia... Geral R$ 301,61 R$ 301,61 R$ 0,00 R$ 215,44..."
             
             # Extrai todos os valores monetários da linha
-            valores = re.findall(r'R\$\s*([\d.,]+)', line)
+            valores = _RS_VALUE.findall(line)
             
             if valores and len(valores) >= 4:
+                valor_pago = None
+                cartorio = None
+                
                 # Posições esperadas:
                 # 0: Valor da Guia
                 # 1: Valor Pago
@@ -143,16 +779,111 @@ class PDFFinancialParser:
                 
                 # Valor Pago é a 2ª ocorrência de valor (índice 1)
                 if len(valores) > 1:
-                    valor_pago = valores[1]
-                    if self._is_monetary_value(valor_pago):
-                        self.valor_pago_values.append(valor_pago)
+                    if self._is_monetary_value(valores[1]):
+                        valor_pago = valores[1]
                 
                 # Cartório é a 4ª ocorrência de valor (índice 3)
                 # Isso corresponde à coluna "Cartório" nos rateios
                 if len(valores) > 3:
-                    cartorio = valores[3]
-                    if self._is_monetary_value(cartorio):
-                        self.cartorio_values.append(cartorio)
+                    if self._is_monetary_value(valores[3]):
+                        cartorio = valores[3]
+                
+                if valor_pago is not None or cartorio is not None:
+                    # Guia e cartório/serventia vêm antes do primeiro R$
+                    guia, nome = _split_guia_and_name(line[:line.index('R$')])
+                    self._add_row(
+                        origem="texto",
+                        guia=guia,
+                        cartorio=nome,
+                        valor_pago=valor_pago,
+                        valor_cartorio=cartorio
+                    )
+    
+    def _name_text_rows(self, lines: Callable[[], List[List[Dict[str, Any]]]]) -> None:
+        """
+        Corrige o nome do cartório das linhas lidas só pelo texto.
+        
+        No texto, o trecho antes do primeiro R$ inclui as colunas Cidade e
+        Tipo. O nome passa a ser só o da coluna Cartório, separado pela
+        posição das colunas (ver names_by_guia), igual ao lido pela tabela.
+        Sem cabeçalho na página, o nome fica como lido do texto.
+        
+        Args:
+            lines: Devolve as linhas da página com as palavras e suas
+                posições; só é chamada se há linhas vindas do texto
+        """
+        text_rows = [
+            row for row in self.rows if row["origem"] == "texto" and row["guia"] is not None
+        ]
+        if not text_rows:
+            return
+        
+        with self.metrics.stage("column_names"):
+            names = names_by_guia(lines())
+        for row in text_rows:
+            name = names.get(row["guia"])
+            if name:
+                row["cartorio"] = name
+    
+    def _add_row(
+        self,
+        origem: str,
+        guia: Optional[str],
+        cartorio: Optional[str],
+        valor_pago: Optional[str] = None,
+        valor_cartorio: Optional[str] = None
+    ) -> None:
+        """
+        Registra uma linha de guia da página atual e os seus valores.
+        
+        Em páginas com grade, a mesma linha é lida pela tabela e pelo texto.
+        A leitura de uma guia vinda do outro caminho é juntada, pelo índice
+        (página, guia), à primeira linha ainda sem par dessa guia na página:
+        só completa os campos que faltavam, sem contar de novo os valores
+        já registrados.
+        
+        Args:
+            origem: "tabela" ou "texto"
+            guia: Número da guia, se identificado
+            cartorio: Nome do cartório/serventia
+            valor_pago: Valor Pago da linha (texto original)
+            valor_cartorio: Valor da coluna Cartório (texto original)
+        """
+        key = (self._current_page, guia)
+        positions = self._row_index.get(key, ()) if guia is not None else ()
+        position = next((
+            p for p in positions
+            if p not in self._merged_rows and self.rows[p]["origem"] != origem
+        ), None)
+        if position is not None:
+            row = self.rows[position]
+            self._merged_rows.add(position)
+            self.metrics.count("linhas_mescladas")
+            if valor_pago is not None and row["valor_pago"] is None:
+                row["valor_pago"] = valor_pago
+                self.valor_pago_values.append(valor_pago)
+            if valor_cartorio is not None and row["valor_cartorio"] is None:
+                row["valor_cartorio"] = valor_cartorio
+                self.cartorio_values.append(valor_cartorio)
+            if not row["cartorio"]:
+                row["cartorio"] = " ".join((cartorio or "").split())
+            return
+        
+        if valor_pago is not None:
+            self.valor_pago_values.append(valor_pago)
+        if valor_cartorio is not None:
+            self.cartorio_values.append(valor_cartorio)
+        if guia is not None:
+            self._row_index.setdefault(key, []).append(len(self.rows))
+        self.rows.append({
+            "pagina": self._current_page,
+            "linha": len(self.rows) + 1,
+            "origem": origem,
+            "guia": guia,
+            "cartorio": " ".join((cartorio or "").split()),
+            "valor_pago": valor_pago,
+            "valor_cartorio": valor_cartorio
+        })
     
     def _is_monetary_value(self, value: str) -> bool:
         """
@@ -165,10 +896,310 @@ class PDFFinancialParser:
             bool: True se parece valor monetário
         """
         if not value or not isinstance(value, str):
+            self.metrics.count("valores_rejeitados")
             return False
         
         # Remove espaços e símbolos de moeda
         cleaned = value.strip().replace('R$', '').replace('$', '').strip()
         
         # Verifica se contém números e separadores válidos
-        return bool(re.match(r'^[\d.,]+$', cleaned))
+        if _MONETARY.match(cleaned):
+            return True
+        
+        self.metrics.count("valores_rejeitados")
+        return False
+
+
+def has_value_signal(texts: List[str]) -> bool:
+    """
+    Indica se algum trecho de texto pode originar um valor extraído.
+    
+    Cobre os três caminhos do parser: linhas de texto com R$, o rótulo
+    "Valor Pago" seguido de valor e células numéricas (a coluna Cartório
+    das tabelas é aceita por _is_monetary_value sem R$).
+    
+    Args:
+        texts: Trechos de texto da página (ver fast_text.page_text_runs)
+        
+    Returns:
+        bool: True se a página precisa da extração completa
+    """
+    for text in texts:
+        if "R$" in text:
+            return True
+        cleaned = text.strip()
+        if _MONETARY.match(cleaned) and any(c.isdigit() for c in cleaned):
+            return True
+    # O rótulo e o valor podem estar em trechos separados
+    return _VALOR_PAGO_LABEL.search(" ".join(texts)) is not None
+
+
+def split_page_range(total_pages: int, chunks: int) -> List[Tuple[int, int]]:
+    """
+    Divide as páginas 1..total_pages em blocos contíguos.
+    
+    Args:
+        total_pages: Quantidade de páginas
+        chunks: Quantidade máxima de blocos
+        
+    Returns:
+        Lista de tuplas (primeira, última), com páginas numeradas a partir de 1
+        
+    Examples:
+        >>> split_page_range(10, 3)
+        [(1, 4), (5, 7), (8, 10)]
+    """
+    if total_pages <= 0:
+        return []
+    
+    chunks = max(1, min(chunks, total_pages))
+    size, extra = divmod(total_pages, chunks)
+    
+    ranges = []
+    first = 1
+    for idx in range(chunks):
+        last = first + size - 1 + (1 if idx < extra else 0)
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+
+def _guia_from_cell(cell: Optional[str]) -> Optional[str]:
+    """
+    Lê o número da guia da primeira coluna de uma tabela.
+    
+    Args:
+        cell: Conteúdo da célula
+        
+    Returns:
+        Número da guia, ou None se a célula não for numérica
+    """
+    value = (cell or "").strip()
+    return value if value.isdigit() else None
+
+
+def _split_guia_and_name(prefix: str) -> Tuple[Optional[str], str]:
+    """
+    Separa o número da guia do nome do cartório no início de uma linha.
+    
+    Args:
+        prefix: Trecho da linha antes do primeiro valor em R$
+            (ex: "0024102419 Serventia Registro Civil Vitória Geral")
+        
+    Returns:
+        Tupla (número da guia ou None, restante do texto)
+    """
+    match = _GUIA_PREFIX.match(prefix)
+    if match:
+        return match.group(1), match.group(2).strip()
+    return None, prefix.strip()
+
+
+def names_by_guia(lines: List[List[Dict[str, Any]]]) -> Dict[str, str]:
+    """
+    Lê o nome do cartório de cada guia pela posição das colunas.
+    
+    A coluna Cidade começa na posição do seu título no cabeçalho da tabela
+    ("Guia Cartório Cidade Tipo ..."); o nome do cartório é o texto da
+    linha entre a guia e esse ponto, como a célula lida pela tabela.
+    
+    Args:
+        lines: Linhas da página, cada uma com palavras (ou trechos) com
+            "text" e "x0", ordenadas por x0 (ver words_to_lines)
+    
+    Returns:
+        Dict guia -> nome do cartório; vazio se a página não tem cabeçalho
+    """
+    limit = None
+    names: Dict[str, str] = {}
+    for line in lines:
+        texts = [word["text"] for word in line]
+        if limit is None:
+            if "Guia" in texts and "Cidade" in texts:
+                limit = line[texts.index("Cidade")]["x0"] - COLUMN_TOLERANCE
+            continue
+        prefix = " ".join(word["text"] for word in line if word["x0"] < limit)
+        guia, name = _split_guia_and_name(prefix)
+        if guia is not None and name:
+            names.setdefault(guia, " ".join(name.split()))
+    return names
+
+
+def textmap_words(textmap: Any) -> List[Dict[str, Any]]:
+    """
+    Separa as palavras do mapa de texto usado por page.extract_text().
+    
+    Reaproveita o mapa já montado (o pdfplumber o guarda por página), sem
+    agrupar os caracteres de novo como page.extract_words().
+    
+    Args:
+        textmap: Resultado de page.get_textmap()
+    
+    Returns:
+        Lista de palavras com "text", "x0", "x1" e "top"
+    """
+    words: List[Dict[str, Any]] = []
+    current = None
+    for char, obj in textmap.tuples:
+        if obj is None or char.isspace():
+            current = None
+        elif current is None:
+            current = {"text": char, "x0": obj["x0"], "x1": obj["x1"], "top": obj["top"]}
+            words.append(current)
+        else:
+            current["text"] += char
+            current["x1"] = obj["x1"]
+    return words
+
+
+def words_to_lines(words: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Agrupa palavras em linhas, de cima para baixo e da esquerda para a direita.
+    
+    Args:
+        words: Palavras no formato de page.extract_words()
+        
+    Returns:
+        Lista de linhas, cada uma com suas palavras ordenadas por x0
+    """
+    from pdfplumber.utils import cluster_objects
+    
+    lines = cluster_objects(words, "top", LINE_Y_TOLERANCE)
+    return [sorted(line, key=lambda word: word["x0"]) for line in lines]
+
+
+def words_to_text(words: List[Dict[str, Any]]) -> str:
+    """
+    Reconstrói o texto da página a partir das palavras.
+    
+    Produz o mesmo formato de page.extract_text(): uma linha de texto por
+    linha visual, com as palavras separadas por um espaço.
+    
+    Args:
+        words: Palavras no formato de page.extract_words()
+        
+    Returns:
+        str: Texto com as linhas separadas por quebra de linha
+    """
+    return "\n".join(
+        " ".join(word["text"] for word in line)
+        for line in words_to_lines(words)
+    )
+
+
+def table_rows_from_words(
+    table: Any, words: List[Dict[str, Any]]
+) -> List[List[Optional[str]]]:
+    """
+    Monta o conteúdo de uma tabela a partir das palavras já extraídas.
+    
+    Equivale a table.extract(), mas distribui palavras (e não caracteres)
+    pelas células, usando o centro de cada palavra.
+    
+    Args:
+        table: Tabela encontrada por page.find_tables()
+        words: Palavras da página, no formato de page.extract_words()
+        
+    Returns:
+        Lista de linhas; células inexistentes são None e vazias são ""
+    """
+    by_middle = sorted(words, key=lambda word: (word["top"] + word["bottom"]) / 2)
+    middles = [(word["top"] + word["bottom"]) / 2 for word in by_middle]
+    
+    rows = []
+    for row in table.rows:
+        _, top, _, bottom = row.bbox
+        row_words = by_middle[bisect_left(middles, top):bisect_left(middles, bottom)]
+        
+        cells = []
+        for cell in row.cells:
+            if cell is None:
+                cells.append(None)
+                continue
+            
+            x0, cell_top, x1, cell_bottom = cell
+            cell_words = [
+                word for word in row_words
+                if x0 <= (word["x0"] + word["x1"]) / 2 < x1
+                and cell_top <= (word["top"] + word["bottom"]) / 2 < cell_bottom
+            ]
+            cells.append(words_to_text(cell_words))
+        rows.append(cells)
+    
+    return rows
+
+
+def detect_column_band(pages: List[Any]) -> Optional[Tuple[float, float]]:
+    """
+    Detecta a faixa horizontal que vai da 1ª à 8ª coluna da tabela.
+    
+    Usa a primeira linha de tabela com pelo menos 8 células próprias (o
+    cabeçalho das colunas; linhas de agrupamento como "Rateios" têm células
+    mescladas e são ignoradas).
+    
+    Args:
+        pages: Páginas iniciais do PDF (objetos página do pdfplumber)
+        
+    Returns:
+        Tupla (x0, x1) com uma pequena folga, ou None se nenhuma tabela
+        com colunas suficientes for encontrada (ex: relatório sem grade)
+    """
+    for page in pages:
+        for table in page.find_tables():
+            for row in table.rows:
+                cells = row.cells[:BAND_COLUMNS]
+                if len(cells) == BAND_COLUMNS and all(cells):
+                    return (cells[0][0] - BAND_MARGIN, cells[-1][2] + BAND_MARGIN)
+    return None
+
+
+# Conteúdo do PDF em memória e sinal de parada entregues por _init_worker
+_WORKER_SOURCE: Any = None
+_WORKER_STOP: Any = None
+
+
+def _init_worker(source: Any, stop_event: Any = None) -> None:
+    """Guarda, no processo de trabalho, o PDF em memória e o sinal de parada."""
+    global _WORKER_SOURCE, _WORKER_STOP
+    _WORKER_SOURCE = source
+    _WORKER_STOP = stop_event
+
+
+def _extract_page_range(
+    pdf_path: Optional[PdfSource], first: int, last: int, options: Dict[str, Any]
+) -> Tuple[List[Dict[str, Any]], Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Extrai um bloco de páginas em um processo separado.
+    
+    Args:
+        pdf_path: Origem do PDF; None usa o conteúdo recebido por _init_worker
+        first: Primeira página do bloco (a partir de 1)
+        last: Última página do bloco (inclusiva)
+        options: Opções repassadas ao PDFFinancialParser do processo
+            ("collect_metrics" liga a coleta de métricas no processo)
+        
+    Returns:
+        Tupla (resultados por página, mensagem de erro ou None,
+        métricas do bloco ou None)
+    """
+    if pdf_path is None:
+        pdf_path = _WORKER_SOURCE
+    options = dict(options)
+    metrics = Metrics() if options.pop("collect_metrics", False) else None
+    parser = PDFFinancialParser(pdf_path, metrics=metrics, **options)
+    page_results = []
+    error = None
+    
+    try:
+        with ExitStack() as stack:
+            with parser.metrics.stage("pdfplumber.open"):
+                pdf = stack.enter_context(open_pdf(pdf_path, pages=range(first, last + 1)))
+            for page in pdf.pages:
+                if _WORKER_STOP is not None and _WORKER_STOP.is_set():
+                    break
+                page_results.append(parser._page_result(page, page.page_number))
+                parser._release_page(page, page.page_number)
+    except Exception as e:
+        error = str(e)
+    
+    return page_results, error, metrics.snapshot() if metrics else None
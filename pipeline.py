@@ -0,0 +1,364 @@
+"""
+Fluxo completo de processamento de um PDF de Guias Geradas.
+Consulta o cache de resultados, extrai os dados e calcula os totais.
+"""
+import csv
+import io
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from pdf_parser import PDFFinancialParser, output_options
+from calculator import FinancialCalculator, GroupedTotals
+from checkpoint import CheckpointStore
+from history_store import HistoryStore, file_hash
+from incremental import PageResultStore, process_revision
+from metrics import Metrics
+from pdf_input import PdfSource, as_buffer, is_path
+from record_store import RecordStore
+from result_cache import ResultCache, compute_cache_key, compute_file_cache_key
+
+
+def source_cache_key(
+    pdf_path: PdfSource, parser_options: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Calcula a chave de cache de qualquer origem de PDF aceita pelo parser.
+    
+    Args:
+        pdf_path: Caminho do arquivo PDF ou o conteúdo em memória
+        parser_options: Opções do PDFFinancialParser usadas na extração
+            (None: as do parser padrão)
+    
+    Returns:
+        str: Hash do conteúdo, da versão do parser e das opções que alteram o resultado
+    """
+    options = output_options(parser_options or {})
+    if is_path(pdf_path):
+        return compute_file_cache_key(pdf_path, options)
+    return compute_cache_key(as_buffer(pdf_path), options)
+
+
+def cache_entry(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Monta a entrada de cache de um resultado, com os registros em colunas.
+    
+    Args:
+        result: Resultado com "records", "totals" e "por_cartorio"
+    
+    Returns:
+        Dict serializável em JSON (ver result_from_cache)
+    """
+    return {
+        "registros": result["records"].to_dict(),
+        "totals": result["totals"],
+        "por_cartorio": result["por_cartorio"],
+    }
+
+
+def result_from_cache(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reconstrói o resultado de process_pdf a partir de uma entrada de cache.
+    
+    Entradas no formato anterior (listas de strings em "extracted_data")
+    também são aceitas; nelas os valores ficam sem número de página.
+    
+    Args:
+        entry: Dict gerado por cache_entry
+    
+    Returns:
+        Dict com "records", "extracted_data", "totals", "rows" e "por_cartorio"
+    """
+    if "registros" in entry:
+        records = RecordStore.from_dict(entry["registros"])
+    else:
+        records = RecordStore()
+        for field, values in entry["extracted_data"].items():
+            records.values[field].extend(values, 0)
+        records.add_rows(entry.get("rows", []))
+    return {
+        "records": records,
+        "extracted_data": records.values,
+        "totals": entry["totals"],
+        "rows": records,
+        "por_cartorio": entry.get("por_cartorio", []),
+    }
+
+
+def process_pdf(
+    pdf_path: PdfSource,
+    cache: Optional[ResultCache] = None,
+    cache_key: Optional[str] = None,
+    collect_metrics: bool = False,
+    checkpoints: Optional[CheckpointStore] = None,
+    on_start: Optional[Callable[[PDFFinancialParser], None]] = None,
+    on_page: Optional[Callable[[Dict[str, Any]], None]] = None,
+    **parser_options: Any
+) -> Dict[str, Any]:
+    """
+    Processa um PDF, reaproveitando o resultado em cache quando existir.
+    
+    Em caso de erro de leitura o resultado traz as páginas lidas até ali e
+    "error" preenchido. Se o parser for cancelado (PDFFinancialParser.cancel)
+    o resultado também fica parcial; nos dois casos nada vai para o cache.
+    
+    Args:
+        pdf_path: Caminho do arquivo PDF ou o conteúdo em memória (bytes,
+            memoryview, arquivo aberto; ver PDFFinancialParser)
+        cache: Cache de resultados (None desativa o cache)
+        cache_key: Chave já calculada do PDF, para evitar reler o arquivo
+            (ver source_cache_key, com as mesmas opções do parser)
+        collect_metrics: Se True, mede tempos por etapa e por página
+        checkpoints: Grava o progresso a cada N páginas e retoma execuções
+            interrompidas do mesmo PDF (None desativa)
+        on_start: Chamada com o parser antes da primeira página (ex: para
+            cancelá-lo ou consultar total_pages); não é chamada com o
+            resultado vindo do cache
+        on_page: Chamada com o resultado de cada página assim que fica pronto
+        **parser_options: Opções repassadas ao PDFFinancialParser
+    
+    Returns:
+        Dict com o resultado:
+        {
+            "records": RecordStore,  # valores e linhas em colunas compactas
+            "extracted_data": {"cartorio": [...], "valor_pago": [...]},
+            "totals": {"total_valor_pago": float, "total_cartorio": float},
+            "rows": [...],         # linhas extraídas (ver iter_rows)
+            "por_cartorio": [...], # subtotais por cartório
+            "from_cache": bool,
+            "error": str ou None,
+            "metricas": {...} ou None  # ver Metrics.to_dict
+        }
+    """
+    metrics = Metrics(enabled=collect_metrics)
+    
+    if cache is not None:
+        with metrics.stage("cache"):
+            if cache_key is None:
+                cache_key = source_cache_key(pdf_path, parser_options)
+            cached = cache.get(cache_key)
+        if cached is not None:
+            metrics.count("cache_hits")
+            return {
+                **result_from_cache(cached), "from_cache": True, "error": None,
+                "metricas": metrics.to_dict() if collect_metrics else None
+            }
+    
+    parser = PDFFinancialParser(pdf_path, metrics=metrics, **parser_options)
+    if on_start is not None:
+        on_start(parser)
+    with metrics.stage("parser"):
+        if checkpoints is not None:
+            if cache_key is None:
+                cache_key = source_cache_key(pdf_path, parser_options)
+            pages = checkpoints.resume(parser, cache_key)
+        else:
+            pages = parser.iter_pages()
+        if on_page is not None:
+            pages = _observe_pages(pages, on_page)
+        records = parser.extract_records(pages)
+    calculator = FinancialCalculator(metrics=metrics)
+    
+    result = {
+        "records": records,
+        "extracted_data": records.values,
+        "totals": calculator.calculate_totals_from_records(records),
+        "rows": records,
+        "por_cartorio": calculator.calculate_grouped(records)
+    }
+    
+    # Falhas de leitura e cancelamentos não são guardados, para que o PDF seja reprocessado
+    if cache is not None and parser.error is None and not parser.cancelled:
+        cache.put(cache_key, cache_entry(result))
+    
+    return {
+        **result, "from_cache": False, "error": parser.error,
+        "metricas": metrics.to_dict() if collect_metrics else None
+    }
+
+
+def _observe_pages(
+    pages: Iterable[Dict[str, Any]], on_page: Callable[[Dict[str, Any]], None]
+) -> Iterator[Dict[str, Any]]:
+    """Repassa os resultados por página, avisando on_page a cada um."""
+    for page_result in pages:
+        on_page(page_result)
+        yield page_result
+
+
+def build_summary(
+    filename: str,
+    totals: Dict[str, float],
+    extracted_data: Dict[str, List[str]],
+    grouped: Optional[List[Dict[str, Any]]] = None,
+    metrics: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Monta o resumo JSON exibido e exportado para um arquivo processado.
+    
+    Args:
+        filename: Nome do arquivo PDF
+        totals: Totais calculados pela FinancialCalculator
+        extracted_data: Valores extraídos pelo PDFFinancialParser
+        grouped: Subtotais por cartório (incluídos no resumo se informados)
+        metrics: Métricas do processamento (incluídas como "diagnostico")
+    
+    Returns:
+        Dict com o resumo do processamento
+    """
+    quantidade_pago = len(extracted_data.get("valor_pago", []))
+    quantidade_cartorio = len(extracted_data.get("cartorio", []))
+    
+    summary = {
+        "arquivo": filename,
+        "total_valor_pago": round(totals["total_valor_pago"], 2),
+        "total_cartorio": round(totals["total_cartorio"], 2),
+        "diferenca": round(totals["total_valor_pago"] - totals["total_cartorio"], 2),
+        "quantidade_valores_pago": quantidade_pago,
+        "quantidade_cartorio": quantidade_cartorio,
+        "total_de_valores": quantidade_pago + quantidade_cartorio
+    }
+    
+    if grouped is not None:
+        summary["por_cartorio"] = grouped
+    
+    if metrics is not None:
+        summary["diagnostico"] = metrics
+    
+    return summary
+
+
+def summarize_pdf(
+    pdf_path: PdfSource,
+    filename: str,
+    cache: Optional[ResultCache] = None,
+    collect_metrics: bool = False,
+    revisions: Optional[PageResultStore] = None,
+    history: Optional[str] = None,
+    periodo: Optional[str] = None,
+    **parser_options: Any
+) -> Dict[str, Any]:
+    """
+    Processa um PDF de um lote e monta a sua linha de resultado.
+    
+    Falhas não são propagadas: viram uma linha com status "erro", para que
+    um arquivo corrompido não interrompa os demais.
+    
+    Args:
+        pdf_path: Caminho do PDF ou o próprio conteúdo
+        filename: Nome do arquivo exibido no resultado
+        cache: Cache de resultados (None desativa)
+        collect_metrics: Se True, inclui tempos por etapa e por página
+        revisions: Se informado, só extrai as páginas que mudaram desde a
+            última versão do arquivo com o mesmo nome e inclui "revisao" (ver
+            incremental.process_revision); o cache de resultados não é usado
+        history: Arquivo do histórico SQLite onde o resultado é registrado
+            (ver history_store.HistoryStore; None não registra)
+        periodo: Período de referência do relatório no histórico (AAAA-MM)
+        **parser_options: Opções repassadas ao PDFFinancialParser
+    
+    Returns:
+        Dict com o resumo (ver build_summary) mais "status" ("ok" ou
+        "erro"), "erro", "cache" e "tempo_s"; se o registro no histórico
+        falhar, o status continua "ok" e a mensagem vai em "erro_historico"
+    """
+    start = time.perf_counter()
+    try:
+        if revisions is not None:
+            # Cada página extraída já fica guardada, o que também serve de
+            # checkpoint: uma execução interrompida reaproveita as páginas lidas
+            parser_options.pop("checkpoints", None)
+            processed = process_revision(
+                pdf_path, filename, revisions, collect_metrics=collect_metrics, **parser_options
+            )
+        else:
+            processed = process_pdf(
+                pdf_path, cache=cache, collect_metrics=collect_metrics, **parser_options
+            )
+        line = build_summary(
+            filename, processed["totals"], processed["extracted_data"],
+            processed["por_cartorio"], processed["metricas"]
+        )
+        line["status"] = "erro" if processed["error"] else "ok"
+        line["erro"] = processed["error"]
+        line["cache"] = processed["from_cache"]
+        if revisions is not None:
+            line["revisao"] = processed["revisao"]
+    except Exception as e:
+        line = {"arquivo": filename, "status": "erro", "erro": str(e), "cache": False}
+    
+    # Falha ao gravar o histórico não invalida a extração do arquivo
+    if history is not None and line["status"] == "ok":
+        try:
+            with HistoryStore(history) as store:
+                store.record_result(processed, file_hash(pdf_path), filename, periodo)
+        except Exception as e:
+            line["erro_historico"] = str(e)
+    
+    line["tempo_s"] = round(time.perf_counter() - start, 3)
+    return line
+
+
+def consolidate_summaries(lines: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Soma as linhas de resultado de vários arquivos em um total geral.
+    
+    Linhas com status "erro" ficam de fora do total.
+    
+    Args:
+        lines: Linhas de resultado (ver summarize_pdf)
+    
+    Returns:
+        Dict com o total geral:
+        {
+            "total_valor_pago": float,
+            "total_cartorio": float,
+            "diferenca": float,
+            "quantidade_valores_pago": int,
+            "quantidade_cartorio": int,
+            "por_cartorio": [...]  # subtotais de todos os arquivos
+        }
+    """
+    ok_lines = [line for line in lines if line["status"] == "ok"]
+    # Soma em centavos para não acumular erro de ponto flutuante
+    total_valor_pago = sum(round(line["total_valor_pago"] * 100) for line in ok_lines) / 100
+    total_cartorio = sum(round(line["total_cartorio"] * 100) for line in ok_lines) / 100
+    
+    # Subtotais por cartório de cada arquivo são combinados no total geral
+    grouped = GroupedTotals()
+    for line in ok_lines:
+        grouped.merge(GroupedTotals.from_list(line.get("por_cartorio", [])))
+    
+    return {
+        "total_valor_pago": round(total_valor_pago, 2),
+        "total_cartorio": round(total_cartorio, 2),
+        "diferenca": round(total_valor_pago - total_cartorio, 2),
+        "quantidade_valores_pago": sum(line["quantidade_valores_pago"] for line in ok_lines),
+        "quantidade_cartorio": sum(line["quantidade_cartorio"] for line in ok_lines),
+        "por_cartorio": grouped.to_list(),
+    }
+
+
+# Colunas do CSV de um lote de arquivos
+CSV_COLUMNS = [
+    "arquivo", "status", "total_valor_pago", "total_cartorio", "diferenca",
+    "quantidade_valores_pago", "quantidade_cartorio", "erro"
+]
+
+
+def summaries_to_csv(lines: List[Dict[str, Any]], total: Dict[str, Any]) -> str:
+    """
+    Monta o CSV de um lote: uma linha por arquivo e o total geral no final.
+    
+    Args:
+        lines: Linhas de resultado (ver summarize_pdf)
+        total: Total geral (ver consolidate_summaries)
+    
+    Returns:
+        str com o CSV
+    """
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(lines)
+    writer.writerow({**total, "arquivo": "TOTAL", "status": "", "erro": ""})
+    return output.getvalue()
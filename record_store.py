@@ -0,0 +1,419 @@
+"""
+Armazenamento compacto, em colunas, dos valores e linhas extraídos.
+
+Em vez de listas de strings e de um dict por linha, os valores ficam em
+arrays de centavos inteiros, as páginas e linhas em arrays de índices e os
+nomes de cartório uma única vez cada. Os valores são convertidos para
+centavos uma só vez, na extração, e a calculadora soma os arrays direto.
+"""
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Optional
+
+from data_processor import parse_centavos_batch
+
+
+# Campos de valores extraídos (mesmas chaves de PDFFinancialParser.extract_data)
+VALUE_FIELDS = ("cartorio", "valor_pago")
+
+# Origem das linhas, guardada como índice
+ORIGINS = ("tabela", "texto")
+
+# Centavos de um valor ausente na linha (ex: linha sem Valor Pago)
+MISSING = -(2 ** 63)
+
+# Guia ausente ou que não cabe como inteiro (ex: letras no número)
+NO_GUIA = -1
+
+# Dígitos de uma guia que ainda cabem em um inteiro de 64 bits
+MAX_GUIA_DIGITS = 18
+
+
+def format_centavos(centavos: int) -> str:
+    """
+    Formata centavos inteiros no padrão brasileiro.
+    
+    Args:
+        centavos: Valor em centavos
+    
+    Returns:
+        str: Valor formatado, ex: 123456 -> "1.234,56"
+    
+    Examples:
+        >>> format_centavos(123456)
+        '1.234,56'
+        >>> format_centavos(-5)
+        '-0,05'
+    """
+    sign = "-" if centavos < 0 else ""
+    reais, cents = divmod(abs(centavos), 100)
+    return f"{sign}{reais:,}".replace(",", ".") + f",{cents:02d}"
+
+
+class ValueColumn(Sequence):
+    """
+    Valores de um campo (Cartório ou Valor Pago), em centavos.
+    
+    Comporta-se como a lista de strings de extract_data: len(), índices,
+    fatias e iteração devolvem os valores formatados (ver format_centavos).
+    """
+    
+    __slots__ = ("centavos", "pages", "total")
+    
+    def __init__(self):
+        """Inicializa a coluna vazia."""
+        self.centavos = array("q")
+        self.pages = array("I")
+        # Soma mantida a cada inserção, para totais parciais sem recalcular
+        self.total = 0
+    
+    def extend(self, values: List[Any], page: int) -> None:
+        """
+        Acrescenta os valores de uma página.
+        
+        Args:
+            values: Valores monetários em texto
+            page: Número da página
+        """
+        centavos = parse_centavos_batch(values)
+        self.centavos.extend(centavos)
+        self.pages.extend([page] * len(centavos))
+        self.total += sum(centavos)
+    
+    def __len__(self) -> int:
+        return len(self.centavos)
+    
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [format_centavos(value) for value in self.centavos[index]]
+        return format_centavos(self.centavos[index])
+    
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, ValueColumn):
+            return self.centavos == other.centavos
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return list(self) == list(other)
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        return f"ValueColumn({len(self)} valores)"
+
+
+class RowView:
+    """
+    Uma linha de guia do RecordStore, sem copiar os dados.
+    
+    Aceita o mesmo acesso dos dicts de PDFFinancialParser.iter_rows
+    (row["cartorio"], row.get("guia")), com os valores formatados.
+    """
+    
+    __slots__ = ("_store", "_index")
+    
+    KEYS = ("pagina", "linha", "origem", "guia", "cartorio", "valor_pago", "valor_cartorio")
+    
+    def __init__(self, store: "RecordStore", index: int):
+        self._store = store
+        self._index = index
+    
+    @property
+    def pagina(self) -> int:
+        return self._store.row_page[self._index]
+    
+    @property
+    def linha(self) -> int:
+        return self._store.row_line[self._index]
+    
+    @property
+    def origem(self) -> str:
+        return ORIGINS[self._store.row_origin[self._index]]
+    
+    @property
+    def guia(self) -> Optional[str]:
+        return self._store.guia(self._index)
+    
+    @property
+    def cartorio(self) -> str:
+        return self._store.names[self._store.row_cartorio[self._index]]
+    
+    @property
+    def valor_pago(self) -> Optional[str]:
+        value = self._store.row_valor_pago[self._index]
+        return None if value == MISSING else format_centavos(value)
+    
+    @property
+    def valor_cartorio(self) -> Optional[str]:
+        value = self._store.row_valor_cartorio[self._index]
+        return None if value == MISSING else format_centavos(value)
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.KEYS else default
+    
+    def keys(self):
+        return self.KEYS
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte a linha em dict, no formato de iter_rows."""
+        return {key: getattr(self, key) for key in self.KEYS}
+    
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, RowView):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        return f"RowView({self.to_dict()!r})"
+
+
+class RecordStore(Sequence):
+    """
+    Valores e linhas extraídos de um PDF, em colunas compactas.
+    
+    Como sequência, entrega as linhas de guia (RowView), na ordem em que
+    foram extraídas; os valores por campo ficam em self.values, no formato
+    de extract_data ({"cartorio": ValueColumn, "valor_pago": ValueColumn}).
+    """
+    
+    def __init__(self):
+        """Inicializa o armazenamento vazio."""
+        self.values: Dict[str, ValueColumn] = {field: ValueColumn() for field in VALUE_FIELDS}
+        
+        self.row_page = array("I")
+        self.row_line = array("I")
+        self.row_origin = array("B")
+        self.row_guia = array("q")
+        # Quantidade de dígitos da guia, para repor os zeros à esquerda
+        self.row_guia_width = array("B")
+        self.row_cartorio = array("I")
+        self.row_valor_pago = array("q")
+        self.row_valor_cartorio = array("q")
+        
+        # Guias que não cabem como inteiro, pelo índice da linha
+        self.other_guias: Dict[int, str] = {}
+        # Nomes de cartório, cada um guardado uma única vez
+        self.names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        # Guia -> índices das linhas, montado na primeira busca (ver find_guia)
+        self._guia_index: Optional[Dict[Any, List[int]]] = None
+    
+    def add_page(self, page_result: Dict[str, Any]) -> None:
+        """
+        Acrescenta o resultado de uma página (ver PDFFinancialParser.iter_pages).
+        
+        Args:
+            page_result: Dict com "pagina", "cartorio", "valor_pago" e "linhas"
+        """
+        page = page_result["pagina"]
+        for field in VALUE_FIELDS:
+            self.values[field].extend(page_result[field], page)
+        self.add_rows(page_result["linhas"])
+    
+    def add_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Acrescenta linhas de guia (ver PDFFinancialParser.iter_rows).
+        
+        Args:
+            rows: Linhas com "pagina", "linha", "origem", "guia", "cartorio",
+                "valor_pago" e "valor_cartorio"
+        """
+        pagos = parse_centavos_batch(row["valor_pago"] for row in rows)
+        cartorios = parse_centavos_batch(row["valor_cartorio"] for row in rows)
+        
+        for row, pago, cartorio in zip(rows, pagos, cartorios):
+            index = len(self.row_page)
+            self.row_page.append(row["pagina"])
+            self.row_line.append(row["linha"])
+            self.row_origin.append(ORIGINS.index(row["origem"]))
+            self.row_cartorio.append(self._name_id(row["cartorio"]))
+            self.row_valor_pago.append(MISSING if row["valor_pago"] is None else pago)
+            self.row_valor_cartorio.append(
+                MISSING if row["valor_cartorio"] is None else cartorio
+            )
+            
+            guia = row["guia"]
+            if _is_numeric_guia(guia):
+                self.row_guia.append(int(guia))
+                self.row_guia_width.append(len(guia))
+            else:
+                self.row_guia.append(NO_GUIA)
+                self.row_guia_width.append(0)
+                if guia is not None:
+                    self.other_guias[index] = guia
+            if self._guia_index is not None:
+                self._index_guia(index)
+    
+    def guia(self, index: int) -> Optional[str]:
+        """Número da guia de uma linha, ou None se não identificado."""
+        number = self.row_guia[index]
+        if number == NO_GUIA:
+            return self.other_guias.get(index)
+        return str(number).zfill(self.row_guia_width[index])
+    
+    def find_guia(self, guia: str, page: Optional[int] = None) -> List[RowView]:
+        """
+        Busca as linhas de uma guia, sem percorrer o relatório inteiro.
+        
+        O índice é montado na primeira busca, com uma passada pelas linhas,
+        e acompanha as linhas acrescentadas depois; cada busca seguinte
+        custa só o acesso ao dict.
+        
+        Args:
+            guia: Número da guia (zeros à esquerda são opcionais)
+            page: Se informado, só as linhas desta página
+        
+        Returns:
+            Linhas da guia, na ordem em que foram extraídas
+        """
+        if self._guia_index is None:
+            self._guia_index = {}
+            for index in range(len(self)):
+                self._index_guia(index)
+        
+        indexes = self._guia_index.get(guia_key(guia.strip()), [])
+        return [
+            RowView(self, index) for index in indexes
+            if page is None or self.row_page[index] == page
+        ]
+    
+    def _index_guia(self, index: int) -> None:
+        """Inclui uma linha no índice de guias."""
+        number = self.row_guia[index]
+        if number != NO_GUIA:
+            key = number
+        elif index in self.other_guias:
+            key = guia_key(self.other_guias[index])
+        else:
+            return
+        self._guia_index.setdefault(key, []).append(index)
+    
+    def __len__(self) -> int:
+        return len(self.row_page)
+    
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [RowView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return RowView(self, index)
+    
+    def __iter__(self) -> Iterator[RowView]:
+        for index in range(len(self)):
+            yield RowView(self, index)
+    
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        return f"RecordStore({len(self)} linhas)"
+    
+    def nbytes(self) -> int:
+        """Memória aproximada ocupada pelos arrays e nomes, em bytes."""
+        arrays = [
+            self.row_page, self.row_line, self.row_origin, self.row_guia,
+            self.row_guia_width, self.row_cartorio, self.row_valor_pago, self.row_valor_cartorio
+        ]
+        for column in self.values.values():
+            arrays.extend((column.centavos, column.pages))
+        return (
+            sum(len(a) * a.itemsize for a in arrays)
+            + sum(len(name.encode("utf-8")) for name in self.names)
+            + sum(len(guia) for guia in self.other_guias.values())
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte as colunas em listas serializáveis em JSON (ver from_dict)."""
+        return {
+            "valores": {
+                field: {"centavos": column.centavos.tolist(), "paginas": column.pages.tolist()}
+                for field, column in self.values.items()
+            },
+            "linhas": {
+                "pagina": self.row_page.tolist(),
+                "linha": self.row_line.tolist(),
+                "origem": self.row_origin.tolist(),
+                "guia": self.row_guia.tolist(),
+                "largura_guia": self.row_guia_width.tolist(),
+                "cartorio": self.row_cartorio.tolist(),
+                "valor_pago": self.row_valor_pago.tolist(),
+                "valor_cartorio": self.row_valor_cartorio.tolist(),
+            },
+            "outras_guias": {str(index): guia for index, guia in self.other_guias.items()},
+            "nomes": self.names,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RecordStore":
+        """
+        Reconstrói o armazenamento a partir de to_dict().
+        
+        Args:
+            data: Dict gerado por to_dict (ex: lido do cache de resultados)
+        
+        Returns:
+            RecordStore com as mesmas colunas
+        """
+        store = cls()
+        for field, column_data in data["valores"].items():
+            column = store.values[field]
+            column.centavos.extend(column_data["centavos"])
+            column.pages.extend(column_data["paginas"])
+            column.total = sum(column.centavos)
+        
+        linhas = data["linhas"]
+        store.row_page.extend(linhas["pagina"])
+        store.row_line.extend(linhas["linha"])
+        store.row_origin.extend(linhas["origem"])
+        store.row_guia.extend(linhas["guia"])
+        # Entradas antigas, sem a largura: guias sem zeros à esquerda
+        store.row_guia_width.extend(linhas.get("largura_guia", [0] * len(linhas["guia"])))
+        store.row_cartorio.extend(linhas["cartorio"])
+        store.row_valor_pago.extend(linhas["valor_pago"])
+        store.row_valor_cartorio.extend(linhas["valor_cartorio"])
+        
+        store.other_guias = {int(index): guia for index, guia in data["outras_guias"].items()}
+        store.names = list(data["nomes"])
+        store._name_ids = {name: index for index, name in enumerate(store.names)}
+        return store
+    
+    def _name_id(self, name: str) -> int:
+        """Índice do nome de cartório, guardando-o na primeira ocorrência."""
+        index = self._name_ids.get(name)
+        if index is None:
+            index = len(self.names)
+            self.names.append(name)
+            self._name_ids[name] = index
+        return index
+
+
+def _is_numeric_guia(guia: Optional[str]) -> bool:
+    """Indica se a guia é guardada como inteiro (só dígitos ASCII, até MAX_GUIA_DIGITS)."""
+    return (
+        guia is not None and guia.isascii() and guia.isdigit()
+        and len(guia) <= MAX_GUIA_DIGITS
+    )
+
+
+def guia_key(guia: str) -> Any:
+    """
+    Chave de busca de uma guia: números valem sem os zeros à esquerda.
+    
+    Usada pelo índice do RecordStore e pelo histórico (history_store), para
+    que a mesma busca tenha a mesma resposta nos dois.
+    
+    Args:
+        guia: Número da guia (ex: "0024102419")
+    
+    Returns:
+        int para guias só com dígitos (ex: 24102419); a própria string nos demais casos
+    """
+    return int(guia) if guia.isascii() and guia.isdigit() else guia
@@ -0,0 +1,180 @@
+"""
+Cache em disco dos resultados de PDFs já processados.
+Cada resultado é endereçado pelo hash do conteúdo do PDF, da versão do
+parser e das opções que alteram o resultado (motor, recorte de colunas...).
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pdf_parser import PARSER_VERSION, output_options
+
+
+# Diretório e tamanho padrão, configuráveis por variável de ambiente
+DEFAULT_CACHE_DIR = os.environ.get(
+    "FIRC_CACHE_DIR",
+    str(Path.home() / ".cache" / "calculadora_firc")
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("FIRC_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+# Tamanho dos blocos lidos ao calcular o hash de arquivos em disco
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _key_digest(options: Optional[List[Any]]) -> Any:
+    """Hash iniciado com a versão do parser e as opções (padrão: as do parser padrão)."""
+    options = options if options is not None else output_options({})
+    digest = hashlib.sha256(PARSER_VERSION.encode() + b"\0")
+    digest.update(json.dumps(options).encode() + b"\0")
+    return digest
+
+
+def compute_cache_key(data: Any, options: Optional[List[Any]] = None) -> str:
+    """
+    Calcula a chave de cache de um PDF em memória.
+    
+    Args:
+        data: Conteúdo do PDF (bytes ou qualquer buffer, ex: memoryview)
+        options: Opções do parser que alteram o resultado (ver
+            pdf_parser.output_options; None usa as do parser padrão)
+    
+    Returns:
+        str: Hash SHA-256 (hex) do conteúdo, da versão do parser e das opções
+    """
+    digest = _key_digest(options)
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def compute_file_cache_key(pdf_path: str, options: Optional[List[Any]] = None) -> str:
+    """
+    Calcula a chave de cache de um PDF em disco, lendo em blocos.
+    
+    Args:
+        pdf_path: Caminho do PDF
+        options: Opções do parser que alteram o resultado (ver compute_cache_key)
+    
+    Returns:
+        str: Mesma chave que compute_cache_key geraria para o conteúdo
+    """
+    digest = _key_digest(options)
+    with open(pdf_path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Cache persistente de resultados com descarte LRU por tamanho total."""
+    
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Inicializa o cache.
+        
+        Args:
+            directory: Diretório dos arquivos de cache (criado se não existir)
+            max_bytes: Tamanho máximo somado das entradas
+        """
+        self.directory = Path(directory or DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+    
+    def _path(self, key: str) -> Path:
+        """Caminho do arquivo de uma entrada."""
+        return self.directory / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca um resultado no cache.
+        
+        Args:
+            key: Chave gerada por compute_cache_key
+        
+        Returns:
+            O resultado armazenado, ou None se não existir
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fp:
+                result = json.load(fp)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Entrada corrompida é descartada e tratada como ausente
+            self._remove(path)
+            return None
+        
+        # Atualiza o horário de acesso usado pelo descarte LRU
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+    
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """
+        Armazena um resultado e descarta entradas antigas se necessário.
+        
+        Args:
+            key: Chave gerada por compute_cache_key
+            result: Resultado serializável em JSON
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fp:
+                json.dump(result, fp, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            self._remove(Path(tmp_path))
+            raise
+        
+        self._evict()
+    
+    def clear(self) -> None:
+        """Remove todas as entradas do cache."""
+        for path in self.directory.glob("*.json"):
+            self._remove(path)
+    
+    def size_bytes(self) -> int:
+        """
+        Calcula o tamanho total ocupado pelas entradas.
+        
+        Returns:
+            int: Soma dos tamanhos em bytes
+        """
+        return sum(size for _, size, _ in self._entries())
+    
+    def _entries(self):
+        """Lista (caminho, tamanho, último acesso) de cada entrada."""
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+    
+    def _evict(self) -> None:
+        """Descarta as entradas menos usadas até caber no limite."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            self._remove(path)
+            total -= size
+            if total <= self.max_bytes:
+                break
+    
+    @staticmethod
+    def _remove(path: Path) -> None:
+        """Remove um arquivo ignorando se já não existir."""
+        try:
+            path.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,467 @@
+"""
+Serviço HTTP de extração de totais de PDFs de Guias Geradas.
+
+Recebe o PDF por POST e devolve o mesmo JSON da seção "Resumo JSON" do
+app. As extrações rodam em um pool limitado de processos: quando todas as
+vagas estão ocupadas o serviço responde 429 em vez de enfileirar sem fim.
+
+Uso:
+    python service.py --port 8080 --workers 4
+
+Rotas:
+    POST /extrair   corpo = PDF (application/pdf) ou multipart/form-data
+                    parâmetros opcionais: ?arquivo=nome.pdf&engine=fast
+                    &guia=0024102419 (inclui as linhas dessa guia no resumo)
+                    &periodo=2026-03 (período de referência no histórico)
+    GET  /historico arquivos e totais por cartório já processados:
+                    ?periodo=2026-03&cartorio=Nome, ?hash=<sha256> ou ?guia=...
+    GET  /saude     estado do serviço e profundidade da fila
+
+Tempo limite: o prazo de cada extração (--timeout, contado desde a chegada
+do PDF) também é repassado ao parser no processo do pool. Ao esgotar, a
+requisição recebe 504 e o processo para antes da página seguinte, liberando
+a vaga; só uma página que já começou vai até o fim. Assim PDFs muito
+grandes não ocupam o pool depois de a requisição desistir.
+
+Respostas de erro:
+    400 requisição inválida ou corpo que não é PDF
+    404 rota não encontrada, histórico desativado ou hash não registrado
+    411 sem Content-Length
+    413 PDF acima do limite de tamanho
+    422 PDF que não pôde ser lido
+    429 pool saturado (tente novamente depois)
+    504 extração acima do limite de tempo
+"""
+import argparse
+import asyncio
+import email.policy
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from email.parser import BytesParser
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from history_store import DEFAULT_HISTORY_PATH, HistoryStore, file_hash, parse_period
+from memory_budget import DEFAULT_MEMORY_BUDGET_MB
+from pdf_parser import ENGINES
+from pipeline import process_pdf, build_summary
+from result_cache import DEFAULT_CACHE_DIR, ResultCache
+
+
+# Limites padrão, configuráveis por variável de ambiente
+DEFAULT_MAX_UPLOAD_MB = int(os.environ.get("FIRC_MAX_UPLOAD_MB", "200"))
+DEFAULT_TIMEOUT_S = float(os.environ.get("FIRC_REQUEST_TIMEOUT_S", "120"))
+
+# Tempo máximo para receber cabeçalhos e corpo de uma requisição
+READ_TIMEOUT_S = 30
+
+# Vagas por processo: uma em execução e uma aguardando
+PENDING_PER_WORKER = 2
+
+
+class HTTPError(Exception):
+    """Erro que vira uma resposta HTTP com corpo JSON {"erro": ...}."""
+    
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _extract_summary(
+    data: bytes, filename: str, engine: str, cache_dir: Optional[str],
+    guia: Optional[str] = None, history_path: Optional[str] = None,
+    periodo: Optional[str] = None, deadline: Optional[float] = None
+) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Processa um PDF em um processo do pool.
+    
+    Args:
+        data: Conteúdo do PDF
+        filename: Nome exibido no resumo
+        engine: Motor de extração do parser
+        cache_dir: Diretório do cache de resultados (None desativa)
+        guia: Número de uma guia cujas linhas entram no resumo (opcional)
+        history_path: Histórico SQLite onde o resultado é registrado (None
+            não registra)
+        periodo: Período de referência do relatório no histórico (AAAA-MM)
+        deadline: Prazo da extração (instante de time.time()), repassado ao
+            parser para que ele pare ao esgotar o tempo da requisição
+    
+    Returns:
+        Tupla (resumo como em build_summary, mensagem de erro ou None); se
+        o registro no histórico falhar, o resumo traz "erro_historico"
+    """
+    cache = ResultCache(cache_dir) if cache_dir else None
+    # Caches de cada página liberados logo após a extração: PDFs grandes
+    # não fazem a memória do processo crescer com o número de páginas
+    processed = process_pdf(
+        data, cache=cache, engine=engine, low_memory=True,
+        memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, deadline=deadline
+    )
+    summary = build_summary(
+        filename, processed["totals"], processed["extracted_data"],
+        processed["por_cartorio"]
+    )
+    if guia is not None:
+        summary["guia"] = {
+            "numero": guia,
+            "linhas": [row.to_dict() for row in processed["records"].find_guia(guia)],
+        }
+    if history_path is not None and not processed["error"]:
+        # Falha ao gravar o histórico não invalida a extração
+        try:
+            with HistoryStore(history_path) as store:
+                store.record_result(processed, file_hash(data), filename, periodo)
+        except Exception as e:
+            summary["erro_historico"] = str(e)
+    return summary, processed["error"]
+
+
+def _pdf_from_multipart(content_type: str, body: bytes) -> Tuple[bytes, Optional[str]]:
+    """
+    Extrai o arquivo de um corpo multipart/form-data.
+    
+    Args:
+        content_type: Cabeçalho Content-Type (com o boundary)
+        body: Corpo da requisição
+    
+    Returns:
+        Tupla (conteúdo do arquivo, nome do arquivo ou None)
+    """
+    message = BytesParser(policy=email.policy.HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+    )
+    for part in message.iter_parts():
+        if part.get_filename() or part.get_content_type() == "application/pdf":
+            return part.get_payload(decode=True), part.get_filename()
+    raise HTTPError(400, "nenhum arquivo encontrado no formulário")
+
+
+class ExtractionService:
+    """Servidor HTTP assíncrono com pool de processos limitado."""
+    
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        max_bytes: int = DEFAULT_MAX_UPLOAD_MB * 1024 * 1024,
+        timeout: float = DEFAULT_TIMEOUT_S,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+        history_path: Optional[str] = None
+    ):
+        """
+        Inicializa o serviço.
+        
+        Args:
+            workers: Processos de extração (None usa todos os núcleos)
+            max_pending: Extrações aceitas ao mesmo tempo, em execução ou
+                aguardando um processo (padrão: 2 por processo)
+            max_bytes: Tamanho máximo do PDF enviado
+            timeout: Tempo máximo da extração, em segundos (a requisição
+                recebe 504 e o processo do pool para na página seguinte)
+            cache_dir: Diretório do cache de resultados (None desativa)
+            history_path: Histórico SQLite onde cada extração é registrada e
+                que GET /historico consulta (None desativa)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * PENDING_PER_WORKER
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.history_path = history_path
+        self.history: Optional[HistoryStore] = None
+        self.in_flight = 0
+        self.executor: Optional[ProcessPoolExecutor] = None
+    
+    def health(self) -> Dict[str, Any]:
+        """Estado do serviço exposto em GET /saude."""
+        return {
+            "status": "ok",
+            "processos": self.workers,
+            "em_andamento": self.in_flight,
+            "fila": max(0, self.in_flight - self.workers),
+            "capacidade": self.max_pending,
+            "max_mb": round(self.max_bytes / 1024 / 1024, 1),
+            "timeout_s": self.timeout,
+        }
+    
+    def query_history(self, query: Dict[str, List[str]]) -> Any:
+        """
+        Consulta o histórico (GET /historico).
+        
+        Args:
+            query: Parâmetros da URL: "hash" (um arquivo), "guia" (linhas da
+                guia em todos os arquivos) ou "periodo" e "cartorio" (filtros)
+        
+        Returns:
+            Arquivo com subtotais, lista de linhas ou {"arquivos", "por_cartorio"}
+        
+        Raises:
+            HTTPError: 404 sem histórico ou hash não registrado, 400 se o
+                período é inválido
+        """
+        if self.history is None:
+            raise HTTPError(404, "histórico desativado")
+        
+        def param(name: str) -> Optional[str]:
+            return query.get(name, [None])[0]
+        
+        # Consultas pelos índices levam milissegundos: rodam no próprio laço
+        # de eventos, sem ocupar uma vaga do pool de extração
+        if param("hash"):
+            found = self.history.get_file(param("hash"))
+            if found is None:
+                raise HTTPError(404, "arquivo não registrado no histórico")
+            return found
+        if param("guia"):
+            return {"guia": param("guia"), "linhas": self.history.find_guia(param("guia"))}
+        try:
+            return {
+                "arquivos": self.history.files(param("periodo")),
+                "por_cartorio": self.history.cartorio_totals(param("cartorio"), param("periodo")),
+            }
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+    
+    async def extract(
+        self, data: bytes, filename: str, engine: str, guia: Optional[str] = None,
+        periodo: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Extrai os totais de um PDF no pool, respeitando vagas e tempo limite.
+        
+        Args:
+            data: Conteúdo do PDF
+            filename: Nome exibido no resumo
+            engine: Motor de extração do parser
+            guia: Número de uma guia cujas linhas entram no resumo (opcional)
+            periodo: Período de referência no histórico (AAAA-MM, opcional)
+        
+        Returns:
+            Dict com o resumo (mesmo formato do "Resumo JSON" do app)
+        
+        Raises:
+            HTTPError: 429 se o pool está saturado, 504 se o tempo acabar,
+                422 se o PDF não pôde ser lido
+        """
+        if self.in_flight >= self.max_pending:
+            raise HTTPError(429, "serviço ocupado, tente novamente em instantes")
+        
+        # A vaga só é liberada quando o processo termina de fato; com o
+        # prazo repassado ao parser, isso acontece logo depois do tempo
+        # limite, na página seguinte, mesmo que a requisição já tenha desistido
+        self.in_flight += 1
+        deadline = time.time() + self.timeout
+        future = asyncio.get_running_loop().run_in_executor(
+            self.executor, _extract_summary, data, filename, engine, self.cache_dir, guia,
+            self.history_path, periodo, deadline
+        )
+        future.add_done_callback(self._release)
+        
+        try:
+            summary, error = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(504, f"extração excedeu {self.timeout:g} s")
+        
+        if error and time.time() >= deadline:
+            # O parser parou pelo prazo pouco antes de wait_for desistir
+            raise HTTPError(504, f"extração excedeu {self.timeout:g} s")
+        if error:
+            raise HTTPError(422, f"não foi possível ler o PDF: {error}")
+        return summary
+    
+    def _release(self, _future: Any) -> None:
+        """Libera a vaga de uma extração concluída."""
+        self.in_flight -= 1
+    
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Atende uma conexão: lê uma requisição e envia a resposta."""
+        status, payload, headers = 200, None, {}
+        try:
+            method, path, query, request_headers = await self._read_head(reader)
+            
+            if path == "/saude":
+                if method != "GET":
+                    raise HTTPError(405, "use GET")
+                payload = self.health()
+            elif path == "/historico":
+                if method != "GET":
+                    raise HTTPError(405, "use GET")
+                payload = self.query_history(query)
+            elif path == "/extrair":
+                if method != "POST":
+                    raise HTTPError(405, "use POST")
+                data, filename = await self._read_pdf(reader, request_headers)
+                engine = query.get("engine", ["default"])[0]
+                if engine not in ENGINES:
+                    raise HTTPError(400, f"motor desconhecido: {engine}")
+                filename = query.get("arquivo", [filename or "documento.pdf"])[0]
+                guia = query.get("guia", [None])[0]
+                periodo = query.get("periodo", [None])[0]
+                if periodo is not None:
+                    try:
+                        periodo = parse_period(periodo)
+                    except ValueError as e:
+                        raise HTTPError(400, str(e))
+                payload = await self.extract(data, filename, engine, guia, periodo)
+            else:
+                raise HTTPError(404, "rota não encontrada")
+        except HTTPError as e:
+            status, payload = e.status, {"erro": e.message}
+            if e.status == 429:
+                headers["Retry-After"] = "1"
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+            status, payload = 400, {"erro": "requisição incompleta"}
+        except asyncio.LimitOverrunError:
+            status, payload = 431, {"erro": "cabeçalhos grandes demais"}
+        except Exception as e:
+            status, payload = 500, {"erro": str(e)}
+        
+        await self._send(writer, status, payload, headers)
+    
+    async def _read_head(self, reader: asyncio.StreamReader):
+        """Lê a linha de requisição e os cabeçalhos."""
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), READ_TIMEOUT_S)
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "linha de requisição inválida")
+        
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        
+        path, _, query = target.partition("?")
+        return method, path, parse_qs(query), headers
+    
+    async def _read_pdf(
+        self, reader: asyncio.StreamReader, headers: Dict[str, str]
+    ) -> Tuple[bytes, Optional[str]]:
+        """Lê o corpo (PDF direto ou multipart) respeitando o limite de tamanho."""
+        if "content-length" not in headers:
+            raise HTTPError(411, "envie o cabeçalho Content-Length")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise HTTPError(400, "Content-Length inválido")
+        if length > self.max_bytes:
+            raise HTTPError(413, f"PDF acima do limite de {self.max_bytes // 1024 // 1024} MB")
+        
+        body = await asyncio.wait_for(reader.readexactly(length), READ_TIMEOUT_S)
+        
+        filename = None
+        content_type = headers.get("content-type", "")
+        if content_type.startswith("multipart/form-data"):
+            body, filename = _pdf_from_multipart(content_type, body)
+        
+        if b"%PDF" not in body[:1024]:
+            raise HTTPError(400, "o conteúdo enviado não é um PDF")
+        return body, filename
+    
+    @staticmethod
+    async def _send(
+        writer: asyncio.StreamWriter, status: int, payload: Any, headers: Dict[str, str]
+    ) -> None:
+        """Envia uma resposta JSON e fecha a conexão."""
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        lines = [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            "Connection: close",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        try:
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        """
+        Cria o pool de processos e começa a aceitar conexões.
+        
+        Args:
+            host: Endereço de escuta
+            port: Porta (0 escolhe uma livre)
+        
+        Returns:
+            Servidor asyncio (server.sockets[0].getsockname() traz a porta)
+        """
+        if self.history_path is not None:
+            # Cria o banco antes dos processos, que só gravam nele
+            self.history = HistoryStore(self.history_path)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        # Cria os processos antes de aceitar conexões: com "fork" eles
+        # herdariam o socket do primeiro cliente e a conexão não fecharia
+        await asyncio.get_running_loop().run_in_executor(self.executor, os.getpid)
+        return await asyncio.start_server(self.handle, host, port)
+    
+    def close(self) -> None:
+        """Encerra o pool, cancelando extrações que ainda não começaram."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+
+
+async def serve(service: ExtractionService, host: str, port: int) -> None:
+    """Executa o serviço até ser interrompido."""
+    server = await service.start(host, port)
+    address = server.sockets[0].getsockname()
+    print(f"Serviço de extração em http://{address[0]}:{address[1]}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Ponto de entrada do serviço."""
+    parser = argparse.ArgumentParser(description="Serviço HTTP de extração de totais FIRC.")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço de escuta")
+    parser.add_argument("--port", type=int, default=8080, help="porta")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processos de extração (padrão: núcleos)")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="extrações aceitas ao mesmo tempo (padrão: 2 por processo)")
+    parser.add_argument("--max-mb", type=float, default=DEFAULT_MAX_UPLOAD_MB,
+                        help="tamanho máximo do PDF, em MB")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_S,
+                        help="tempo máximo por extração, em segundos")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="não consulta nem grava o cache de resultados")
+    parser.add_argument("--no-history", action="store_true",
+                        help="não registra as extrações no histórico (FIRC_HISTORY_DB)")
+    args = parser.parse_args(argv)
+    
+    service = ExtractionService(
+        workers=args.workers,
+        max_pending=args.max_pending,
+        max_bytes=int(args.max_mb * 1024 * 1024),
+        timeout=args.timeout,
+        cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR,
+        history_path=None if args.no_history else DEFAULT_HISTORY_PATH
+    )
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
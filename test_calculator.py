@@ -2,8 +2,14 @@
 Testes unitários para os módulos da Calculadora FIRC.
 """
 import unittest
-from data_processor import clean_monetary_value, validate_decimal
-from calculator import FinancialCalculator
+from data_processor import (
+    clean_monetary_value,
+    parse_centavos,
+    parse_centavos_batch,
+    sum_centavos,
+    validate_decimal,
+)
+from calculator import FinancialCalculator, GroupedTotals, SEM_CARTORIO
 
 
 class TestDataProcessor(unittest.TestCase):
@@ -51,6 +57,25 @@ class TestDataProcessor(unittest.TestCase):
         self.assertTrue(validate_decimal(0))
         self.assertTrue(validate_decimal(0.0))
         self.assertFalse(validate_decimal("123"))
+    
+    def test_parse_centavos_matches_clean_monetary_value(self):
+        """Testa que a conversão em lote segue as regras de clean_monetary_value."""
+        values = [
+            "R$ 1.234,56", "R$234,50", "234,5", "1234.56", "100", "1.234",
+            None, "", "   ", "abc", "R$ xyz", 1234.56, 100, "-1,00",
+        ]
+        expected = [round(clean_monetary_value(value) * 100) for value in values]
+        self.assertEqual(parse_centavos_batch(values), expected)
+    
+    def test_parse_centavos_single_value(self):
+        """Testa a conversão de um único valor para centavos."""
+        self.assertEqual(parse_centavos("R$ 1.000.000,01"), 100000001)
+        self.assertEqual(parse_centavos("nan"), 0)
+    
+    def test_sum_centavos_is_exact(self):
+        """Testa que a soma em centavos não acumula erro de ponto flutuante."""
+        self.assertEqual(sum_centavos(["0,10", "0,20"] * 50000), 1500000)
+        self.assertEqual(sum_centavos(iter(["99.999.999.999,99", "0,01"])), 10000000000000)
 
 
 class TestFinancialCalculator(unittest.TestCase):
@@ -106,6 +131,64 @@ class TestFinancialCalculator(unittest.TestCase):
         
         self.assertEqual(calculator.total_valor_pago, 0.0)
         self.assertEqual(calculator.total_cartorio, 0.0)
+    
+    def test_incremental_totals_match_batch(self):
+        """Testa que totalizar página a página dá o mesmo resultado."""
+        pages = [
+            {"pagina": 1, "valor_pago": ["301,61", "985,92"], "cartorio": ["215,44"]},
+            {"pagina": 2, "valor_pago": ["9.151,22"], "cartorio": ["713,27", "6.605,64"]},
+        ]
+        batch = FinancialCalculator().calculate_totals({
+            "valor_pago": ["301,61", "985,92", "9.151,22"],
+            "cartorio": ["215,44", "713,27", "6.605,64"]
+        })
+        
+        calculator = FinancialCalculator()
+        self.assertEqual(calculator.calculate_totals_from_pages(iter(pages)), batch)
+        self.assertEqual(calculator.count_valor_pago, 3)
+        self.assertEqual(calculator.count_cartorio, 3)
+    
+    def test_update_returns_partial_totals(self):
+        """Testa que cada atualização devolve os totais parciais."""
+        calculator = FinancialCalculator()
+        partial = calculator.update({"valor_pago": ["100,00"], "cartorio": []})
+        self.assertEqual(partial["total_valor_pago"], 100.0)
+        
+        partial = calculator.update({"valor_pago": ["50,50"], "cartorio": ["10,00"]})
+        self.assertEqual(partial["total_valor_pago"], 150.5)
+        self.assertEqual(partial["total_cartorio"], 10.0)
+
+
+class TestGroupedTotals(unittest.TestCase):
+    """Testes para os subtotais por cartório."""
+    
+    ROWS = [
+        {"cartorio": "Serventia A", "valor_pago": "301,61", "valor_cartorio": "215,44"},
+        {"cartorio": "Serventia B", "valor_pago": "985,92", "valor_cartorio": "713,27"},
+        {"cartorio": "Serventia A", "valor_pago": "100,00", "valor_cartorio": None},
+        {"cartorio": "", "valor_pago": "1,00", "valor_cartorio": "abc"},
+    ]
+    
+    def test_groups_by_cartorio(self):
+        """Testa a soma do Valor Pago agrupado por cartório."""
+        grouped = FinancialCalculator().calculate_grouped(self.ROWS)
+        self.assertEqual(grouped, [
+            {"cartorio": SEM_CARTORIO, "total_valor_pago": 1.0, "total_cartorio": 0.0, "quantidade": 1},
+            {"cartorio": "Serventia A", "total_valor_pago": 401.61, "total_cartorio": 215.44, "quantidade": 2},
+            {"cartorio": "Serventia B", "total_valor_pago": 985.92, "total_cartorio": 713.27, "quantidade": 1},
+        ])
+    
+    def test_merge_equals_single_pass(self):
+        """Testa que combinar partes dá o mesmo resultado que agregar tudo."""
+        whole = GroupedTotals()
+        whole.add_rows(self.ROWS)
+        
+        first, second = GroupedTotals(), GroupedTotals()
+        first.add_rows(self.ROWS[:2])
+        second.add_rows(self.ROWS[2:])
+        merged = GroupedTotals.from_list(first.to_list()).merge(second)
+        
+        self.assertEqual(merged.to_list(), whole.to_list())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,142 @@
+"""
+Testes unitários para os checkpoints de extração.
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+from benchmarks.synthetic_pdf import write_report
+from checkpoint import CheckpointStore
+import file_lock
+from file_lock import FileLock
+from pdf_parser import PDFFinancialParser
+from pipeline import process_pdf, source_cache_key
+
+
+class TestCheckpointStore(unittest.TestCase):
+    """Testes para gravação e retomada de extrações interrompidas."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.pdf_path = os.path.join(cls.tmp_dir.name, "guias.pdf")
+        write_report(cls.pdf_path, 8, rows_per_page=5)
+        cls.key = source_cache_key(cls.pdf_path)
+        cls.expected = process_pdf(cls.pdf_path)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+    
+    def setUp(self):
+        self.checkpoint_dir = tempfile.TemporaryDirectory()
+        self.store = CheckpointStore(self.checkpoint_dir.name, every=2)
+    
+    def tearDown(self):
+        self.checkpoint_dir.cleanup()
+    
+    def _interrupt_after(self, pages):
+        """Simula um processo morto depois de extrair algumas páginas."""
+        parser = PDFFinancialParser(self.pdf_path)
+        run = self.store.resume(parser, self.key)
+        for _ in range(pages):
+            next(run)
+        path = self.store._path(self.key, parser)
+        with open(path, "rb") as fp:
+            saved = fp.read()
+        run.close()
+        # Sem o bloco finally (processo morto), com a última linha pela metade
+        with open(path, "wb") as fp:
+            fp.write(saved + b'{"pagina": 5, "cartorio": ["1')
+        return path
+    
+    def test_resumed_run_matches_uninterrupted_run(self):
+        """Testa que a execução retomada tem o mesmo resultado."""
+        path = self._interrupt_after(5)
+        
+        resumed = process_pdf(self.pdf_path, checkpoints=self.store, collect_metrics=True)
+        
+        for key in ("extracted_data", "totals", "rows", "por_cartorio"):
+            self.assertEqual(resumed[key], self.expected[key])
+        self.assertEqual(resumed["metricas"]["contadores"]["paginas_retomadas"], 4)
+        self.assertEqual(resumed["metricas"]["contadores"]["paginas_processadas"], 4)
+        self.assertFalse(os.path.exists(path))
+        # Nem o checkpoint nem a trava ficam no diretório
+        self.assertEqual(os.listdir(self.checkpoint_dir.name), [])
+    
+    def test_partial_checkpoint_is_truncated_to_last_full_page(self):
+        """Testa que a linha incompleta é descartada ao retomar."""
+        path = self._interrupt_after(3)
+        pages = CheckpointStore._load(path)
+        
+        self.assertEqual([page["pagina"] for page in pages], [1, 2])
+        with open(path, "rb") as fp:
+            self.assertTrue(fp.read().endswith(b"\n"))
+    
+    def test_concurrent_writers_do_not_interleave(self):
+        """Testa que uma segunda execução do mesmo PDF não grava no checkpoint em uso."""
+        first = PDFFinancialParser(self.pdf_path)
+        run = self.store.resume(first, self.key)
+        for _ in range(3):
+            next(run)
+        path = self.store._path(self.key, first)
+        with open(path, "rb") as fp:
+            saved = fp.read()
+        
+        second = process_pdf(self.pdf_path, checkpoints=self.store)
+        self.assertEqual(second["totals"], self.expected["totals"])
+        with open(path, "rb") as fp:
+            self.assertEqual(fp.read(), saved)
+        
+        remaining = list(run)
+        self.assertEqual([page["pagina"] for page in remaining], [4, 5, 6, 7, 8])
+        self.assertFalse(os.path.exists(path))
+        
+        # O checkpoint segue válido para quem retomar depois
+        self._interrupt_after(5)
+        resumed = process_pdf(self.pdf_path, checkpoints=self.store)
+        self.assertEqual(resumed["rows"], self.expected["rows"])
+        self.assertEqual(os.listdir(self.checkpoint_dir.name), [])
+    
+    def test_lock_of_deleted_file_is_not_kept(self):
+        """Testa que a trava obtida sobre um arquivo já apagado é refeita no arquivo atual."""
+        lock_path = os.path.join(self.checkpoint_dir.name, "x.lock")
+        calls = []
+        
+        def unlink_then_lock(fd, blocking):
+            # O dono anterior apaga a trava entre o open e o lock
+            if not calls:
+                os.unlink(lock_path)
+            calls.append(fd)
+            real_lock(fd, blocking)
+        
+        real_lock = file_lock._lock
+        lock = FileLock(lock_path)
+        with mock.patch("file_lock._lock", unlink_then_lock):
+            self.assertTrue(lock.acquire(blocking=False))
+        try:
+            self.assertEqual(len(calls), 2)
+            self.assertTrue(os.path.samestat(os.fstat(lock._fd), os.stat(lock_path)))
+        finally:
+            lock.unlink()
+            lock.release()
+        self.assertFalse(os.path.exists(lock_path))
+    
+    def test_engine_change_does_not_reuse_checkpoint(self):
+        """Testa que outras opções do parser usam outro checkpoint."""
+        parser = PDFFinancialParser(self.pdf_path)
+        other = PDFFinancialParser(self.pdf_path, engine="single_pass")
+        self.assertNotEqual(self.store._path(self.key, parser),
+                            self.store._path(self.key, other))
+    
+    def test_parallel_extraction_starts_at_first_page(self):
+        """Testa que o modo paralelo também pula as páginas já extraídas."""
+        parser = PDFFinancialParser(
+            self.pdf_path, workers=2, min_pages_parallel=2, first_page=6
+        )
+        pages = [page["pagina"] for page in parser.iter_pages()]
+        self.assertEqual(pages, [6, 7, 8])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Testes unitários para o processamento em lote pela linha de comando.
+"""
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from benchmarks.synthetic_pdf import write_report
+from cli import EXIT_FAILURES, EXIT_NO_INPUT, collect_pdf_paths, main
+
+
+class TestCollectPdfPaths(unittest.TestCase):
+    """Testes para a expansão de arquivos, globs e diretórios."""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        root = self.tmp_dir.name
+        os.makedirs(os.path.join(root, "marco"))
+        for name in ("a.pdf", "b.PDF", "notas.txt", os.path.join("marco", "c.pdf")):
+            with open(os.path.join(root, name), "wb") as fp:
+                fp.write(b"%PDF")
+        self.root = root
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def _names(self, paths):
+        return [os.path.relpath(path, self.root) for path in paths]
+    
+    def test_directory_lists_only_pdfs(self):
+        """Testa que diretórios trazem apenas PDFs do primeiro nível."""
+        self.assertEqual(self._names(collect_pdf_paths([self.root])), ["a.pdf", "b.PDF"])
+    
+    def test_recursive_directory(self):
+        """Testa a busca recursiva em subdiretórios."""
+        paths = collect_pdf_paths([self.root], recursive=True)
+        self.assertIn(os.path.join("marco", "c.pdf"), self._names(paths))
+    
+    def test_glob_and_duplicates(self):
+        """Testa padrões glob sem repetir arquivos."""
+        a_pdf = os.path.join(self.root, "a.pdf")
+        paths = collect_pdf_paths([os.path.join(self.root, "*.pdf"), a_pdf])
+        self.assertEqual(self._names(paths), ["a.pdf"])
+
+
+class TestMain(unittest.TestCase):
+    """Testes para os códigos de saída e a saída JSON Lines."""
+    
+    def _run(self, argv):
+        out = io.StringIO()
+        with redirect_stdout(out), redirect_stderr(io.StringIO()):
+            code = main(argv)
+        return code, [json.loads(line) for line in out.getvalue().splitlines()]
+    
+    def test_no_input_files(self):
+        """Testa o código de saída quando nenhum PDF é encontrado."""
+        code, lines = self._run(["/caminho/inexistente", "--no-cache"])
+        self.assertEqual(code, EXIT_NO_INPUT)
+        self.assertEqual(lines, [])
+    
+    def test_invalid_pdf_is_reported(self):
+        """Testa que arquivos inválidos geram linha de erro e código 1."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "ruim.pdf")
+            with open(path, "wb") as fp:
+                fp.write(b"isto nao e um pdf")
+            code, lines = self._run([path, "--no-cache", "--jobs", "1"])
+        
+        self.assertEqual(code, EXIT_FAILURES)
+        self.assertEqual(lines[0]["status"], "erro")
+        self.assertEqual(lines[-1]["falhas"], 1)
+        self.assertEqual(lines[-1]["total_geral"]["total_valor_pago"], 0)
+    
+    def test_memory_budget_marks_file_as_failed(self):
+        """Testa que o limite de memória excedido vira linha de erro."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "guias.pdf")
+            write_report(path, 3, rows_per_page=4)
+            code, lines = self._run(
+                [path, "--no-cache", "--jobs", "1", "--low-memory", "--memory-budget", "1"]
+            )
+        
+        self.assertEqual(code, EXIT_FAILURES)
+        self.assertIn("limite de memória", lines[0]["erro"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Testes unitários para a exportação das linhas de guia.
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from benchmarks.synthetic_pdf import write_report
+from exporters import EXPORT_COLUMNS, export_rows, iter_row_chunks, parquet_available
+from pdf_parser import PDFFinancialParser
+
+
+class TestExporters(unittest.TestCase):
+    """Testes para CSV, JSON Lines e Parquet a partir do parser e do RecordStore."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.pdf_path = os.path.join(cls.tmp_dir.name, "guias.pdf")
+        cls.expected = write_report(cls.pdf_path, 4, rows_per_page=7)
+        cls.records = PDFFinancialParser(cls.pdf_path).extract_records()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+    
+    def _path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+    
+    def test_csv_has_every_row_and_exact_totals(self):
+        """Testa que o CSV traz todas as linhas, com os valores em centavos exatos."""
+        count = export_rows(self.records, self._path("linhas.csv"))
+        
+        with open(self._path("linhas.csv"), encoding="utf-8", newline="") as fp:
+            rows = list(csv.DictReader(fp))
+        self.assertEqual(count, len(self.expected["linhas"]))
+        self.assertEqual(tuple(rows[0]), EXPORT_COLUMNS)
+        self.assertEqual(
+            [row["guia"] for row in rows], [row["guia"] for row in self.expected["linhas"]]
+        )
+        self.assertEqual(
+            sum(Decimal(row["valor_pago"]) for row in rows) * 100,
+            self.expected["total_valor_pago_centavos"]
+        )
+        self.assertEqual(
+            sum(Decimal(row["valor_cartorio"]) for row in rows) * 100,
+            self.expected["total_cartorio_centavos"]
+        )
+    
+    def test_parser_stream_matches_record_store(self):
+        """Testa que exportar direto de iter_rows() dá o mesmo arquivo do RecordStore."""
+        for fmt in ("csv", "jsonl"):
+            export_rows(self.records, self._path(f"registros.{fmt}"))
+            # Blocos pequenos: várias gravações parciais
+            export_rows(
+                PDFFinancialParser(self.pdf_path).iter_rows(), self._path(f"parser.{fmt}"),
+                chunk_rows=3
+            )
+            with open(self._path(f"registros.{fmt}"), "rb") as a, \
+                    open(self._path(f"parser.{fmt}"), "rb") as b:
+                self.assertEqual(a.read(), b.read())
+    
+    def test_jsonl_to_binary_file(self):
+        """Testa a gravação em um arquivo binário aberto, que continua aberto."""
+        buffer = io.BytesIO()
+        count = export_rows(self.records, buffer, "jsonl")
+        
+        lines = buffer.getvalue().decode("utf-8").splitlines()
+        self.assertFalse(buffer.closed)
+        self.assertEqual(len(lines), count)
+        first = json.loads(lines[0])
+        self.assertEqual(list(first), list(EXPORT_COLUMNS))
+        self.assertEqual(first["guia"], self.records[0].guia)
+        self.assertIsInstance(first["valor_pago"], float)
+    
+    def test_missing_values_and_chunks(self):
+        """Testa valores ausentes e o tamanho dos blocos."""
+        rows = [
+            {"pagina": 1, "linha": n, "origem": "tabela", "guia": None,
+             "cartorio": "1º Ofício", "valor_pago": None, "valor_cartorio": "R$ 7,00"}
+            for n in range(1, 6)
+        ]
+        chunks = list(iter_row_chunks(rows, chunk_rows=2))
+        
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(chunks[0][0], (1, 1, None, "1º Ofício", None, 700, "tabela"))
+        
+        output = io.BytesIO()
+        export_rows(rows, output, "csv")
+        self.assertIn("1,1,,1º Ofício,,7.00,tabela", output.getvalue().decode("utf-8"))
+    
+    def test_unknown_format_is_rejected(self):
+        """Testa que formatos desconhecidos são recusados."""
+        with self.assertRaises(ValueError):
+            export_rows(self.records, self._path("linhas.xlsx"))
+    
+    def test_parquet(self):
+        """Testa o Parquet (só com pyarrow instalado)."""
+        if not parquet_available():
+            with self.assertRaises(ImportError):
+                export_rows(self.records, self._path("linhas.parquet"))
+            self.skipTest("pyarrow não instalado")
+        
+        import pyarrow.parquet as pq
+        count = export_rows(self.records, self._path("linhas.parquet"), chunk_rows=10)
+        table = pq.read_table(self._path("linhas.parquet"))
+        
+        self.assertEqual(table.num_rows, count)
+        self.assertEqual(table.column_names, list(EXPORT_COLUMNS))
+        self.assertEqual(
+            sum(table.column("valor_pago").to_pylist()) * 100,
+            self.expected["total_valor_pago_centavos"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
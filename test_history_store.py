@@ -0,0 +1,181 @@
+"""
+Testes unitários para o histórico SQLite dos relatórios processados.
+"""
+import os
+import tempfile
+import unittest
+from benchmarks.synthetic_pdf import write_report
+from history_store import HistoryStore, file_hash, parse_period
+from pipeline import process_pdf, summarize_pdf
+
+
+class TestHistoryStore(unittest.TestCase):
+    """Testes para o registro, as consultas indexadas e a gravação em lote."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.paths = []
+        for name, pages in (("marco.pdf", 3), ("abril.pdf", 4)):
+            path = os.path.join(cls.tmp_dir.name, name)
+            write_report(path, pages, rows_per_page=6)
+            cls.paths.append(path)
+        cls.processed = [process_pdf(path) for path in cls.paths]
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+    
+    def setUp(self):
+        self.store = HistoryStore(os.path.join(self.tmp_dir.name, f"{self.id()}.sqlite3"))
+    
+    def tearDown(self):
+        self.store.close()
+    
+    def _record(self, index, periodo):
+        return self.store.record_result(
+            self.processed[index], file_hash(self.paths[index]),
+            os.path.basename(self.paths[index]), periodo
+        )
+    
+    def test_record_and_get_file(self):
+        """Testa que totais, subtotais e linhas voltam como foram extraídos."""
+        self._record(0, "2026-03")
+        processed = self.processed[0]
+        
+        found = self.store.get_file(file_hash(self.paths[0]))
+        
+        self.assertEqual(found["arquivo"], "marco.pdf")
+        self.assertEqual(found["periodo"], "2026-03")
+        self.assertAlmostEqual(found["total_valor_pago"], processed["totals"]["total_valor_pago"])
+        self.assertAlmostEqual(found["total_cartorio"], processed["totals"]["total_cartorio"])
+        self.assertEqual(
+            found["quantidade_valores_pago"], len(processed["extracted_data"]["valor_pago"])
+        )
+        self.assertEqual(found["por_cartorio"], processed["por_cartorio"])
+        
+        row = processed["records"][0]
+        linhas = self.store.find_guia(row.guia)
+        self.assertEqual(linhas[0]["arquivo"], "marco.pdf")
+        self.assertEqual(linhas[0]["pagina"], row.pagina)
+        self.assertIsNone(self.store.get_file("0" * 64))
+    
+    def test_totals_by_cartorio_and_period(self):
+        """Testa a soma por cartório e período entre vários arquivos."""
+        self._record(0, "2026-03")
+        self._record(1, "2026-04")
+        cartorio = self.processed[0]["por_cartorio"][0]["cartorio"]
+        
+        por_periodo = self.store.cartorio_totals(cartorio=cartorio)
+        marco = self.store.cartorio_totals(cartorio=cartorio, periodo="2026-03")
+        
+        self.assertEqual([item["periodo"] for item in por_periodo], ["2026-03", "2026-04"])
+        self.assertEqual(len(marco), 1)
+        self.assertAlmostEqual(
+            marco[0]["total_cartorio"], self.processed[0]["por_cartorio"][0]["total_cartorio"]
+        )
+        self.assertEqual(marco[0]["arquivos"], 1)
+        self.assertEqual([item["arquivo"] for item in self.store.files("2026-04")], ["abril.pdf"])
+        self.assertIn(cartorio, self.store.cartorios())
+    
+    def test_same_file_replaces_previous_record(self):
+        """Testa que reprocessar o mesmo arquivo substitui o registro e mantém o período."""
+        self._record(0, "2026-03")
+        self._record(0, None)
+        
+        files = self.store.files()
+        self.assertEqual(len(files), 1)
+        self.assertEqual(files[0]["periodo"], "2026-03")
+        guia = self.processed[0]["records"][0].guia
+        self.assertEqual(len(self.store.find_guia(guia)), 1)
+    
+    def test_bulk_rows_in_one_transaction(self):
+        """Testa a gravação de milhares de linhas de guia de uma vez."""
+        rows = [
+            {"pagina": n // 40 + 1, "linha": n % 40 + 1, "origem": "texto", "guia": f"{n:010d}",
+             "cartorio": f"Serventia {n % 25}", "valor_pago": "R$ 10,00",
+             "valor_cartorio": "R$ 7,50"}
+            for n in range(20000)
+        ]
+        self.store.record("a" * 64, "grande.pdf", {"total_valor_pago": 200000.0,
+                          "total_cartorio": 150000.0}, [], rows=rows, periodo="2026-05")
+        
+        linhas = self.store.find_guia("0000012345")
+        self.assertEqual(len(linhas), 1)
+        self.assertEqual(linhas[0]["valor_cartorio"], 7.5)
+        self.assertEqual(linhas[0]["cartorio"], "Serventia 20")
+        # Zeros à esquerda opcionais, como em RecordStore.find_guia
+        self.assertEqual(self.store.find_guia(" 12345 "), linhas)
+        self.assertEqual(linhas[0]["guia"], "0000012345")
+    
+    def test_guia_key_added_to_existing_database(self):
+        """Testa que bancos sem a coluna guia_chave são migrados na abertura."""
+        self._record(0, "2026-03")
+        row = self.processed[0]["records"][0]
+        self.store._conn.executescript(
+            "DROP INDEX linhas_guia_chave;"
+            "ALTER TABLE linhas DROP COLUMN guia_chave;"
+            "CREATE INDEX linhas_guia ON linhas (guia);"
+        )
+        self.store.close()
+        
+        self.store = HistoryStore(self.store.path)
+        linhas = self.store.find_guia(row.guia.lstrip("0"))
+        self.assertEqual([(item["pagina"], item["guia"]) for item in linhas],
+                         [(row.pagina, row.guia)])
+    
+    def test_queries_use_indexes(self):
+        """Testa que as consultas por período, hash, cartório e guia usam índices."""
+        queries = [
+            ("SELECT * FROM arquivos WHERE periodo = ?", ("2026-03",)),
+            ("SELECT * FROM arquivos WHERE hash = ?", ("x",)),
+            ("SELECT * FROM cartorios WHERE cartorio = ? AND periodo = ?", ("x", "2026-03")),
+            ("SELECT * FROM cartorios WHERE periodo = ?", ("2026-03",)),
+            ("SELECT * FROM linhas WHERE guia_chave = ?", ("x",)),
+        ]
+        for query, params in queries:
+            with self.subTest(query=query):
+                plan = " ".join(
+                    row[-1] for row in self.store._conn.execute(
+                        "EXPLAIN QUERY PLAN " + query, params
+                    )
+                )
+                self.assertIn("USING", plan)
+                self.assertNotIn("SCAN", plan)
+    
+    def test_invalid_period(self):
+        """Testa a validação do período de referência."""
+        self.assertEqual(parse_period(" 2026-03 "), "2026-03")
+        for value in ("2026-13", "03/2026", "2026-3"):
+            with self.assertRaises(ValueError):
+                parse_period(value)
+        with self.assertRaises(ValueError):
+            self._record(0, "março")
+        self.assertEqual(self.store.files(), [])
+    
+    def test_summarize_pdf_records_history(self):
+        """Testa o registro feito pela linha de resultado do lote (CLI e app)."""
+        line = summarize_pdf(
+            self.paths[1], "abril.pdf", history=self.store.path, periodo="2026-04"
+        )
+        
+        self.assertEqual(line["status"], "ok")
+        found = self.store.get_file(file_hash(self.paths[1]))
+        self.assertEqual(found["periodo"], "2026-04")
+        self.assertEqual(found["total_valor_pago"], line["total_valor_pago"])
+    
+    def test_history_failure_keeps_extraction_ok(self):
+        """Testa que falhas do histórico não transformam a extração em erro."""
+        line = summarize_pdf(
+            self.paths[0], "marco.pdf", history=self.store.path, periodo="março"
+        )
+        
+        self.assertEqual(line["status"], "ok")
+        self.assertIsNone(line["erro"])
+        self.assertIn("erro_historico", line)
+        self.assertEqual(line["total_valor_pago"], self.processed[0]["totals"]["total_valor_pago"])
+        self.assertEqual(self.store.files(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
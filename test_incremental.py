@@ -0,0 +1,134 @@
+"""
+Testes unitários para o reprocessamento incremental de relatórios reemitidos.
+"""
+import os
+import tempfile
+import unittest
+from benchmarks.synthetic_pdf import write_report
+from incremental import PageResultStore, process_revision
+from pipeline import process_pdf, summarize_pdf
+
+
+ROWS_PER_PAGE = 5
+
+
+def correct_page_3(rows):
+    """Simula a reemissão com um valor corrigido na página 3."""
+    # Linhas da página 3 (a página 1 é a capa)
+    rows[ROWS_PER_PAGE]["valor_pago"] += 10000
+
+
+class TestIncremental(unittest.TestCase):
+    """Testes para impressões digitais, reaproveitamento e totais incrementais."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.original = os.path.join(cls.tmp_dir.name, "original.pdf")
+        cls.revised = os.path.join(cls.tmp_dir.name, "revisado.pdf")
+        write_report(cls.original, 6, rows_per_page=ROWS_PER_PAGE)
+        write_report(cls.revised, 6, rows_per_page=ROWS_PER_PAGE, edit_rows=correct_page_3)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+    
+    def setUp(self):
+        self.store_dir = tempfile.TemporaryDirectory()
+        self.store = PageResultStore(self.store_dir.name)
+    
+    def tearDown(self):
+        self.store_dir.cleanup()
+    
+    def test_first_version_matches_process_pdf(self):
+        """Testa que a primeira versão tem o mesmo resultado de process_pdf."""
+        result = process_revision(self.original, "guias.pdf", self.store)
+        expected = process_pdf(self.original)
+        
+        for key in ("totals", "extracted_data", "rows", "por_cartorio"):
+            self.assertEqual(result[key], expected[key])
+        self.assertFalse(result["revisao"]["versao_anterior"])
+        self.assertEqual(result["revisao"]["paginas_incluidas"], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(result["revisao"]["paginas_reaproveitadas"], 0)
+    
+    def test_revision_extracts_only_changed_pages(self):
+        """Testa que a reemissão só extrai as páginas alteradas."""
+        process_revision(self.original, "guias.pdf", self.store)
+        result = process_revision(self.revised, "guias.pdf", self.store, collect_metrics=True)
+        expected = process_pdf(self.revised)
+        revisao = result["revisao"]
+        
+        # Página 3 (valor corrigido) e página 6 (resumo com os totais)
+        self.assertEqual(revisao["paginas_alteradas"], [3, 6])
+        self.assertEqual(revisao["paginas_reaproveitadas"], 4)
+        self.assertEqual(result["metricas"]["contadores"]["paginas_processadas"], 2)
+        
+        for key in ("totals", "extracted_data", "rows", "por_cartorio"):
+            self.assertEqual(result[key], expected[key])
+        self.assertEqual(revisao["diferenca"]["total_valor_pago"], 100.0)
+        self.assertEqual(revisao["diferenca"]["total_cartorio"], 0.0)
+        page_3 = revisao["por_pagina"][0]
+        self.assertAlmostEqual(
+            page_3["depois"]["total_valor_pago"] - page_3["antes"]["total_valor_pago"], 100.0
+        )
+    
+    def test_unchanged_file_reuses_every_page(self):
+        """Testa que reprocessar o mesmo arquivo não extrai nenhuma página."""
+        first = process_revision(self.original, "guias.pdf", self.store)
+        again = process_revision(self.original, "guias.pdf", self.store, collect_metrics=True)
+        
+        self.assertEqual(again["revisao"]["paginas_alteradas"], [])
+        self.assertEqual(again["revisao"]["paginas_reaproveitadas"], 6)
+        self.assertNotIn("paginas_processadas", again["metricas"]["contadores"])
+        self.assertEqual(again["totals"], first["totals"])
+    
+    def test_shorter_revision_removes_pages(self):
+        """Testa a remoção de páginas e o desconto dos seus valores."""
+        shorter = os.path.join(self.store_dir.name, "curto.pdf")
+        write_report(shorter, 5, rows_per_page=ROWS_PER_PAGE)
+        process_revision(self.original, "guias.pdf", self.store)
+        
+        result = process_revision(shorter, "guias.pdf", self.store)
+        
+        self.assertEqual(result["revisao"]["paginas_removidas"], [6])
+        self.assertEqual(result["totals"], process_pdf(shorter)["totals"])
+    
+    def test_same_content_stream_with_other_xobjects_is_extracted(self):
+        """Testa que páginas que só diferem no Form XObject desenhado não são reaproveitadas."""
+        first = os.path.join(self.store_dir.name, "marco.pdf")
+        second = os.path.join(self.store_dir.name, "abril.pdf")
+        write_report(first, 4, rows_per_page=ROWS_PER_PAGE, form_xobjects=True)
+        write_report(second, 4, seed=7, rows_per_page=ROWS_PER_PAGE, form_xobjects=True)
+        process_revision(first, "marco.pdf", self.store)
+        
+        result = process_revision(second, "abril.pdf", self.store)
+        expected = process_pdf(second)
+        
+        for key in ("totals", "rows", "por_cartorio"):
+            self.assertEqual(result[key], expected[key])
+        # Só a capa (mesmo período e quantidade de linhas) é igual
+        self.assertEqual(result["revisao"]["paginas_reaproveitadas"], 1)
+    
+    def test_store_is_limited_to_max_bytes(self):
+        """Testa o descarte dos resultados por página acima do limite."""
+        process_revision(self.original, "guias.pdf", self.store)
+        self.store.max_bytes = self.store.size_bytes() // 2
+        
+        result = process_revision(self.revised, "guias.pdf", self.store)
+        
+        self.assertLessEqual(self.store.size_bytes(), self.store.max_bytes)
+        self.assertEqual(result["totals"], process_pdf(self.revised)["totals"])
+    
+    def test_summary_line_includes_revision(self):
+        """Testa a linha de resultado do lote com o relatório da revisão."""
+        summarize_pdf(self.original, "guias.pdf", revisions=self.store)
+        line = summarize_pdf(self.revised, "guias.pdf", revisions=self.store, checkpoints=None)
+        
+        self.assertEqual(line["status"], "ok")
+        self.assertEqual(line["revisao"]["paginas_alteradas"], [3, 6])
+        expected = process_pdf(self.revised)["totals"]["total_valor_pago"]
+        self.assertEqual(line["total_valor_pago"], round(expected, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
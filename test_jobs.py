@@ -0,0 +1,155 @@
+"""
+Testes unitários para a extração em segundo plano.
+"""
+import os
+import tempfile
+import unittest
+from benchmarks.synthetic_pdf import write_report
+from jobs import CANCELLED, DONE, FAILED, BatchJob, ExtractionJob
+from pdf_parser import PDFFinancialParser
+from pipeline import process_pdf, summaries_to_csv
+from result_cache import ResultCache, compute_file_cache_key
+
+
+class TestExtractionJob(unittest.TestCase):
+    """Testes para progresso, resultado e cancelamento dos jobs."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.pdf_path = os.path.join(cls.tmp_dir.name, "guias.pdf")
+        write_report(cls.pdf_path, 6, rows_per_page=6)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+    
+    def test_job_matches_process_pdf(self):
+        """Testa que o resultado do job é o mesmo de process_pdf."""
+        job = ExtractionJob(self.pdf_path, "guias.pdf").start()
+        self.assertTrue(job.wait(60))
+        
+        expected = process_pdf(self.pdf_path)
+        self.assertEqual(job.state, DONE)
+        for key in ("totals", "extracted_data", "rows", "por_cartorio"):
+            self.assertEqual(job.result[key], expected[key])
+        
+        progress = job.progress()
+        self.assertEqual(progress["paginas_processadas"], 6)
+        self.assertEqual(progress["total_paginas"], 6)
+        self.assertIsNone(progress["restante_s"])
+        self.assertEqual(progress["totais_parciais"], expected["totals"])
+    
+    def test_job_uses_cache(self):
+        """Testa que o segundo job com o mesmo PDF vem do cache."""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResultCache(cache_dir)
+            key = compute_file_cache_key(self.pdf_path)
+            
+            first = ExtractionJob(self.pdf_path, "guias.pdf", cache=cache, cache_key=key).start()
+            first.wait(60)
+            second = ExtractionJob(self.pdf_path, "guias.pdf", cache=cache, cache_key=key).start()
+            second.wait(60)
+            
+            self.assertFalse(first.result["from_cache"])
+            self.assertTrue(second.result["from_cache"])
+            self.assertEqual(second.result["totals"], first.result["totals"])
+    
+    def test_cancel_before_start(self):
+        """Testa que um job cancelado não lê nenhuma página."""
+        job = ExtractionJob(self.pdf_path, "guias.pdf")
+        job.cancel()
+        job.start().wait(60)
+        
+        self.assertEqual(job.state, CANCELLED)
+        self.assertIsNone(job.result)
+        self.assertEqual(job.progress()["paginas_processadas"], 0)
+    
+    def test_invalid_pdf_fails(self):
+        """Testa que falhas de leitura terminam o job com erro, como em process_pdf."""
+        job = ExtractionJob(b"isto nao e um pdf", "ruim.pdf").start()
+        job.wait(60)
+        
+        self.assertEqual(job.state, FAILED)
+        self.assertTrue(job.error)
+        expected = process_pdf(b"isto nao e um pdf")
+        self.assertEqual(job.result["error"], expected["error"])
+        self.assertEqual(job.result["totals"], expected["totals"])
+    
+    def test_parser_cancel_stops_serial_and_parallel(self):
+        """Testa que cancel() interrompe a extração serial e a paralela."""
+        for workers in (1, 2):
+            parser = PDFFinancialParser(self.pdf_path, workers=workers, min_pages_parallel=2)
+            pages = []
+            for page_result in parser.iter_pages():
+                pages.append(page_result["pagina"])
+                parser.cancel()
+            
+            self.assertTrue(parser.cancelled)
+            self.assertEqual(pages, [1], f"workers={workers}")
+
+
+class TestBatchJob(unittest.TestCase):
+    """Testes para o processamento de vários arquivos ao mesmo tempo."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.files = []
+        for name, pages in (("marco.pdf", 2), ("abril.pdf", 3)):
+            path = os.path.join(cls.tmp_dir.name, name)
+            write_report(path, pages, rows_per_page=5)
+            with open(path, "rb") as fp:
+                cls.files.append((name, fp.read()))
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+    
+    def test_corrupt_file_does_not_block_others(self):
+        """Testa status por arquivo e total geral só dos arquivos válidos."""
+        files = [self.files[0], ("corrompido.pdf", b"%PDF-1.4 quebrado"), self.files[1]]
+        batch = BatchJob(files, workers=2).start()
+        self.assertTrue(batch.wait(120))
+        
+        progress = batch.progress()
+        self.assertEqual(batch.state, DONE)
+        self.assertEqual(progress["concluidos"], 3)
+        self.assertEqual(
+            [line["status"] for line in progress["arquivos"]], ["ok", "erro", "ok"]
+        )
+        
+        expected = [process_pdf(data)["totals"] for _, data in self.files]
+        total = batch.summary()["total_geral"]
+        self.assertAlmostEqual(
+            total["total_valor_pago"], sum(t["total_valor_pago"] for t in expected), places=2
+        )
+        self.assertAlmostEqual(
+            total["total_cartorio"], sum(t["total_cartorio"] for t in expected), places=2
+        )
+        self.assertEqual(batch.summary()["falhas"], 1)
+    
+    def test_processing_status_follows_workers(self):
+        """Testa que só os arquivos de fato iniciados aparecem como "processando"."""
+        batch = BatchJob(self.files * 2, workers=1).start()
+        while not batch.wait(0.01):
+            statuses = [line["status"] for line in batch.progress()["arquivos"]]
+            self.assertLessEqual(statuses.count("processando"), 1)
+        
+        self.assertEqual(batch.state, DONE)
+        self.assertEqual(batch.progress()["concluidos"], 4)
+    
+    def test_csv_has_one_row_per_file_and_total(self):
+        """Testa o CSV consolidado do lote."""
+        batch = BatchJob(self.files, workers=1).start()
+        batch.wait(120)
+        summary = batch.summary()
+        
+        lines = summaries_to_csv(summary["arquivos"], summary["total_geral"]).splitlines()
+        self.assertTrue(lines[0].startswith("arquivo,status,total_valor_pago"))
+        self.assertEqual([line.split(",")[0] for line in lines[1:]],
+                         ["marco.pdf", "abril.pdf", "TOTAL"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Testes unitários para os modelos de layout reaproveitáveis.
+"""
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from benchmarks.synthetic_pdf import write_report
+from layout_template import LayoutTemplate, LayoutTemplateStore, layout_fingerprint
+from metrics import Metrics
+from pdf_parser import ENGINES, PDFFinancialParser
+
+
+class TestLayoutFingerprint(unittest.TestCase):
+    """Testes para a assinatura de página."""
+    
+    def test_fingerprint_ignores_row_count(self):
+        """Testa que páginas com as mesmas colunas têm a mesma assinatura."""
+        edges = [{"x0": 18.2}, {"x0": 66.0}, {"x0": 430.4}]
+        page_a = SimpleNamespace(width=842, height=595, vertical_edges=edges)
+        page_b = SimpleNamespace(width=842, height=595, vertical_edges=edges * 40)
+        
+        self.assertEqual(layout_fingerprint(page_a), "842x595:18,66,430")
+        self.assertEqual(layout_fingerprint(page_a), layout_fingerprint(page_b))
+    
+    def test_page_without_vertical_edges(self):
+        """Testa que páginas sem bordas verticais não têm assinatura."""
+        page = SimpleNamespace(width=842, height=595, vertical_edges=[])
+        self.assertIsNone(layout_fingerprint(page))
+
+
+class TestLayoutTemplateStore(unittest.TestCase):
+    """Testes para o reaproveitamento de modelos durante a extração."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.pdf_path = os.path.join(cls.tmp_dir.name, "guias.pdf")
+        write_report(cls.pdf_path, 4, rows_per_page=10)
+        
+        cls.parser = PDFFinancialParser(cls.pdf_path)
+        cls.data = cls.parser.extract_data()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+    
+    def test_template_matches_full_detection(self):
+        """Testa que o modelo aprendido produz o mesmo resultado."""
+        for engine in ENGINES:
+            metrics = Metrics()
+            parser = PDFFinancialParser(
+                self.pdf_path, engine=engine, templates=LayoutTemplateStore(),
+                metrics=metrics
+            )
+            self.assertEqual(parser.extract_data(), self.data)
+            self.assertEqual(parser.rows, self.parser.rows)
+            # Duas páginas de dados: a primeira aprende, a segunda reaproveita
+            self.assertEqual(metrics.counters["layout_fallbacks"], 1)
+            self.assertEqual(metrics.counters["layout_template_hits"], 1)
+    
+    def test_saved_templates_are_reused(self):
+        """Testa que modelos gravados em arquivo evitam a detecção completa."""
+        path = os.path.join(self.tmp_dir.name, "modelos", "layouts.json")
+        store = LayoutTemplateStore(path)
+        PDFFinancialParser(self.pdf_path, templates=store).extract_data()
+        store.save()
+        
+        metrics = Metrics()
+        parser = PDFFinancialParser(
+            self.pdf_path, templates=LayoutTemplateStore(path), metrics=metrics
+        )
+        self.assertEqual(parser.extract_data(), self.data)
+        self.assertNotIn("layout_fallbacks", metrics.counters)
+        self.assertEqual(metrics.counters["layout_template_hits"], 2)
+    
+    def test_unmatched_page_falls_back(self):
+        """Testa que páginas com outra estrutura voltam à detecção completa."""
+        store = LayoutTemplateStore()
+        store.templates["842x595:1,2"] = LayoutTemplate("842x595:1,2", [1.0, 2.0])
+        metrics = Metrics()
+        
+        parser = PDFFinancialParser(self.pdf_path, templates=store, metrics=metrics)
+        self.assertEqual(parser.extract_data(), self.data)
+        self.assertEqual(metrics.counters["layout_fallbacks"], 1)
+    
+    def test_concurrent_saves_keep_all_templates(self):
+        """Testa que processos gravando o mesmo arquivo não descartam os modelos uns dos outros."""
+        path = os.path.join(self.tmp_dir.name, "compartilhado.json")
+        first = LayoutTemplateStore(path)
+        second = LayoutTemplateStore(path)
+        first.templates["842x595:1,2"] = LayoutTemplate("842x595:1,2", [1.0, 2.0])
+        second.templates["595x842:3,4"] = LayoutTemplate("595x842:3,4", [3.0, 4.0])
+        
+        first.save()
+        second.save()
+        
+        self.assertEqual(
+            sorted(LayoutTemplateStore(path).templates), ["595x842:3,4", "842x595:1,2"]
+        )
+    
+    def test_invalid_file_is_ignored(self):
+        """Testa que um arquivo de modelos corrompido é ignorado."""
+        path = os.path.join(self.tmp_dir.name, "corrompido.json")
+        with open(path, "w", encoding="utf-8") as fp:
+            fp.write("{nao e json")
+        
+        self.assertEqual(LayoutTemplateStore(path).templates, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Testes unitários para o modo de memória limitada e o limite de RSS.
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+from benchmarks.synthetic_pdf import write_report
+from memory_budget import MemoryBudget, MemoryBudgetError, current_rss_mb
+from pdf_input import open_pdf, release_page
+from pdf_parser import ENGINES, PDFFinancialParser
+
+
+class TestMemoryBudget(unittest.TestCase):
+    """Testes para a medição do RSS e o limite por processo."""
+    
+    def test_current_rss(self):
+        """Testa que o RSS do processo é informado em MB."""
+        rss = current_rss_mb()
+        self.assertIsNotNone(rss)
+        self.assertGreater(rss, 1)
+    
+    def test_check_raises_above_limit(self):
+        """Testa o erro acima do limite e o pico registrado abaixo dele."""
+        budget = MemoryBudget(limit_mb=1e6)
+        budget.check(1)
+        self.assertGreater(budget.peak_mb, 0)
+        
+        with self.assertRaises(MemoryBudgetError) as ctx:
+            MemoryBudget(limit_mb=1).check(7)
+        self.assertEqual(ctx.exception.page_num, 7)
+        self.assertIn("página 7", str(ctx.exception))
+    
+    def test_unknown_rss_never_raises(self):
+        """Testa que plataformas sem RSS não interrompem a extração."""
+        with mock.patch("memory_budget.current_rss_mb", return_value=None):
+            MemoryBudget(limit_mb=1).check(1)
+
+
+class TestLowMemory(unittest.TestCase):
+    """Testes para a liberação das páginas durante a extração."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.pdf_path = os.path.join(cls.tmp_dir.name, "guias.pdf")
+        write_report(cls.pdf_path, 5, rows_per_page=6)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+    
+    def test_same_results(self):
+        """Testa que o modo low_memory não altera o resultado em nenhum motor."""
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                expected = PDFFinancialParser(self.pdf_path, engine=engine).extract_records()
+                records = PDFFinancialParser(
+                    self.pdf_path, engine=engine, low_memory=True
+                ).extract_records()
+                self.assertEqual(records.to_dict(), expected.to_dict())
+    
+    def test_parallel_same_results(self):
+        """Testa o modo low_memory nos processos da extração paralela."""
+        expected = PDFFinancialParser(self.pdf_path).extract_records()
+        records = PDFFinancialParser(
+            self.pdf_path, workers=2, min_pages_parallel=2, low_memory=True
+        ).extract_records()
+        self.assertEqual(records.to_dict(), expected.to_dict())
+    
+    def test_release_page_drops_caches(self):
+        """Testa que release_page descarta o mapa de texto e os fluxos decodificados."""
+        with open_pdf(self.pdf_path) as pdf:
+            page = pdf.pages[1]
+            page.extract_text()
+            objids = [stream.objid for stream in page.page_obj.contents]
+            self.assertGreater(page.get_textmap.cache_info().currsize, 0)
+            
+            release_page(page)
+            
+            self.assertEqual(page.get_textmap.cache_info().currsize, 0)
+            self.assertEqual(page.page_obj.contents, [])
+            for objid in objids:
+                self.assertNotIn(objid, pdf.doc._cached_objs)
+    
+    def test_budget_exceeded_stops_extraction(self):
+        """Testa que um limite baixo interrompe a extração com erro."""
+        parser = PDFFinancialParser(self.pdf_path, memory_budget_mb=1)
+        records = parser.extract_records()
+        
+        self.assertIn("limite de memória", parser.error)
+        self.assertEqual(len(records), 0)
+    
+    def test_budget_exceeded_in_worker(self):
+        """Testa o erro de limite vindo de um processo da extração paralela."""
+        parser = PDFFinancialParser(
+            self.pdf_path, workers=2, min_pages_parallel=2, memory_budget_mb=1
+        )
+        parser.extract_records()
+        self.assertIn("limite de memória", parser.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
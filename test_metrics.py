@@ -0,0 +1,107 @@
+"""
+Testes unitários para a instrumentação de tempos e contadores.
+"""
+import os
+import tempfile
+import unittest
+from benchmarks.synthetic_pdf import write_report
+from metrics import Metrics, NULL_METRICS
+from pdf_parser import PDFFinancialParser
+from pipeline import process_pdf, build_summary
+
+
+class TestMetrics(unittest.TestCase):
+    """Testes para o coletor Metrics."""
+    
+    def test_stage_accumulates_time_and_calls(self):
+        """Testa que chamadas repetidas da mesma etapa são somadas."""
+        metrics = Metrics()
+        for _ in range(3):
+            with metrics.stage("extract_text"):
+                pass
+        
+        etapa = metrics.to_dict()["etapas"]["extract_text"]
+        self.assertEqual(etapa["chamadas"], 3)
+        self.assertGreaterEqual(etapa["tempo_s"], 0)
+    
+    def test_disabled_metrics_record_nothing(self):
+        """Testa que o coletor desligado não guarda nada."""
+        metrics = Metrics(enabled=False)
+        with metrics.stage("extract_text"):
+            pass
+        metrics.count("paginas_processadas")
+        metrics.record_page(1, 0.5)
+        
+        self.assertEqual(metrics.stages, {})
+        self.assertEqual(metrics.counters, {})
+        self.assertEqual(metrics.pages, [])
+        self.assertFalse(NULL_METRICS.enabled)
+    
+    def test_merge_and_slowest_pages(self):
+        """Testa a combinação de coletores e a lista de páginas mais lentas."""
+        metrics = Metrics()
+        metrics.record_page(1, 0.1)
+        metrics.count("linhas_encontradas", 2)
+        
+        worker = Metrics()
+        worker.record_page(2, 0.3)
+        worker.add_time("extract_tables", 0.2)
+        worker.count("linhas_encontradas", 5)
+        metrics.merge(worker.snapshot())
+        
+        resumo = metrics.to_dict()
+        self.assertEqual(resumo["contadores"], {"linhas_encontradas": 7})
+        self.assertEqual(resumo["paginas"]["quantidade"], 2)
+        self.assertEqual(resumo["paginas"]["mais_lentas"][0], {"pagina": 2, "tempo_s": 0.3})
+        self.assertEqual(resumo["etapas"]["extract_tables"]["chamadas"], 1)
+
+
+class TestInstrumentedProcessing(unittest.TestCase):
+    """Testes das métricas coletadas durante a extração de um PDF."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.pdf_path = os.path.join(cls.tmp_dir.name, "guias.pdf")
+        write_report(cls.pdf_path, 3, rows_per_page=8)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+    
+    def test_process_pdf_reports_stages_and_counters(self):
+        """Testa que o resultado traz etapas, páginas e contadores."""
+        processed = process_pdf(self.pdf_path, collect_metrics=True)
+        metricas = processed["metricas"]
+        
+        for etapa in ("pdfplumber.open", "extract_tables", "extract_text",
+                      "regex_scan", "sum_values"):
+            self.assertIn(etapa, metricas["etapas"])
+        self.assertEqual(metricas["contadores"]["paginas_processadas"], 3)
+        self.assertEqual(
+            metricas["contadores"]["linhas_encontradas"], len(processed["rows"])
+        )
+        self.assertEqual(metricas["paginas"]["quantidade"], 3)
+        
+        resumo = build_summary("guias.pdf", processed["totals"],
+                               processed["extracted_data"], metrics=metricas)
+        self.assertEqual(resumo["diagnostico"], metricas)
+    
+    def test_metrics_disabled_by_default(self):
+        """Testa que sem collect_metrics nenhuma métrica é devolvida."""
+        self.assertIsNone(process_pdf(self.pdf_path)["metricas"])
+    
+    def test_parallel_workers_metrics_are_merged(self):
+        """Testa que as métricas dos processos chegam ao coletor principal."""
+        metrics = Metrics()
+        parser = PDFFinancialParser(
+            self.pdf_path, workers=2, min_pages_parallel=2, metrics=metrics
+        )
+        parser.extract_data()
+        
+        self.assertEqual(metrics.counters["paginas_processadas"], 3)
+        self.assertEqual(sorted(page for page, _ in metrics.pages), [1, 2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
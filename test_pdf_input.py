@@ -0,0 +1,113 @@
+"""
+Testes unitários para a leitura de PDFs a partir de caminhos e de memória.
+"""
+import io
+import mmap
+import os
+import tempfile
+import unittest
+from benchmarks.synthetic_pdf import write_report
+from pdf_input import BufferReader, as_buffer, open_pdf
+from pdf_parser import PDFFinancialParser
+from pipeline import process_pdf
+from result_cache import ResultCache, compute_file_cache_key
+
+
+class TestBufferReader(unittest.TestCase):
+    """Testes para o leitor de buffers em memória."""
+    
+    def test_read_and_seek(self):
+        """Testa leitura em blocos e posicionamento como em um arquivo."""
+        reader = BufferReader(bytearray(b"%PDF-1.4 conteudo"))
+        
+        self.assertEqual(reader.read(4), b"%PDF")
+        self.assertEqual(reader.tell(), 4)
+        reader.seek(-8, io.SEEK_END)
+        self.assertEqual(reader.read(), b"conteudo")
+        self.assertEqual(reader.read(10), b"")
+        reader.seek(1)
+        self.assertEqual(reader.read(3), b"PDF")
+    
+    def test_as_buffer_does_not_copy_bytesio(self):
+        """Testa que BytesIO (como os uploads do Streamlit) é exposto sem cópia."""
+        upload = io.BytesIO(b"abc")
+        buffer = as_buffer(upload)
+        
+        self.assertIsInstance(buffer, memoryview)
+        self.assertEqual(bytes(buffer), b"abc")
+        buffer.release()
+
+
+class TestInMemoryInput(unittest.TestCase):
+    """Testes da extração a partir de bytes, buffers, arquivos abertos e mmap."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.pdf_path = os.path.join(cls.tmp_dir.name, "guias.pdf")
+        write_report(cls.pdf_path, 3, rows_per_page=8)
+        with open(cls.pdf_path, "rb") as fp:
+            cls.content = fp.read()
+        
+        cls.parser = PDFFinancialParser(cls.pdf_path)
+        cls.data = cls.parser.extract_data()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+    
+    def test_sources_match_path(self):
+        """Testa que todas as origens em memória produzem o mesmo resultado."""
+        sources = [
+            self.content,
+            bytearray(self.content),
+            memoryview(self.content),
+            io.BytesIO(self.content),
+        ]
+        for source in sources:
+            parser = PDFFinancialParser(source)
+            self.assertEqual(parser.extract_data(), self.data)
+            self.assertEqual(parser.rows, self.parser.rows)
+            self.assertIsNone(parser.error)
+    
+    def test_mmap_source(self):
+        """Testa a leitura de um mmap aberto por quem chama."""
+        with open(self.pdf_path, "rb") as fp:
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                self.assertEqual(PDFFinancialParser(mapped).extract_data(), self.data)
+    
+    def test_parallel_from_memory(self):
+        """Testa que os processos recebem o conteúdo em memória."""
+        parser = PDFFinancialParser(
+            memoryview(self.content), workers=2, min_pages_parallel=2
+        )
+        self.assertEqual(parser.extract_data(), self.data)
+        self.assertEqual(parser.rows, self.parser.rows)
+    
+    def test_empty_file_reports_error(self):
+        """Testa que um arquivo vazio (sem mmap possível) gera erro, sem exceção."""
+        path = os.path.join(self.tmp_dir.name, "vazio.pdf")
+        open(path, "wb").close()
+        
+        parser = PDFFinancialParser(path)
+        self.assertEqual(parser.extract_data(), {"cartorio": [], "valor_pago": []})
+        self.assertIsNotNone(parser.error)
+    
+    def test_open_pdf_pages_subset(self):
+        """Testa a abertura de parte das páginas a partir de bytes."""
+        with open_pdf(self.content, pages=[2, 3]) as pdf:
+            self.assertEqual([page.page_number for page in pdf.pages], [2, 3])
+    
+    def test_process_pdf_cache_key_matches_file(self):
+        """Testa que bytes e caminho compartilham a mesma entrada de cache."""
+        cache = ResultCache(os.path.join(self.tmp_dir.name, "cache"))
+        first = process_pdf(self.content, cache=cache)
+        second = process_pdf(self.pdf_path, cache=cache)
+        
+        self.assertFalse(first["from_cache"])
+        self.assertTrue(second["from_cache"])
+        self.assertIsNotNone(cache.get(compute_file_cache_key(self.pdf_path)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,487 @@
+"""
+Testes unitários para o parser de PDFs da Calculadora FIRC.
+"""
+import os
+import tempfile
+import time
+import unittest
+import pdfplumber
+from types import SimpleNamespace
+from benchmarks.synthetic_pdf import write_report
+from calculator import FinancialCalculator
+from fast_text import extract_page_text, runs_to_text
+from metrics import Metrics
+from pdf_parser import (
+    ENGINES,
+    PDFFinancialParser,
+    detect_column_band,
+    has_value_signal,
+    names_by_guia,
+    split_page_range,
+    table_rows_from_words,
+    words_to_text,
+)
+
+
+def _word(text, x0, top, width=20, height=7):
+    """Cria uma palavra no formato de page.extract_words()."""
+    return {"text": text, "x0": x0, "x1": x0 + width, "top": top, "bottom": top + height}
+
+
+class TestSplitPageRange(unittest.TestCase):
+    """Testes para a divisão de páginas entre processos."""
+    
+    def test_split_covers_all_pages_in_order(self):
+        """Testa que os blocos são contíguos e cobrem todas as páginas."""
+        ranges = split_page_range(10, 3)
+        self.assertEqual(ranges, [(1, 4), (5, 7), (8, 10)])
+    
+    def test_split_more_chunks_than_pages(self):
+        """Testa que não são criados blocos vazios."""
+        self.assertEqual(split_page_range(2, 8), [(1, 1), (2, 2)])
+    
+    def test_split_without_pages(self):
+        """Testa PDF sem páginas."""
+        self.assertEqual(split_page_range(0, 4), [])
+
+
+class TestParallelMode(unittest.TestCase):
+    """Testes para a decisão entre processamento serial e paralelo."""
+    
+    def test_serial_by_default(self):
+        """Testa que o padrão continua sendo serial."""
+        parser = PDFFinancialParser("relatorio.pdf")
+        self.assertFalse(parser._should_parallelize(5000))
+    
+    def test_small_files_fall_back_to_serial(self):
+        """Testa fallback serial para PDFs pequenos."""
+        parser = PDFFinancialParser("relatorio.pdf", workers=4, min_pages_parallel=40)
+        self.assertFalse(parser._should_parallelize(10))
+        self.assertTrue(parser._should_parallelize(40))
+    
+    def test_parallel_output_matches_serial(self):
+        """Testa que os processos devolvem as mesmas linhas e totais do modo serial."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "relatorio.pdf")
+            write_report(pdf_path, 6, rows_per_page=5)
+            
+            serial = PDFFinancialParser(pdf_path)
+            serial_data = serial.extract_data()
+            parallel = PDFFinancialParser(pdf_path, workers=3, min_pages_parallel=2)
+            self.assertTrue(parallel._should_parallelize(6))
+            parallel_data = parallel.extract_data()
+        
+        self.assertEqual(parallel.rows, serial.rows)
+        self.assertEqual([row["pagina"] for row in parallel.rows],
+                         sorted(row["pagina"] for row in parallel.rows))
+        self.assertEqual(FinancialCalculator().calculate_totals(parallel_data),
+                         FinancialCalculator().calculate_totals(serial_data))
+        self.assertIsNone(parallel.error)
+
+
+class TestStreamingAPI(unittest.TestCase):
+    """Testes para a extração incremental (iter_pages / iter_records)."""
+    
+    PAGES = [
+        {"pagina": 1, "cartorio": ["215,44"], "valor_pago": ["301,61"], "linhas": []},
+        {"pagina": 2, "cartorio": [], "valor_pago": ["985,92"], "linhas": []},
+    ]
+    
+    def _parser(self, pages):
+        """Cria um parser cujas páginas vêm de uma lista pronta."""
+        parser = PDFFinancialParser("relatorio.pdf")
+        parser.iter_pages = lambda: iter(pages)
+        return parser
+    
+    def test_iter_records_yields_one_record_per_value(self):
+        """Testa o formato dos registros por valor."""
+        records = list(self._parser(self.PAGES).iter_records())
+        self.assertEqual(records, [
+            {"pagina": 1, "campo": "cartorio", "valor": "215,44"},
+            {"pagina": 1, "campo": "valor_pago", "valor": "301,61"},
+            {"pagina": 2, "campo": "valor_pago", "valor": "985,92"},
+        ])
+    
+    def test_extract_data_merges_pages_in_order(self):
+        """Testa que extract_data junta as páginas na ordem."""
+        data = self._parser(self.PAGES).extract_data()
+        self.assertEqual(data, {"cartorio": ["215,44"], "valor_pago": ["301,61", "985,92"]})
+    
+    def test_extract_data_keeps_pages_before_error(self):
+        """Testa que um erro no meio preserva as páginas anteriores."""
+        def pages():
+            yield self.PAGES[0]
+            raise RuntimeError("página corrompida")
+        
+        parser = self._parser(None)
+        parser.iter_pages = pages
+        data = parser.extract_data()
+        
+        self.assertEqual(data["valor_pago"], ["301,61"])
+        self.assertEqual(parser.error, "página corrompida")
+
+
+class TestRowAssociation(unittest.TestCase):
+    """Testes para os registros por linha de guia."""
+    
+    def setUp(self):
+        self.parser = PDFFinancialParser("relatorio.pdf")
+        self.parser._current_page = 3
+    
+    def test_text_line_keeps_fields_together(self):
+        """Testa que guia, cartório e valores da mesma linha ficam juntos."""
+        self.parser._extract_from_text(
+            "Guia Cartório Cidade Tipo\n"
+            "0024102419 Serventia Registro Civil Vitória Geral "
+            "R$ 301,61 R$ 301,61 R$ 0,00 R$ 215,44 R$ 86,17"
+        )
+        self.assertEqual(self.parser.rows, [{
+            "pagina": 3,
+            "linha": 1,
+            "origem": "texto",
+            "guia": "0024102419",
+            "cartorio": "Serventia Registro Civil Vitória Geral",
+            "valor_pago": "301,61",
+            "valor_cartorio": "215,44",
+        }])
+    
+    def test_table_row_uses_first_columns(self):
+        """Testa que a guia e o cartório vêm das primeiras colunas da tabela."""
+        self.parser._extract_from_table([
+            ["Guia", "Cartório", "Cidade", "Tipo", "Valor", "Pago", "Tarifa", "Cartório"],
+            ["0024102419", "Serventia\nProtesto", "Serra", "Geral",
+             "R$ 10,00", "R$ 10,00", "R$ 0,00", "R$ 7,00"],
+        ])
+        row, = self.parser.rows
+        self.assertEqual(row["guia"], "0024102419")
+        self.assertEqual(row["cartorio"], "Serventia Protesto")
+        self.assertEqual(row["valor_cartorio"], "R$ 7,00")
+        self.assertIsNone(row["valor_pago"])
+    
+    def test_table_and_text_readings_of_a_row_are_merged(self):
+        """Testa que a mesma guia lida pela tabela e pelo texto vira uma linha."""
+        metrics = Metrics()
+        self.parser.metrics = metrics
+        self.parser._extract_from_table([
+            ["0024102419", "Serventia Protesto", "Serra", "Geral",
+             "R$ 301,61", "R$ 301,61", "R$ 0,00", "R$ 215,44"],
+        ])
+        self.parser._extract_from_text(
+            "0024102419 Serventia Protesto Serra Geral "
+            "R$ 301,61 R$ 301,61 R$ 0,00 R$ 215,44 R$ 86,17"
+        )
+        
+        row, = self.parser.rows
+        self.assertEqual(row["origem"], "tabela")
+        self.assertEqual(row["cartorio"], "Serventia Protesto")
+        self.assertEqual(row["valor_pago"], "301,61")
+        self.assertEqual(self.parser.cartorio_values, ["R$ 215,44"])
+        self.assertEqual(self.parser.valor_pago_values, ["301,61"])
+        self.assertEqual(metrics.counters["linhas_mescladas"], 1)
+    
+    def test_repeated_guia_pairs_readings_in_order(self):
+        """Testa que guias repetidas são juntadas na ordem, uma a uma."""
+        row = ["0024102419", "Serventia", "Serra", "Geral",
+               "R$ 10,00", "R$ 10,00", "R$ 0,00", "R$ 7,00"]
+        self.parser._extract_from_table([row, row])
+        self.parser._extract_from_text(
+            "0024102419 Serventia R$ 10,00 R$ 10,00 R$ 0,00 R$ 7,00\n"
+            "0024102419 Serventia R$ 10,00 R$ 10,00 R$ 0,00 R$ 7,00\n"
+            "0024102419 Serventia R$ 10,00 R$ 10,00 R$ 0,00 R$ 7,00"
+        )
+        
+        # As duas linhas da tabela recebem o Valor Pago das duas primeiras
+        # linhas de texto; a terceira não tem par e fica como linha própria
+        self.assertEqual([r["origem"] for r in self.parser.rows],
+                         ["tabela", "tabela", "texto"])
+        self.assertEqual([r["valor_pago"] for r in self.parser.rows], ["10,00"] * 3)
+        self.assertEqual(len(self.parser.cartorio_values), 3)
+        self.assertEqual(len(self.parser.valor_pago_values), 3)
+    
+    def test_names_by_guia_stops_at_city_column(self):
+        """Testa que o nome vai da guia até o título da coluna Cidade."""
+        lines = [
+            [_word("Guia", 20, 10), _word("Cartório", 68, 10), _word("Cidade", 218, 10),
+             _word("Tipo", 290, 10)],
+            [_word("0024102419", 20, 20), _word("Serventia", 68, 20), _word("Protesto", 100, 20),
+             _word("Vila", 218, 20), _word("Velha", 235, 20), _word("Geral", 290, 20),
+             _word("R$", 320, 20)],
+        ]
+        self.assertEqual(names_by_guia(lines), {"0024102419": "Serventia Protesto"})
+        self.assertEqual(names_by_guia(lines[1:]), {})
+    
+    def test_text_and_table_paths_give_same_names(self):
+        """Testa que a mesma linha tem o mesmo cartório lida pela tabela ou só pelo texto."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            names = {}
+            for tables in (True, False):
+                path = os.path.join(tmp_dir, f"tabelas_{tables}.pdf")
+                write_report(path, 3, rows_per_page=8, tables=tables)
+                for engine in ENGINES:
+                    records = PDFFinancialParser(path, engine=engine).extract_records()
+                    names[tables, engine] = {row["guia"]: row["cartorio"] for row in records}
+        
+        expected = names[True, "default"]
+        self.assertIn("Serventia Protesto de Títulos", expected.values())
+        for key, found in names.items():
+            with self.subTest(tabelas=key[0], engine=key[1]):
+                self.assertEqual(found, expected)
+
+
+class TestSinglePassEngine(unittest.TestCase):
+    """Testes para o motor de passada única."""
+    
+    def test_unknown_engine_is_rejected(self):
+        """Testa que motores desconhecidos geram erro."""
+        with self.assertRaises(ValueError):
+            PDFFinancialParser("relatorio.pdf", engine="turbo")
+    
+    def test_words_to_text_groups_lines(self):
+        """Testa que palavras são agrupadas por linha e ordenadas por x."""
+        words = [
+            _word("301,61", 60, 10.5),
+            _word("R$", 40, 10),
+            _word("0024102419", 0, 11),
+            _word("Rateios", 0, 30),
+        ]
+        self.assertEqual(words_to_text(words), "0024102419 R$ 301,61\nRateios")
+    
+    def test_table_rows_from_words(self):
+        """Testa que cada palavra cai na célula que contém seu centro."""
+        table = SimpleNamespace(rows=[
+            SimpleNamespace(bbox=(0, 0, 100, 10), cells=[(0, 0, 50, 10), None]),
+            SimpleNamespace(bbox=(0, 10, 100, 20), cells=[(0, 10, 50, 20), (50, 10, 100, 20)]),
+        ])
+        words = [
+            _word("Guia", 2, 1),
+            _word("R$", 52, 11, width=10),
+            _word("215,44", 64, 11),
+        ]
+        self.assertEqual(
+            table_rows_from_words(table, words),
+            [["Guia", None], ["", "R$ 215,44"]]
+        )
+
+
+class TestSyntheticReports(unittest.TestCase):
+    """Testes de ponta a ponta com relatórios gerados por benchmarks.synthetic_pdf."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.pdf_path = os.path.join(cls.tmp_dir.name, "guias.pdf")
+        cls.expected = write_report(cls.pdf_path, 4, rows_per_page=12)
+        
+        cls.parser = PDFFinancialParser(cls.pdf_path)
+        cls.data = cls.parser.extract_data()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+    
+    def test_totals_match_generated_report(self):
+        """Testa que o Valor Pago e o Cartório extraídos conferem com o gabarito."""
+        totals = FinancialCalculator().calculate_totals(self.data)
+        self.assertEqual(
+            round(totals["total_valor_pago"] * 100),
+            self.expected["total_valor_pago_centavos"]
+        )
+        # Cada linha é lida pela tabela e pelo texto, mas só conta uma vez
+        self.assertEqual(
+            round(totals["total_cartorio"] * 100),
+            self.expected["total_cartorio_centavos"]
+        )
+        self.assertEqual(len(self.data["valor_pago"]), len(self.expected["linhas"]))
+        self.assertEqual(len(self.parser.rows), len(self.expected["linhas"]))
+        self.assertIsNone(self.parser.error)
+    
+    def test_single_pass_engine_matches_default(self):
+        """Testa que o motor de passada única produz o mesmo resultado."""
+        parser = PDFFinancialParser(self.pdf_path, engine="single_pass")
+        self.assertEqual(parser.extract_data(), self.data)
+        self.assertEqual(parser.rows, self.parser.rows)
+    
+    def test_parallel_matches_serial(self):
+        """Testa que a extração paralela produz o mesmo resultado, na mesma ordem."""
+        parser = PDFFinancialParser(self.pdf_path, workers=2, min_pages_parallel=2)
+        self.assertEqual(parser.extract_data(), self.data)
+        self.assertEqual(parser.rows, self.parser.rows)
+    
+    def test_column_cropping_matches_full_page(self):
+        """Testa que recortar as páginas à faixa de colunas não muda o resultado."""
+        for engine in ENGINES:
+            parser = PDFFinancialParser(self.pdf_path, engine=engine, crop_columns=True)
+            self.assertEqual(parser.extract_data(), self.data)
+            self.assertEqual(parser.rows, self.parser.rows)
+            self.assertIsNotNone(parser.column_band)
+        
+        parser = PDFFinancialParser(
+            self.pdf_path, workers=2, min_pages_parallel=2, crop_columns=True
+        )
+        self.assertEqual(parser.extract_data(), self.data)
+    
+    def test_column_band_ends_after_cartorio_column(self):
+        """Testa que a faixa exclui as colunas à direita da 8ª (Cartório)."""
+        with pdfplumber.open(self.pdf_path) as pdf:
+            x0, x1 = detect_column_band(pdf.pages)
+            page = pdf.pages[1]
+            cropped = page.crop((x0, 0, x1, page.height)).extract_text()
+        
+        self.assertIn("Tarifa", cropped)
+        self.assertNotIn("Observação", cropped)
+        self.assertLess(x1, page.width)
+    
+    def test_text_only_report_is_not_cropped(self):
+        """Testa que relatórios sem grade seguem sendo lidos por inteiro."""
+        pdf_path = os.path.join(self.tmp_dir.name, "sem_grade.pdf")
+        expected = write_report(pdf_path, 3, rows_per_page=6, tables=False)
+        
+        parser = PDFFinancialParser(pdf_path, crop_columns=True)
+        data = parser.extract_data()
+        
+        self.assertIsNone(parser.column_band)
+        self.assertEqual(len(data["valor_pago"]), len(expected["linhas"]))
+    
+    def test_deadline_stops_extraction(self):
+        """Testa que o prazo esgotado interrompe a extração, também nos processos."""
+        for options in ({}, {"workers": 2, "min_pages_parallel": 2}):
+            with self.subTest(**options):
+                parser = PDFFinancialParser(self.pdf_path, deadline=time.time() - 1, **options)
+                records = parser.extract_records()
+                self.assertIn("prazo da extração esgotado", parser.error)
+                self.assertEqual(len(records), 0)
+        
+        parser = PDFFinancialParser(self.pdf_path, deadline=time.time() + 600)
+        self.assertEqual(parser.extract_data(), self.data)
+
+
+class TestFastEngine(unittest.TestCase):
+    """Testes para o motor "fast", que lê o texto direto do fluxo de conteúdo."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.text_path = os.path.join(cls.tmp_dir.name, "sem_grade.pdf")
+        cls.expected = write_report(cls.text_path, 4, rows_per_page=12, tables=False)
+        cls.table_path = os.path.join(cls.tmp_dir.name, "com_grade.pdf")
+        write_report(cls.table_path, 4, rows_per_page=12)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+    
+    def test_page_text_matches_pdfplumber(self):
+        """Testa que o texto reconstruído é idêntico ao de extract_text()."""
+        with pdfplumber.open(self.text_path) as pdf:
+            for page in pdf.pages:
+                self.assertEqual(
+                    extract_page_text(page.page_obj, pdf.rsrcmgr), page.extract_text()
+                )
+    
+    def test_text_report_matches_default_engine(self):
+        """Testa a paridade com o motor padrão em um relatório só de texto."""
+        default = PDFFinancialParser(self.text_path)
+        metrics = Metrics()
+        fast = PDFFinancialParser(self.text_path, engine="fast", metrics=metrics)
+        
+        self.assertEqual(fast.extract_data(), default.extract_data())
+        self.assertEqual(fast.rows, default.rows)
+        self.assertEqual(len(fast.rows), len(self.expected["linhas"]))
+        self.assertNotIn("fast_fallbacks", metrics.counters)
+    
+    def test_table_pages_fall_back_to_default_engine(self):
+        """Testa que páginas com grade de tabela usam a extração completa."""
+        default = PDFFinancialParser(self.table_path)
+        metrics = Metrics()
+        fast = PDFFinancialParser(self.table_path, engine="fast", metrics=metrics)
+        
+        self.assertEqual(fast.extract_data(), default.extract_data())
+        self.assertEqual(fast.rows, default.rows)
+        # Capa e resumo não têm grade; as duas páginas de dados têm
+        self.assertEqual(metrics.counters["fast_fallbacks"], 2)
+    
+    def test_runs_to_text_joins_and_orders(self):
+        """Testa o agrupamento de trechos em linhas e palavras."""
+        runs = [
+            [100, 130, 500.0, "R$ 10,00"],
+            [10, 40, 501.5, "0001"],
+            [50, 80, 500.0, "Serv"],
+            [80.5, 95, 500.0, "entia"],
+            [10, 40, 480.0, "Total"],
+        ]
+        self.assertEqual(runs_to_text(runs), "0001 Serventia R$ 10,00\nTotal")
+
+
+class TestPrefilter(unittest.TestCase):
+    """Testes para a pré-classificação que descarta páginas sem valores."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.paths = {}
+        for tables in (True, False):
+            path = os.path.join(cls.tmp_dir.name, f"grade_{tables}.pdf")
+            write_report(path, 7, rows_per_page=8, tables=tables, empty_pages=2)
+            cls.paths[tables] = path
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+    
+    def test_skipped_pages_do_not_change_results(self):
+        """Testa a paridade de linhas e totais com e sem a pré-classificação."""
+        for tables, path in self.paths.items():
+            expected = PDFFinancialParser(path).extract_records()
+            expected_totals = FinancialCalculator().calculate_totals_from_records(expected)
+            for engine in ENGINES:
+                with self.subTest(tables=tables, engine=engine):
+                    metrics = Metrics()
+                    parser = PDFFinancialParser(
+                        path, engine=engine, metrics=metrics, prefilter=True
+                    )
+                    records = parser.extract_records()
+                    
+                    self.assertEqual(records.to_dict(), expected.to_dict())
+                    totals = FinancialCalculator().calculate_totals_from_records(records)
+                    self.assertEqual(totals, expected_totals)
+                    if engine != "fast":
+                        # Capa e as duas páginas só com cabeçalho
+                        self.assertEqual(metrics.counters["paginas_ignoradas"], 3)
+    
+    def test_fast_engine_filters_only_table_pages(self):
+        """Testa que no motor fast só as páginas com grade são pré-classificadas."""
+        metrics = Metrics()
+        PDFFinancialParser(
+            self.paths[True], engine="fast", metrics=metrics, prefilter=True
+        ).extract_records()
+        self.assertEqual(metrics.counters["paginas_ignoradas"], 2)
+    
+    def test_parallel_workers_skip_pages(self):
+        """Testa a pré-classificação nos processos da extração paralela."""
+        path = self.paths[True]
+        metrics = Metrics()
+        parser = PDFFinancialParser(
+            path, workers=2, min_pages_parallel=2, metrics=metrics, prefilter=True
+        )
+        
+        records = parser.extract_records()
+        
+        expected = PDFFinancialParser(path).extract_records()
+        self.assertEqual(records.to_dict(), expected.to_dict())
+        self.assertEqual(metrics.counters["paginas_ignoradas"], 3)
+    
+    def test_value_signals(self):
+        """Testa os sinais que mantêm uma página na extração completa."""
+        header = ["Guias Geradas", "Período: 01/03/2026 a 31/03/2026", "Valor Pago",
+                  "Cartório", "Página 3 de 10"]
+        self.assertFalse(has_value_signal(header))
+        self.assertFalse(has_value_signal([]))
+        self.assertTrue(has_value_signal(header + ["R$ 10,00"]))
+        self.assertTrue(has_value_signal(header + ["215,44"]))
+        self.assertTrue(has_value_signal(header + ["0024102419"]))
+        self.assertTrue(has_value_signal(["Total Valor", "Pago: 1.234 guias"]))
+        self.assertFalse(has_value_signal(["...", ","]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Testes unitários para o armazenamento compacto de registros.
+"""
+import json
+import os
+import tempfile
+import unittest
+from benchmarks.synthetic_pdf import write_report
+from calculator import FinancialCalculator
+from pdf_parser import PDFFinancialParser
+from record_store import RecordStore, format_centavos
+
+
+PAGINA = {
+    "pagina": 3,
+    "cartorio": ["215,44", "1.000,00"],
+    "valor_pago": ["301,61", "R$ 1.234,5"],
+    "linhas": [
+        {"pagina": 3, "linha": 1, "origem": "tabela", "guia": "123456",
+         "cartorio": "1º Ofício", "valor_pago": "301,61", "valor_cartorio": "215,44"},
+        {"pagina": 3, "linha": 2, "origem": "texto", "guia": "007",
+         "cartorio": "", "valor_pago": None, "valor_cartorio": "1.000,00"},
+        {"pagina": 3, "linha": 3, "origem": "tabela", "guia": None,
+         "cartorio": "1º Ofício", "valor_pago": "1.234,50", "valor_cartorio": None},
+    ]
+}
+
+
+class TestRecordStore(unittest.TestCase):
+    """Testes para as colunas de valores e as linhas do RecordStore."""
+    
+    def setUp(self):
+        self.store = RecordStore()
+        self.store.add_page(PAGINA)
+    
+    def test_format_centavos(self):
+        """Testa a formatação no padrão brasileiro."""
+        self.assertEqual(format_centavos(123456789), "1.234.567,89")
+        self.assertEqual(format_centavos(5), "0,05")
+    
+    def test_values_behave_like_string_lists(self):
+        """Testa que as colunas de valores se comportam como listas de strings."""
+        valor_pago = self.store.values["valor_pago"]
+        self.assertEqual(len(valor_pago), 2)
+        self.assertEqual(valor_pago[:1], ["301,61"])
+        self.assertEqual(list(valor_pago), ["301,61", "1.234,50"])
+        self.assertEqual(valor_pago.total, 153611)
+        self.assertEqual(list(valor_pago.pages), [3, 3])
+    
+    def test_rows_keep_original_fields(self):
+        """Testa que cada linha devolve os mesmos campos de iter_rows."""
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(self.store[0], PAGINA["linhas"][0])
+        self.assertEqual(self.store[1]["guia"], "007")
+        self.assertIsNone(self.store[1]["valor_pago"])
+        self.assertIsNone(self.store[-1].guia)
+        self.assertEqual(self.store.names, ["1º Ofício", ""])
+    
+    def test_round_trip_through_json(self):
+        """Testa que to_dict/from_dict preservam valores e linhas."""
+        copy = RecordStore.from_dict(json.loads(json.dumps(self.store.to_dict())))
+        self.assertEqual(copy, self.store)
+        self.assertEqual(copy.values["cartorio"], self.store.values["cartorio"])
+        self.assertEqual(copy.values["cartorio"].total, 121544)
+    
+    def test_zero_padded_guias_stay_in_integer_column(self):
+        """Testa que guias com zeros à esquerda (como as reais) não vão para other_guias."""
+        rows = [
+            {**PAGINA["linhas"][0], "linha": linha, "guia": guia}
+            for linha, guia in enumerate(("0024102419", "0000000001", "ABC-12"), start=1)
+        ]
+        store = RecordStore()
+        store.add_rows(rows)
+        
+        self.assertEqual(store.other_guias, {2: "ABC-12"})
+        self.assertEqual([row.guia for row in store], ["0024102419", "0000000001", "ABC-12"])
+        self.assertEqual(store.find_guia("24102419")[0].guia, "0024102419")
+        self.assertEqual(store.find_guia("0024102419"), [rows[0]])
+        copy = RecordStore.from_dict(json.loads(json.dumps(store.to_dict())))
+        self.assertEqual(copy, store)
+    
+    def test_find_guia_uses_index(self):
+        """Testa a busca de guias, com e sem zeros à esquerda e por página."""
+        self.assertEqual(self.store.find_guia("123456"), [PAGINA["linhas"][0]])
+        self.assertEqual(self.store.find_guia(" 7 "), [PAGINA["linhas"][1]])
+        self.assertEqual(self.store.find_guia("0007", page=3), [PAGINA["linhas"][1]])
+        self.assertEqual(self.store.find_guia("007", page=4), [])
+        self.assertEqual(self.store.find_guia("999"), [])
+        
+        # Linhas acrescentadas depois da primeira busca entram no índice
+        self.store.add_rows([dict(PAGINA["linhas"][0], pagina=4, linha=1)])
+        self.assertEqual([row.pagina for row in self.store.find_guia("123456")], [3, 4])
+    
+    def test_grouped_totals_match_row_dicts(self):
+        """Testa que o agrupamento pelos arrays é igual ao dos dicts."""
+        calculator = FinancialCalculator()
+        self.assertEqual(calculator.calculate_grouped(self.store),
+                         calculator.calculate_grouped(PAGINA["linhas"]))
+
+
+class TestExtractRecords(unittest.TestCase):
+    """Testes para a extração direta para o RecordStore."""
+    
+    def test_matches_extract_data(self):
+        """Testa que extract_records tem os mesmos totais e linhas de extract_data."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "guias.pdf")
+            write_report(pdf_path, 4, rows_per_page=6)
+            
+            parser = PDFFinancialParser(pdf_path)
+            extracted_data = parser.extract_data()
+            rows = parser.rows
+            records = PDFFinancialParser(pdf_path).extract_records()
+        
+        calculator = FinancialCalculator()
+        self.assertEqual(calculator.calculate_totals_from_records(records),
+                         calculator.calculate_totals(extracted_data))
+        self.assertEqual(calculator.count_valor_pago, len(extracted_data["valor_pago"]))
+        self.assertEqual(calculator.calculate_grouped(records),
+                         calculator.calculate_grouped(rows))
+        self.assertEqual([row.guia for row in records], [row["guia"] for row in rows])
+
+
+if __name__ == "__main__":
+    unittest.main()
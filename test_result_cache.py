@@ -0,0 +1,109 @@
+"""
+Testes unitários para o cache de resultados e o fluxo de processamento.
+"""
+import os
+import tempfile
+import time
+import unittest
+from pipeline import process_pdf, build_summary
+from result_cache import ResultCache, compute_cache_key, compute_file_cache_key
+
+
+RESULTADO = {
+    "extracted_data": {"cartorio": ["215,44"], "valor_pago": ["301,61"]},
+    "totals": {"total_valor_pago": 301.61, "total_cartorio": 215.44}
+}
+
+
+class TestResultCache(unittest.TestCase):
+    """Testes para o cache em disco."""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.tmp_dir.name)
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def _write_pdf(self, content):
+        """Grava um arquivo no diretório temporário."""
+        path = os.path.join(self.tmp_dir.name, "relatorio.pdf")
+        with open(path, "wb") as fp:
+            fp.write(content)
+        return path
+    
+    def test_key_depends_only_on_content(self):
+        """Testa que a chave do arquivo é igual à chave dos bytes."""
+        path = self._write_pdf(b"%PDF-1.4 conteudo")
+        self.assertEqual(compute_file_cache_key(path), compute_cache_key(b"%PDF-1.4 conteudo"))
+        self.assertNotEqual(compute_cache_key(b"a"), compute_cache_key(b"b"))
+    
+    def test_put_and_get(self):
+        """Testa armazenamento e leitura de um resultado."""
+        self.assertIsNone(self.cache.get("chave"))
+        self.cache.put("chave", RESULTADO)
+        self.assertEqual(self.cache.get("chave"), RESULTADO)
+    
+    def test_evicts_least_recently_used(self):
+        """Testa que o descarte remove a entrada usada há mais tempo."""
+        self.cache.put("antiga", RESULTADO)
+        self.cache.put("recente", RESULTADO)
+        os.utime(self.cache._path("antiga"), (time.time() - 60, time.time() - 60))
+        
+        self.cache.max_bytes = self.cache.size_bytes() - 1
+        self.cache.put("nova", RESULTADO)
+        
+        self.assertIsNone(self.cache.get("antiga"))
+        self.assertIsNotNone(self.cache.get("nova"))
+    
+    def test_corrupt_entry_is_a_miss(self):
+        """Testa que entradas corrompidas são descartadas."""
+        self.cache._path("chave").write_text("{corrompido")
+        self.assertIsNone(self.cache.get("chave"))
+        self.assertFalse(self.cache._path("chave").exists())
+    
+    def test_process_pdf_uses_cache(self):
+        """Testa que o PDF não é reprocessado quando já está em cache."""
+        path = self._write_pdf(b"%PDF-1.4 conteudo")
+        self.cache.put(compute_file_cache_key(path), RESULTADO)
+        
+        result = process_pdf(path, cache=self.cache)
+        
+        self.assertTrue(result["from_cache"])
+        self.assertEqual(result["totals"], RESULTADO["totals"])
+    
+    def test_key_depends_on_parser_options(self):
+        """Testa que resultados de outro motor ou recorte não são servidos pelo cache."""
+        path = self._write_pdf(b"%PDF-1.4 conteudo")
+        self.cache.put(compute_file_cache_key(path), RESULTADO)
+        
+        for options in ({"engine": "fast"}, {"crop_columns": True}):
+            with self.subTest(options=options):
+                result = process_pdf(path, cache=self.cache, **options)
+                self.assertFalse(result["from_cache"])
+        
+        # Opções que não alteram o resultado mantêm a chave
+        self.assertTrue(process_pdf(path, cache=self.cache, low_memory=True)["from_cache"])
+    
+    def test_process_pdf_does_not_cache_errors(self):
+        """Testa que falhas de leitura não são guardadas no cache."""
+        path = self._write_pdf(b"isto nao e um pdf")
+        
+        result = process_pdf(path, cache=self.cache)
+        
+        self.assertIsNotNone(result["error"])
+        self.assertEqual(self.cache.size_bytes(), 0)
+
+
+class TestBuildSummary(unittest.TestCase):
+    """Testes para o resumo JSON."""
+    
+    def test_summary_fields(self):
+        """Testa os campos do resumo."""
+        resumo = build_summary("guias.pdf", RESULTADO["totals"], RESULTADO["extracted_data"])
+        self.assertEqual(resumo["diferenca"], 86.17)
+        self.assertEqual(resumo["total_de_valores"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
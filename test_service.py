@@ -0,0 +1,174 @@
+"""
+Testes unitários para o serviço HTTP de extração.
+"""
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from benchmarks.synthetic_pdf import write_report
+from pipeline import process_pdf, build_summary
+from service import ExtractionService
+
+
+class TestExtractionService(unittest.IsolatedAsyncioTestCase):
+    """Testes de ponta a ponta do serviço, com conexões reais."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        pdf_path = os.path.join(cls.tmp_dir.name, "guias.pdf")
+        write_report(pdf_path, 2, rows_per_page=6)
+        with open(pdf_path, "rb") as fp:
+            cls.pdf_bytes = fp.read()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+    
+    async def asyncSetUp(self):
+        self.history_dir = tempfile.TemporaryDirectory()
+        self.service = ExtractionService(
+            workers=1, max_pending=1, max_bytes=1024 * 1024, cache_dir=None,
+            history_path=os.path.join(self.history_dir.name, "historico.sqlite3")
+        )
+        self.server = await self.service.start("127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+    
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.service.close()
+        self.history_dir.cleanup()
+    
+    async def _request(self, method, path, body=b"", headers=None):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        lines = [f"{method} {path} HTTP/1.1", "Host: localhost"]
+        if method == "POST":
+            lines.append(f"Content-Length: {len(body)}")
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+        
+        response = await reader.read()
+        writer.close()
+        head, _, payload = response.partition(b"\r\n\r\n")
+        status = int(head.split(b" ", 2)[1])
+        return status, json.loads(payload), head.decode("latin-1")
+    
+    async def test_extract_returns_summary_json(self):
+        """Testa que o resumo é igual ao "Resumo JSON" do app."""
+        status, payload, _ = await self._request(
+            "POST", "/extrair?arquivo=guias.pdf", self.pdf_bytes,
+            {"Content-Type": "application/pdf"}
+        )
+        
+        processed = process_pdf(self.pdf_bytes)
+        expected = build_summary("guias.pdf", processed["totals"],
+                                 processed["extracted_data"], processed["por_cartorio"])
+        self.assertEqual(status, 200)
+        self.assertEqual(payload, json.loads(json.dumps(expected)))
+    
+    async def test_guia_lookup(self):
+        """Testa a inclusão das linhas de uma guia no resumo."""
+        row = process_pdf(self.pdf_bytes)["rows"][0]
+        # Zeros à esquerda são opcionais na busca
+        numero = row.guia.lstrip("0")
+        status, payload, _ = await self._request(
+            "POST", f"/extrair?guia={numero}", self.pdf_bytes
+        )
+        
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["guia"], {"numero": numero, "linhas": [row.to_dict()]})
+    
+    async def test_history_query(self):
+        """Testa o registro no histórico e as consultas de GET /historico."""
+        status, _, _ = await self._request(
+            "POST", "/extrair?arquivo=guias.pdf&periodo=2026-03", self.pdf_bytes
+        )
+        self.assertEqual(status, 200)
+        processed = process_pdf(self.pdf_bytes)
+        
+        status, payload, _ = await self._request("GET", "/historico?periodo=2026-03")
+        self.assertEqual(status, 200)
+        self.assertEqual([item["arquivo"] for item in payload["arquivos"]], ["guias.pdf"])
+        self.assertEqual(
+            sum(item["quantidade"] for item in payload["por_cartorio"]), len(processed["rows"])
+        )
+        
+        content_hash = payload["arquivos"][0]["hash"]
+        status, payload, _ = await self._request("GET", f"/historico?hash={content_hash}")
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["por_cartorio"], processed["por_cartorio"])
+        
+        self.assertEqual((await self._request("GET", "/historico?hash=x"))[0], 404)
+        self.assertEqual((await self._request("GET", "/historico?periodo=03-2026"))[0], 400)
+        self.assertEqual(
+            (await self._request("POST", "/extrair?periodo=marco", self.pdf_bytes))[0], 400
+        )
+    
+    async def test_multipart_upload(self):
+        """Testa o envio por formulário multipart."""
+        boundary = "limite123"
+        body = (
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="arquivo"; filename="marco.pdf"\r\n'
+            "Content-Type: application/pdf\r\n\r\n"
+        ).encode() + self.pdf_bytes + f"\r\n--{boundary}--\r\n".encode()
+        
+        status, payload, _ = await self._request(
+            "POST", "/extrair", body,
+            {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["arquivo"], "marco.pdf")
+    
+    async def test_health_reports_queue(self):
+        """Testa o estado exposto em /saude."""
+        status, payload, _ = await self._request("GET", "/saude")
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["processos"], 1)
+        self.assertEqual(payload["em_andamento"], 0)
+        self.assertEqual(payload["fila"], 0)
+        self.assertEqual(payload["capacidade"], 1)
+    
+    async def test_saturated_pool_returns_429(self):
+        """Testa a rejeição quando todas as vagas estão ocupadas."""
+        self.service.in_flight = self.service.max_pending
+        status, payload, head = await self._request("POST", "/extrair", self.pdf_bytes)
+        self.service.in_flight = 0
+        
+        self.assertEqual(status, 429)
+        self.assertIn("Retry-After: 1", head)
+        self.assertIn("erro", payload)
+    
+    async def test_oversized_upload_returns_413(self):
+        """Testa que PDFs acima do limite são recusados sem processar."""
+        self.service.max_bytes = 100
+        status, _, _ = await self._request("POST", "/extrair", self.pdf_bytes)
+        self.assertEqual(status, 413)
+    
+    async def test_timeout_returns_504_and_keeps_slot(self):
+        """Testa o tempo limite e que a vaga só é liberada ao fim da extração."""
+        self.service.timeout = 0.001
+        status, _, _ = await self._request("POST", "/extrair", self.pdf_bytes)
+        self.assertEqual(status, 504)
+        
+        for _ in range(200):
+            if self.service.in_flight == 0:
+                break
+            await asyncio.sleep(0.05)
+        self.assertEqual(self.service.in_flight, 0)
+    
+    async def test_invalid_requests(self):
+        """Testa rotas, métodos e corpos inválidos."""
+        self.assertEqual((await self._request("GET", "/outra"))[0], 404)
+        self.assertEqual((await self._request("GET", "/extrair"))[0], 405)
+        self.assertEqual((await self._request("POST", "/extrair", b"texto"))[0], 400)
+        self.assertEqual(
+            (await self._request("POST", "/extrair?engine=x", self.pdf_bytes))[0], 400
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
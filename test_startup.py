@@ -0,0 +1,102 @@
+"""
+Testes de tempo de inicialização (importação dos módulos e primeiro PDF).
+
+Cada medição roda em um processo Python novo, com `python -X importtime`,
+para que módulos já carregados pelos outros testes não mascarem o custo.
+Os limites podem ser ajustados em máquinas lentas pelas variáveis
+FIRC_IMPORT_BUDGET_MS e FIRC_FIRST_REQUEST_BUDGET_MS.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Dict
+from benchmarks.synthetic_pdf import write_report
+
+
+ROOT = Path(__file__).resolve().parent
+
+# Módulos que só devem ser carregados quando um PDF é aberto
+HEAVY_MODULES = ("pdfplumber", "pdfminer", "fast_text")
+
+# Pontos de entrada que não devem carregar os módulos pesados
+ENTRY_MODULES = (
+    "pipeline", "jobs", "cli", "service", "checkpoint", "result_cache", "exporters",
+    "history_store"
+)
+
+IMPORT_BUDGET_MS = float(os.environ.get("FIRC_IMPORT_BUDGET_MS", "300"))
+FIRST_REQUEST_BUDGET_MS = float(os.environ.get("FIRC_FIRST_REQUEST_BUDGET_MS", "1500"))
+
+
+def import_times(code: str) -> Dict[str, int]:
+    """
+    Executa código em um processo novo e lê o relatório do -X importtime.
+    
+    Args:
+        code: Código Python a executar
+    
+    Returns:
+        Dict módulo -> tempo acumulado de importação (microssegundos)
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestStartup(unittest.TestCase):
+    """Testes para o custo de carregar os módulos e processar o primeiro PDF."""
+    
+    def test_entry_points_do_not_load_pdf_libraries(self):
+        """Testa que pdfplumber e pdfminer só carregam quando um PDF é aberto."""
+        for module in ENTRY_MODULES:
+            loaded = import_times(f"import {module}")
+            heavy = sorted(
+                name for name in loaded if name.split(".")[0] in HEAVY_MODULES
+            )
+            self.assertEqual(heavy, [], f"import {module}")
+    
+    def test_import_time_budget(self):
+        """Testa o tempo de importação do pipeline (melhor de 3 execuções)."""
+        best_ms = min(
+            import_times("import pipeline")["pipeline"] / 1000 for _ in range(3)
+        )
+        self.assertLess(best_ms, IMPORT_BUDGET_MS)
+    
+    def test_first_request_budget(self):
+        """Testa o tempo até o primeiro PDF processado em um processo novo."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "guias.pdf")
+            expected = write_report(pdf_path, 2, rows_per_page=5)
+            code = (
+                "import time\n"
+                "start = time.perf_counter()\n"
+                "from pipeline import process_pdf\n"
+                f"result = process_pdf({pdf_path!r})\n"
+                "print(result['totals']['total_valor_pago'])\n"
+                "print((time.perf_counter() - start) * 1000)\n"
+            )
+            completed = subprocess.run(
+                [sys.executable, "-c", code],
+                cwd=ROOT, capture_output=True, text=True, check=True
+            )
+        
+        total, elapsed_ms = completed.stdout.split()
+        expected_total = expected["total_valor_pago_centavos"] / 100
+        self.assertAlmostEqual(float(total), expected_total, places=2)
+        self.assertLess(float(elapsed_ms), FIRST_REQUEST_BUDGET_MS)
+
+
+if __name__ == "__main__":
+    unittest.main()